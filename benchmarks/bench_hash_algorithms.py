@@ -0,0 +1,85 @@
+"""Throughput of the hash algorithms available to the hashing functions.
+
+Hashes an in-memory buffer with every algorithm (or the selected ones)
+through the same hasher objects that `get_file_hash_ne()` uses, and
+optionally a file through `get_file_hash_ne()` itself.
+
+Usage:
+    python benchmarks/bench_hash_algorithms.py [--size-mb 64] [--repeat 3]
+        [--algorithms crc32 blake2b-256 sha256] [--file /path/to/big.iso]
+"""
+import argparse
+import os
+import time
+from typing import List
+from typing import Optional
+
+from iotanbo_py_utils import file_utils
+from iotanbo_py_utils.hash_algorithms import available_hash_algorithms
+from iotanbo_py_utils.hash_algorithms import new_hasher_ne
+
+
+# fed in chunks of the default read buffer size, like a file is
+CHUNK_SIZE = 65536 * 2
+
+
+def buffer_throughput(name: str, data: memoryview, repeat: int) -> float:
+    """Best throughput in GiB/s of hashing `data` in chunks."""
+    best = float("inf")
+    for _ in range(repeat):
+        h = new_hasher_ne(name).unwrap()
+        start = time.perf_counter()
+        for offset in range(0, len(data), CHUNK_SIZE):
+            h.update(data[offset : offset + CHUNK_SIZE])
+        h.digest()
+        best = min(best, time.perf_counter() - start)
+    return len(data) / 1024**3 / best
+
+
+def file_throughput(name: str, path: str, repeat: int) -> float:
+    """Best throughput in GiB/s of `get_file_hash_ne()`."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        file_utils.get_file_hash_ne(path, algorithm=name).unwrap()
+        best = min(best, time.perf_counter() - start)
+    return os.path.getsize(path) / 1024**3 / best
+
+
+def run(algorithms: List[str], size_mb: int, repeat: int, path: Optional[str]) -> None:
+    data = memoryview(os.urandom(size_mb * 1024 * 1024))
+    header = f"{'algorithm':>14} {'buffer, GiB/s':>14}"
+    if path:
+        header += f" {'file, GiB/s':>12}"
+    print(header)
+    rows = []
+    for name in algorithms:
+        row = [buffer_throughput(name, data, repeat)]
+        if path:
+            row.append(file_throughput(name, path, repeat))
+        rows.append((name, row))
+    for name, row in sorted(rows, key=lambda r: -r[1][0]):
+        print(f"{name:>14} " + " ".join(f"{v:>14.2f}" for v in row))
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--algorithms",
+        nargs="+",
+        help="algorithms to measure, all available by default",
+    )
+    parser.add_argument("--size-mb", type=int, default=64)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--file", help="also hash this file with get_file_hash_ne()")
+    args = parser.parse_args()
+
+    algorithms = args.algorithms or available_hash_algorithms() + [
+        "blake2b-256",
+        "blake2s-128",
+    ]
+    run(algorithms, args.size_mb, args.repeat, args.file)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,91 @@
+"""Benchmark of the `mmap` and the `readinto` hashing paths.
+
+Creates files of several sizes in a temporary directory and hashes each one
+with `get_file_hash_ne()` / `get_file_crc32_ne()` with `use_mmap=False`
+(copy through the read buffer) and `use_mmap=True`. Every file is hashed
+once before the measurement, so the numbers are for files that are
+already in the page cache.
+
+Usage:
+    python benchmarks/bench_mmap_hash.py [--sizes-mb 1 16 256]
+        [--algorithms crc32 sha256] [--repeat 3] [--file /path/to/big.iso]
+"""
+import argparse
+import os
+import tempfile
+import time
+from typing import Callable
+from typing import List
+
+from iotanbo_py_utils import file_utils
+
+
+def create_file(path: str, size: int) -> None:
+    """Create a file of `size` pseudo-random bytes."""
+    block = os.urandom(1024 * 1024)
+    with open(path, "wb") as f:
+        while size > 0:
+            f.write(block[:size])
+            size -= len(block)
+
+
+def hash_function(algorithm: str, use_mmap: bool) -> Callable[[str], object]:
+    if algorithm == "crc32":
+        return lambda p: file_utils.get_file_crc32_ne(p, use_mmap=use_mmap).unwrap()
+    return lambda p: file_utils.get_file_hash_ne(
+        p, algorithm=algorithm, use_mmap=use_mmap
+    ).unwrap()
+
+
+def best_time(f: Callable[[str], object], path: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        f(path)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(paths: List[str], algorithms: List[str], repeat: int) -> None:
+    print(
+        f"{'size, MiB':>10} {'algorithm':>10} {'readinto, GiB/s':>16}"
+        f" {'mmap, GiB/s':>12} {'speedup':>8}"
+    )
+    for path in paths:
+        size = os.path.getsize(path)
+        gib = size / 1024**3
+        for algorithm in algorithms:
+            # warm up the page cache
+            hash_function(algorithm, False)(path)
+            t_read = best_time(hash_function(algorithm, False), path, repeat)
+            t_mmap = best_time(hash_function(algorithm, True), path, repeat)
+            print(
+                f"{size / 1024 ** 2:>10.1f} {algorithm:>10} {gib / t_read:>16.2f}"
+                f" {gib / t_mmap:>12.2f} {t_read / t_mmap:>7.2f}x"
+            )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--file", help="existing file to hash instead of synthetic ones"
+    )
+    parser.add_argument("--sizes-mb", type=int, nargs="+", default=[1, 16, 256])
+    parser.add_argument("--algorithms", nargs="+", default=["crc32", "sha1", "sha256"])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.file:
+        run([args.file], args.algorithms, args.repeat)
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        paths = []
+        for size_mb in args.sizes_mb:
+            path = os.path.join(tmp, f"{size_mb}mb.bin")
+            create_file(path, size_mb * 1024 * 1024)
+            paths.append(path)
+        run(paths, args.algorithms, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
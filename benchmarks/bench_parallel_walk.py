@@ -0,0 +1,105 @@
+"""Benchmark of the sequential and the thread-pool directory traversal.
+
+Creates a synthetic deep/wide tree in a temporary directory and lists it with
+`get_file_list_recursively_ne()` using different `max_workers` values.
+
+On a local disk a directory scan takes microseconds, and the threads
+mostly compete for the GIL. Use `--root` to point the benchmark at a tree on
+a network file system, or `--latency` to emulate a per-`scandir`
+round-trip delay.
+
+Usage:
+    python benchmarks/bench_parallel_walk.py [--depth 4] [--width 6]
+        [--files 10] [--latency 0.002] [--root /mnt/nfs/tree]
+"""
+import argparse
+import os
+import tempfile
+import time
+from typing import Any
+from typing import List
+
+from iotanbo_py_utils import file_utils
+
+
+def create_tree(root: str, depth: int, width: int, files: int) -> int:
+    """Create a tree with `width` sub-directories per level, return number of files."""
+    count = 0
+    level = [root]
+    for _ in range(depth):
+        next_level = []
+        for d in level:
+            for i in range(width):
+                sub = os.path.join(d, f"d{i}")
+                os.mkdir(sub)
+                next_level.append(sub)
+        level = next_level
+    for dirpath, _, _ in os.walk(root):
+        for i in range(files):
+            with open(os.path.join(dirpath, f"f{i}.bin"), "wb") as f:
+                f.write(b"x")
+            count += 1
+    return count
+
+
+def emulate_latency(seconds: float) -> None:
+    """Make every `os.scandir()` call sleep, like a network round-trip does."""
+    original_scandir = os.scandir
+
+    def slow_scandir(path: Any) -> Any:
+        time.sleep(seconds)
+        return original_scandir(path)
+
+    os.scandir = slow_scandir  # type: ignore[assignment]
+
+
+def run(root: str, workers: List[int], repeat: int) -> None:
+    baseline = 0.0
+    print(f"{'max_workers':>12} {'best, s':>10} {'speedup':>8} {'files':>8}")
+    for max_workers in workers:
+        best = float("inf")
+        n = 0
+        for _ in range(repeat):
+            start = time.perf_counter()
+            n = len(
+                file_utils.get_file_list_recursively_ne(
+                    root, max_workers=max_workers
+                ).unwrap()
+            )
+            best = min(best, time.perf_counter() - start)
+        if not baseline:
+            baseline = best
+        print(f"{max_workers:>12} {best:>10.3f} {baseline / best:>7.2f}x {n:>8}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--root", help="existing tree to walk instead of a synthetic one"
+    )
+    parser.add_argument("--depth", type=int, default=4)
+    parser.add_argument("--width", type=int, default=6)
+    parser.add_argument("--files", type=int, default=10)
+    parser.add_argument(
+        "--latency", type=float, default=0.0, help="emulated scandir latency in seconds"
+    )
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+
+    if args.root:
+        if args.latency:
+            emulate_latency(args.latency)
+        run(args.root, args.workers, args.repeat)
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        n = create_tree(tmp, args.depth, args.width, args.files)
+        dirs = sum(args.width**i for i in range(args.depth + 1))
+        print(f"synthetic tree: {dirs} directories, {n} files, latency {args.latency}s")
+        if args.latency:
+            emulate_latency(args.latency)
+        run(tmp, args.workers, args.repeat)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+"""Awaitable variants of the file I/O and hashing functions.
+
+Each coroutine runs the `file_utils` function of the same name in a thread
+pool and returns the same `Result[..., Error]`, so disk I/O does not block
+the event loop. All coroutines share one executor with a bounded number of
+threads: when more operations are awaited at once, the rest wait in the
+executor queue, not in the loop. The default executor is created on the
+first use; `configure_executor()` changes the number of threads and
+`set_executor()` installs another executor, e.g. a shared application one.
+"""
+import asyncio
+import functools
+import os
+import threading
+from concurrent.futures import Executor
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import TypeVar
+from typing import Union
+
+from result import Err
+from result import Ok
+from result import Result
+
+from . import file_utils
+from .error import Error
+from .error import ErrorKind
+from .hash_cache import HashCache
+from .ignore_matcher import IgnoreMatcher
+
+
+T = TypeVar("T")
+
+# file I/O releases the GIL, but more threads than this mostly add
+# contention on the same disk
+_DEFAULT_MAX_WORKERS = min(32, (os.cpu_count() or 1) + 4)
+
+_lock = threading.Lock()
+_executor: Optional[Executor] = None
+# the executor was created here and is shut down when replaced
+_owned = False
+
+
+def _get_executor() -> Executor:
+    global _executor, _owned
+    with _lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(
+                max_workers=_DEFAULT_MAX_WORKERS, thread_name_prefix="iotanbo-aio"
+            )
+            _owned = True
+        return _executor
+
+
+def _replace_executor(executor: Optional[Executor], owned: bool) -> None:
+    global _executor, _owned
+    with _lock:
+        old, old_owned = _executor, _owned
+        _executor, _owned = executor, owned
+    if old is not None and old_owned:
+        # operations that are already submitted complete in the background
+        old.shutdown(wait=False)
+
+
+def configure_executor(max_workers: int) -> Result[None, Error]:
+    """Replace the executor with a thread pool of `max_workers` threads.
+
+    Operations that are already running complete on the old executor.
+
+    Args:
+        max_workers (int): maximum number of concurrent operations.
+
+    Returns:
+        Result[None, Error]:
+            Ok (None): operation successful.
+            Err (kind == `ValueError`): `max_workers` is less than 1.
+    """
+    if max_workers < 1:
+        return Err(
+            Error(ErrorKind.ValueError, f"max_workers must be >= 1, got {max_workers}")
+        )
+    _replace_executor(
+        ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="iotanbo-aio"),
+        owned=True,
+    )
+    return Ok(None)
+
+
+def set_executor(executor: Optional[Executor]) -> None:
+    """Run the operations on `executor`, or on the default one if `None`.
+
+    The caller is responsible for shutting down its executor.
+
+    Args:
+        executor (Optional[Executor]): executor to use.
+    """
+    _replace_executor(executor, owned=False)
+
+
+def shutdown_executor(wait: bool = True) -> None:
+    """Shut down the default executor, if it was created.
+
+    The next operation creates a new one.
+
+    Args:
+        wait (bool): wait for the running operations to complete.
+    """
+    global _executor, _owned
+    with _lock:
+        old, old_owned = _executor, _owned
+        _executor, _owned = None, False
+    if old is not None and old_owned:
+        old.shutdown(wait=wait)
+
+
+async def _run(func: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        _get_executor(), functools.partial(func, *args, **kwargs)
+    )
+
+
+async def _run_ne(
+    func: Callable[..., Result[T, Error]], *args: Any, **kwargs: Any
+) -> Result[T, Error]:
+    try:
+        return await _run(func, *args, **kwargs)
+    except Exception as e:
+        # the executor is shut down or cannot start a thread
+        return Err(Error.from_exception(e))
+
+
+async def read_file_ne(path: str, encoding: str = "utf-8") -> Result[str, Error]:
+    """Read a text file, see `file_utils.read_file_ne`."""
+    return await _run_ne(file_utils.read_file_ne, path, encoding)
+
+
+async def read_binary_file_ne(path: str) -> Result[bytes, Error]:
+    """Read a binary file, see `file_utils.read_binary_file_ne`."""
+    return await _run_ne(file_utils.read_binary_file_ne, path)
+
+
+async def write_file_ne(
+    path: str,
+    contents: str = "",
+    encoding: str = "utf-8",
+    *,
+    overwrite: bool = False,
+    newline: str = "\n",
+    atomic: bool = False,
+) -> Result[None, Error]:
+    """Write a text file, see `file_utils.write_file_ne`."""
+    return await _run_ne(
+        file_utils.write_file_ne,
+        path,
+        contents,
+        encoding,
+        overwrite=overwrite,
+        newline=newline,
+        atomic=atomic,
+    )
+
+
+async def write_binary_file_ne(
+    path: str, contents: bytes, *, overwrite: bool = False, atomic: bool = False
+) -> Result[None, Error]:
+    """Write a binary file, see `file_utils.write_binary_file_ne`."""
+    return await _run_ne(
+        file_utils.write_binary_file_ne,
+        path,
+        contents,
+        overwrite=overwrite,
+        atomic=atomic,
+    )
+
+
+async def copy_file_ne(
+    src: str, dest: str, *, overwrite: bool = False
+) -> Result[None, Error]:
+    """Copy a file, see `file_utils.copy_file_ne`."""
+    return await _run_ne(file_utils.copy_file_ne, src, dest, overwrite=overwrite)
+
+
+async def move_file_ne(
+    src: str, dest: str, *, overwrite: bool = False
+) -> Result[None, Error]:
+    """Move a file, see `file_utils.move_file_ne`."""
+    return await _run_ne(file_utils.move_file_ne, src, dest, overwrite=overwrite)
+
+
+async def copy_tree_ne(
+    src: str,
+    dest: str,
+    *,
+    overwrite: bool = False,
+    symlinks: bool = True,
+    ignore_dangling_symlinks: bool = True,
+) -> Result[None, Error]:
+    """Copy a directory tree, see `file_utils.copy_tree_ne`."""
+    return await _run_ne(
+        file_utils.copy_tree_ne,
+        src,
+        dest,
+        overwrite=overwrite,
+        symlinks=symlinks,
+        ignore_dangling_symlinks=ignore_dangling_symlinks,
+    )
+
+
+async def get_file_list_ne(path: str, *, sort: bool = True) -> Result[List[str], Error]:
+    """List the files of a directory, see `file_utils.get_file_list_ne`."""
+    return await _run_ne(file_utils.get_file_list_ne, path, sort=sort)
+
+
+async def get_subdir_list_ne(
+    path: str, *, sort: bool = True
+) -> Result[List[str], Error]:
+    """List the subdirectories of a directory.
+
+    See `file_utils.get_subdir_list_ne`.
+    """
+    return await _run_ne(file_utils.get_subdir_list_ne, path, sort=sort)
+
+
+async def get_file_list_recursively_ne(
+    path: str,
+    *,
+    sort: bool = True,
+    ignore_list: Optional[Union[List[str], IgnoreMatcher]] = None,
+    max_workers: int = 1,
+) -> Result[List[str], Error]:
+    """List the files of a directory tree.
+
+    See `file_utils.get_file_list_recursively_ne`. If `max_workers` is greater
+    than 1, the scanning threads are started in addition to the executor
+    thread that runs the operation.
+    """
+    return await _run_ne(
+        file_utils.get_file_list_recursively_ne,
+        path,
+        sort=sort,
+        ignore_list=ignore_list,
+        max_workers=max_workers,
+    )
+
+
+async def get_subdir_list_recursively_ne(
+    path: str,
+    *,
+    sort: bool = True,
+    ignore_list: Optional[Union[List[str], IgnoreMatcher]] = None,
+    max_workers: int = 1,
+) -> Result[List[str], Error]:
+    """List the subdirectories of a directory tree.
+
+    See `file_utils.get_subdir_list_recursively_ne`. If `max_workers` is greater
+    than 1, the scanning threads are started in addition to the executor
+    thread that runs the operation.
+    """
+    return await _run_ne(
+        file_utils.get_subdir_list_recursively_ne,
+        path,
+        sort=sort,
+        ignore_list=ignore_list,
+        max_workers=max_workers,
+    )
+
+
+async def get_file_crc32_ne(
+    path: str,
+    *,
+    read_buf_size: Optional[int] = None,
+    use_mmap: bool = False,
+    cache: Optional[HashCache] = None,
+) -> Result[int, Error]:
+    """Get the CRC32 of a file, see `file_utils.get_file_crc32_ne`."""
+    return await _run_ne(
+        file_utils.get_file_crc32_ne,
+        path,
+        read_buf_size=read_buf_size,
+        use_mmap=use_mmap,
+        cache=cache,
+    )
+
+
+async def get_file_hash_ne(
+    path: str,
+    *,
+    algorithm: str,
+    read_buf_size: Optional[int] = None,
+    use_mmap: bool = False,
+    cache: Optional[HashCache] = None,
+) -> Result[bytes, Error]:
+    """Get the digest of a file, see `file_utils.get_file_hash_ne`."""
+    return await _run_ne(
+        file_utils.get_file_hash_ne,
+        path,
+        algorithm=algorithm,
+        read_buf_size=read_buf_size,
+        use_mmap=use_mmap,
+        cache=cache,
+    )
+
+
+async def get_file_digests_ne(
+    path: str,
+    *,
+    algorithms: Iterable[str],
+    read_buf_size: Optional[int] = None,
+    use_mmap: bool = False,
+    cache: Optional[HashCache] = None,
+) -> Result[Dict[str, bytes], Error]:
+    """Get several digests of a file in one pass.
+
+    See `file_utils.get_file_digests_ne`.
+    """
+    return await _run_ne(
+        file_utils.get_file_digests_ne,
+        path,
+        # the iterable may be lazy, consume it in the caller's thread
+        algorithms=list(algorithms),
+        read_buf_size=read_buf_size,
+        use_mmap=use_mmap,
+        cache=cache,
+    )
+
+
+async def hash_files_ne(
+    paths: Iterable[str],
+    *,
+    algorithm: str,
+    read_buf_size: Optional[int] = None,
+    cache: Optional[HashCache] = None,
+) -> Dict[str, Result[bytes, Error]]:
+    """Hash many files on the executor, do not raise exceptions.
+
+    Unlike `file_utils.hash_files_ne()`, no additional threads are started:
+    the files are hashed concurrently by the executor threads, so the
+    number of files read at once is bounded by the executor size.
+
+    Args:
+        paths (Iterable[str]): paths to the files; duplicates are hashed once.
+        algorithm (str): hash algorithm, see `file_utils.get_file_hash_ne()`.
+        read_buf_size (Optional[int]): read buffer size, see
+            `file_utils.get_file_crc32_ne()`.
+        cache (Optional[HashCache]): cache of the digests.
+
+    Returns:
+        Dict[str, Result[bytes, Error]]: result of each path,
+            see `file_utils.get_file_hash_ne()`.
+    """
+    unique = list(dict.fromkeys(paths))
+    results = await asyncio.gather(
+        *(
+            get_file_hash_ne(
+                p, algorithm=algorithm, read_buf_size=read_buf_size, cache=cache
+            )
+            for p in unique
+        )
+    )
+    return dict(zip(unique, results))
@@ -0,0 +1,248 @@
+"""Content-defined chunking of files and chunk manifests for delta transfer."""
+import hashlib
+import os
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Set
+from typing import Tuple
+
+from result import Err
+from result import Ok
+from result import Result
+
+from .error import Error
+from .error import ErrorKind
+from .file_utils import _auto_read_buf_size
+from .file_utils import _file_stat_ne
+from .file_utils import _read_buffer
+from .hash_algorithms import hash_algorithm_available
+from .hash_algorithms import new_hasher_ne
+
+
+_MASK64 = (1 << 64) - 1
+
+# Gear table: a fixed pseudo-random 64-bit value per byte value, derived
+# from SHA-256 so that it is the same on every platform and version.
+_GEAR = tuple(
+    int.from_bytes(hashlib.sha256(bytes([i])).digest()[:8], "big") for i in range(256)
+)
+
+
+class Chunk(NamedTuple):
+    """A chunk of a file."""
+
+    offset: int
+    length: int
+    digest: bytes
+
+
+class ChunkManifest(NamedTuple):
+    """The chunks of a file and the parameters they were produced with.
+
+    Manifests are comparable only if they have the same parameters.
+    """
+
+    size: int
+    algorithm: str
+    min_size: int
+    avg_size: int
+    max_size: int
+    chunks: List[Chunk]
+
+
+def _masks(avg_size: int) -> Tuple[int, int]:
+    """Get the masks for FastCDC normalized chunking (level 1).
+
+    A cut point is where the masked bits of the gear hash are all zero.
+    Before the average size is reached, one more bit is required, after
+    it one bit less, which narrows the distribution of the chunk sizes.
+    The masks take the high bits of the hash, which depend on the last
+    64 bytes, so the window is not too short.
+    """
+    bits = avg_size.bit_length() - 1
+
+    def high_bits(n: int) -> int:
+        return ((1 << n) - 1) << (64 - n)
+
+    return high_bits(bits + 1), high_bits(bits - 1)
+
+
+def _find_cut(
+    data: bytearray,
+    min_size: int,
+    avg_size: int,
+    max_size: int,
+    eof: bool,
+    start: int = 0,
+    h: int = 0,
+) -> Tuple[int, int, int]:
+    """Find the length of the first chunk of `data`.
+
+    Return (length, position, hash); the length is 0 if more data is needed,
+    then the search is resumed with `start` and `h` set to the returned
+    position and hash when more data is appended, so that the bytes that
+    are already rolled are not rolled again.
+    """
+    n = len(data)
+    if n <= min_size:
+        return (n if eof else 0), 0, 0
+    mask_s, mask_l = _masks(avg_size)
+    gear = _GEAR
+    i = max(start, min_size)
+    normal = min(avg_size, n)
+    while i < normal:
+        h = ((h << 1) + gear[data[i]]) & _MASK64
+        i += 1
+        if not h & mask_s:
+            return i, 0, 0
+    end = min(max_size, n)
+    while i < end:
+        h = ((h << 1) + gear[data[i]]) & _MASK64
+        i += 1
+        if not h & mask_l:
+            return i, 0, 0
+    if end == max_size or eof:
+        return end, 0, 0
+    return 0, i, h
+
+
+def _chunking_validation(
+    algorithm: str, min_size: int, avg_size: int, max_size: int
+) -> Result[None, Error]:
+    if not hash_algorithm_available(algorithm):
+        return Err(
+            Error(ErrorKind.ValueError, f"unsupported hash algorithm: {algorithm}")
+        )
+    if avg_size < 64 or avg_size & (avg_size - 1):
+        return Err(
+            Error(ErrorKind.ValueError, "avg_size must be a power of 2 and >= 64")
+        )
+    if not 0 < min_size < avg_size < max_size:
+        return Err(
+            Error(ErrorKind.ValueError, "0 < min_size < avg_size < max_size expected")
+        )
+    return Ok(None)
+
+
+def get_file_chunks_ne(
+    path: str,
+    *,
+    algorithm: str = "sha256",
+    min_size: int = 2048,
+    avg_size: int = 8192,
+    max_size: int = 65536,
+    read_buf_size: Optional[int] = None,
+) -> Result[ChunkManifest, Error]:
+    """Split a file into content-defined chunks, do not raise exceptions.
+
+    Chunk boundaries are found with a gear rolling hash (FastCDC-style), so
+    they depend on the content around them and not on the offsets: an
+    insertion or removal changes only the chunks around it, while the
+    rest of the file still has the same chunks, shifted. The file is read
+    once through a buffer like `get_file_hash_ne()` does, and each chunk
+    is hashed with `algorithm`. The rolling hash runs in pure Python, at
+    a few MB/s; the first `min_size` bytes of each chunk are not rolled.
+
+    Args:
+        path (str): path to the file.
+        algorithm (str): chunk hash algorithm, see `get_file_hash_ne()`.
+        min_size (int): minimum chunk size, except the last chunk.
+        avg_size (int): target average chunk size, a power of 2.
+        max_size (int): maximum chunk size.
+        read_buf_size (Optional[int]): see `file_utils.get_file_crc32_ne()`.
+
+    Returns:
+        Result[ChunkManifest, Error]:
+            Ok (ChunkManifest): chunks of the file.
+            Err (kind == `FileNotFoundError`): path does not exist.
+            Err (kind == `ValueError`): unsupported hash algorithm or
+                invalid chunk sizes.
+            Err (kind == `TypeError`): path is not a file.
+            Err (kind == `PermissionError`): wrong permissions.
+            Err (kind == `...`): other error(s) occurred.
+    """
+    validation = _chunking_validation(algorithm, min_size, avg_size, max_size)
+    if validation.is_err():
+        return Err(validation.unwrap_err())
+    file_validation = _file_stat_ne(path)
+    if file_validation.is_err():
+        return Err(file_validation.unwrap_err())
+
+    chunks = []
+    offset = 0
+    # data that is read but not yet split into chunks
+    pending = bytearray()
+    # the rolling hash state of the pending data
+    position, rolling = 0, 0
+    try:
+        with open(path, "rb", buffering=0) as f:
+            if read_buf_size is None:
+                read_buf_size = _auto_read_buf_size(os.fstat(f.fileno()))
+            with _read_buffer(read_buf_size) as mv:
+                eof = False
+                while not eof:
+                    n = f.readinto(mv)
+                    eof = not n
+                    pending += mv[:n]
+                    while pending:
+                        cut, position, rolling = _find_cut(
+                            pending,
+                            min_size,
+                            avg_size,
+                            max_size,
+                            eof,
+                            position,
+                            rolling,
+                        )
+                        if not cut:
+                            break
+                        h = new_hasher_ne(algorithm).unwrap()
+                        with memoryview(pending) as pmv, pmv[:cut] as chunk:
+                            h.update(chunk)
+                        chunks.append(Chunk(offset, cut, h.digest()))
+                        offset += cut
+                        del pending[:cut]
+    except Exception as e:
+        # error while doing file system operations
+        return Err(Error.from_exception(e))
+    return Ok(ChunkManifest(offset, algorithm, min_size, avg_size, max_size, chunks))
+
+
+def diff_chunk_manifests_ne(
+    old: ChunkManifest, new: ChunkManifest
+) -> Result[List[Tuple[int, int]], Error]:
+    """Get the byte ranges of the new file that the old one does not have.
+
+    A chunk of the new file needs to be transferred if there is no chunk
+    with the same digest anywhere in the old file; adjacent ranges are
+    merged. The other chunks can be copied from the old file by digest.
+
+    Args:
+        old (ChunkManifest): manifest of the file on the receiving side.
+        new (ChunkManifest): manifest of the file to transfer.
+
+    Returns:
+        Result[List[Tuple[int, int]], Error]:
+            Ok (List[Tuple[int, int]]): (offset, length) ranges in the new file.
+            Err (kind == `ValueError`): the manifests have different
+                algorithms or chunk sizes.
+    """
+    if old[1:5] != new[1:5]:
+        return Err(
+            Error(
+                ErrorKind.ValueError,
+                "manifests are produced with different parameters: "
+                f"{tuple(old[1:5])} != {tuple(new[1:5])}",
+            )
+        )
+    known: Set[bytes] = {c.digest for c in old.chunks}
+    ranges: List[Tuple[int, int]] = []
+    for c in new.chunks:
+        if c.digest in known:
+            continue
+        if ranges and sum(ranges[-1]) == c.offset:
+            ranges[-1] = (ranges[-1][0], ranges[-1][1] + c.length)
+        else:
+            ranges.append((c.offset, c.length))
+    return Ok(ranges)
@@ -0,0 +1,231 @@
+"""Writing many small files into a directory through its file descriptor."""
+import errno
+import os
+import stat
+from typing import Any
+from typing import Dict
+from typing import Iterable
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from result import Err
+from result import Ok
+from result import Result
+
+from .error import Error
+from .error import ErrorKind
+
+
+# the names are resolved relative to the descriptor with `openat()`
+_DIR_FD_SUPPORTED = os.open in os.supports_dir_fd and os.lstat in os.supports_dir_fd
+
+_WRITE_FLAGS = (
+    os.O_WRONLY
+    | os.O_CREAT
+    | getattr(os, "O_BINARY", 0)
+    | getattr(os, "O_CLOEXEC", 0)
+    # the last component of a name is never followed, even if it is a
+    # dangling symlink that `file_utils.write_file_ne()` writes through
+    | getattr(os, "O_NOFOLLOW", 0)
+)
+
+
+def _is_valid_name(name: str) -> bool:
+    """Check that a name is relative and does not leave the directory."""
+    if not name or os.path.isabs(name) or os.path.splitdrive(name)[0]:
+        return False
+    if os.altsep:  # pragma: no cover
+        name = name.replace(os.altsep, os.sep)  # pragma: no cover
+    return os.pardir not in name.split(os.sep)
+
+
+class DirWriter:
+    """Writer of many files into one directory.
+
+    The directory is opened once and the files are created relative to its
+    descriptor, so the kernel does not resolve the full path of each file
+    and the directory cannot be replaced while it is written. A file costs
+    an `open()`, a `write()` and a `close()`; there is no separate
+    validation, the errors of `open()` are translated into the same error
+    kinds as `file_utils.write_file_ne()` returns. Where `dir_fd` is not
+    supported (Windows), the names are joined to the directory path.
+
+    Names with `..` components are rejected, but the subdirectories of a
+    name are resolved by the kernel: a symlink to a directory inside the
+    written directory is followed, even if it points outside of it. Only
+    the last component of a name is never followed.
+
+    Example:
+        >>> with DirWriter.open_ne("out").unwrap() as writer:
+        >>>     result = writer.write_files_ne(states.items(), overwrite=True)
+    """
+
+    def __init__(self, path: str, dir_fd: Optional[int]):
+        """Use `open_ne()` to create a writer.
+
+        Args:
+            path (str): path to the directory.
+            dir_fd (Optional[int]): open descriptor of the directory.
+        """
+        self.path = path
+        self._dir_fd = dir_fd
+        self._closed = False
+
+    @classmethod
+    def open_ne(cls, path: str) -> Result["DirWriter", Error]:
+        """Open a directory for writing, do not raise exceptions.
+
+        Args:
+            path (str): path to the directory.
+
+        Returns:
+            Result[DirWriter, Error]:
+                Ok (DirWriter): operation successful.
+                Err (kind == `FileNotFoundError`): directory does not exist.
+                Err (kind == `TypeError`): path is not a directory.
+                Err (kind == `PermissionError`): wrong permissions.
+                Err (kind == `...`): other error(s) occurred.
+        """
+        if not _DIR_FD_SUPPORTED:  # pragma: no cover
+            if not os.path.isdir(path):  # pragma: no cover
+                if os.path.lexists(path):  # pragma: no cover
+                    return Err(Error(ErrorKind.TypeError))  # pragma: no cover
+                return Err(Error(ErrorKind.FileNotFoundError))  # pragma: no cover
+            return Ok(cls(path, None))  # pragma: no cover
+        try:
+            fd = os.open(
+                path, os.O_RDONLY | os.O_DIRECTORY | getattr(os, "O_CLOEXEC", 0)
+            )
+        except NotADirectoryError:
+            return Err(Error(ErrorKind.TypeError))
+        except Exception as e:
+            return Err(Error.from_exception(e))
+        return Ok(cls(path, fd))
+
+    def _open(self, name: str, flags: int) -> int:
+        if self._dir_fd is None:  # pragma: no cover
+            return os.open(os.path.join(self.path, name), flags, 0o666)
+        return os.open(name, flags, 0o666, dir_fd=self._dir_fd)
+
+    def _error(self, name: str, e: Exception) -> Error:
+        """Translate an exception of writing `name` into an error."""
+        if isinstance(e, FileExistsError):
+            try:
+                if self._dir_fd is None:  # pragma: no cover
+                    st = os.lstat(os.path.join(self.path, name))
+                else:
+                    st = os.lstat(name, dir_fd=self._dir_fd)
+            except OSError:  # pragma: no cover
+                return Error(ErrorKind.FileExistsError)  # pragma: no cover
+            if not stat.S_ISREG(st.st_mode):
+                return Error(ErrorKind.TypeError)
+            return Error(ErrorKind.FileExistsError)
+        if isinstance(e, OSError) and e.errno in (errno.EISDIR, errno.ELOOP):
+            # with `O_NOFOLLOW`, a symlink fails with `ELOOP`
+            return Error(ErrorKind.TypeError)
+        return Error.from_exception(e)
+
+    def _write(self, name: str, data: bytes, overwrite: bool) -> None:
+        flags = _WRITE_FLAGS | (os.O_TRUNC if overwrite else os.O_EXCL)
+        fd = self._open(name, flags)
+        try:
+            with memoryview(data) as mv:
+                written = 0
+                while written < len(mv):
+                    written += os.write(fd, mv[written:])
+        except BaseException:
+            os.close(fd)
+            if not overwrite:
+                # do not leave a partially written new file
+                self._remove(name)
+            raise
+        os.close(fd)
+
+    def _remove(self, name: str) -> None:
+        try:
+            if self._dir_fd is None:  # pragma: no cover
+                os.remove(os.path.join(self.path, name))
+            else:
+                os.remove(name, dir_fd=self._dir_fd)
+        except OSError:  # pragma: no cover
+            pass  # pragma: no cover
+
+    def write_files_ne(
+        self,
+        files: Iterable[Tuple[str, Union[str, bytes]]],
+        encoding: str = "utf-8",
+        *,
+        overwrite: bool = False,
+        newline: str = "\n",
+    ) -> Result[None, Dict[str, Error]]:
+        """Write many files, do not raise exceptions.
+
+        A failed file does not stop the others, so the error is a mapping
+        of every failed name to its error rather than a single `Error`.
+
+        Args:
+            files (Iterable[Tuple[str, Union[str, bytes]]]): (name, contents)
+                pairs, e.g. `dict.items()`. A name is relative to the
+                directory and may contain subdirectories that exist, but
+                not `..` components.
+                Text contents are encoded, bytes are written as they are.
+            encoding (str): text file encoding ("utf-8" default).
+            overwrite (bool): rewrite files that already exist.
+            newline (str): new line separator of the text contents;
+                "" writes them as they are.
+
+        Returns:
+            Result[None, Dict[str, Error]]:
+                Ok (None): all files are written.
+                Err (Dict[str, Error]): name -> error of each file that is
+                not written:
+                (kind == `FileExistsError`): file already exists and
+                `overwrite` is `False`.
+                (kind == `FileNotFoundError`): a subdirectory of the name
+                does not exist.
+                (kind == `TypeError`): name is not a file; unlike
+                `file_utils.write_file_ne()`, a dangling symlink is not
+                written through and is a `TypeError` too.
+                (kind == `ValueError`): name is empty, absolute or has a
+                `..` component, or the writer is closed.
+                (kind == `PermissionError`): wrong permissions.
+                (kind == `...`): other error(s) occurred.
+        """
+        errors: Dict[str, Error] = {}
+        for name, contents in files:
+            if self._closed:
+                errors[name] = Error(ErrorKind.ValueError, "writer is closed")
+                continue
+            if not _is_valid_name(name):
+                errors[name] = Error(ErrorKind.ValueError, f"invalid name: {name}")
+                continue
+            try:
+                if isinstance(contents, str):
+                    # "" means no translation, as for `open()`
+                    if newline and newline != "\n":
+                        contents = contents.replace("\n", newline)
+                    data = contents.encode(encoding)
+                else:
+                    data = contents
+                self._write(name, data, overwrite)
+            except Exception as e:
+                errors[name] = self._error(name, e)
+        if errors:
+            return Err(errors)
+        return Ok(None)
+
+    def close(self) -> None:
+        """Close the directory."""
+        if self._dir_fd is not None:
+            os.close(self._dir_fd)
+            self._dir_fd = None
+        self._closed = True
+
+    def __enter__(self) -> "DirWriter":
+        """Use the writer as a context manager that closes it on exit."""
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Close the directory."""
+        self.close()
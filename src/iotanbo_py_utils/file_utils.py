@@ -1,20 +1,52 @@
 """File utilities."""
-import hashlib
+import contextlib
+import errno
+import itertools
+import mmap
 import os
 import shutil
+import stat
+import struct
 import sys
 import tarfile
+import threading
+import time
 import zlib
+from concurrent.futures import FIRST_COMPLETED
+from concurrent.futures import Future
+from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import wait
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import Generator
+from typing import IO
+from typing import Iterable
+from typing import Iterator
 from typing import List
+from typing import Literal
+from typing import Mapping
+from typing import NamedTuple
 from typing import Optional
+from typing import overload
+from typing import Set
+from typing import Tuple
+from typing import Union
 
 from pathvalidate import validate_filepath  # type: ignore[attr-defined]
 from result import Err
 from result import Ok
 from result import Result
 
+from .compact_list import CompactFileList
+from .compact_list import ITEM_TYPES
+from .compact_list import ITEM_TYPE_CODES
 from .error import Error
 from .error import ErrorKind
+from .hash_algorithms import hash_algorithm_available
+from .hash_algorithms import new_hasher_ne
+from .hash_cache import HashCache
+from .ignore_matcher import IgnoreMatcher
 
 
 def is_path_valid_ne(path: str, os_family: str = "") -> bool:
@@ -47,6 +79,9 @@ def is_path_valid_ne(path: str, os_family: str = "") -> bool:
 def get_item_type_ne(path: str) -> Result[str, Error]:
     """Get the type of a file system item without raising exceptions.
 
+    The type is found with a single `os.lstat()` call; symlinks need
+    another `os.stat()` call: a dangling symlink does not exist.
+
     Args:
         path (str): path to a file system item.
 
@@ -57,37 +92,69 @@ def get_item_type_ne(path: str) -> Result[str, Error]:
              Err (kind == `PermissionError`): wrong permissions.
              Err (kind == `...`): if other error(s) occurred.
     """
-    try:
-        # Check if item exists first
-        if not os.path.exists(path):
-            return Err(Error(ErrorKind.FileNotFoundError))
+    result = _item_type_stat_ne(path)
+    if result.is_err():
+        return Err(result.unwrap_err())
+    return Ok(result.unwrap()[0])
 
-        # Check if symlink with specified pathname exists;
-        # this check must go first because symlink is also a file
-        item_type = "other"
-        try:
-            if os.path.islink(path):
-                item_type = "symlink"
-        except Exception as e:  # pragma: no cover
-            # Corresponds to any kind of errors and is hard
-            # to be automatically tested.
+
+# errno of a failed `lstat()` -> error kind; a path does not exist if any
+# of its components is missing or is not a directory, like in `os.path.exists()`
+_LSTAT_ERRNO_KINDS = {
+    errno.ENOENT: ErrorKind.FileNotFoundError,
+    errno.ENOTDIR: ErrorKind.FileNotFoundError,
+    errno.ELOOP: ErrorKind.FileNotFoundError,
+    errno.ENAMETOOLONG: ErrorKind.FileNotFoundError,
+    errno.EACCES: ErrorKind.PermissionError,
+    errno.EPERM: ErrorKind.PermissionError,
+}
+
+
+def _lstat_ne(path: str) -> Result[os.stat_result, Error]:
+    """Call `os.lstat()`, map the `errno` of an error to the error kind."""
+    try:
+        return Ok(os.lstat(path))
+    except OSError as e:
+        kind = _LSTAT_ERRNO_KINDS.get(e.errno or 0)
+        if kind is None:
             return Err(Error.from_exception(e))  # pragma: no cover
-        # Check if dir with specified pathname exists;
-        if item_type == "other":
-            try:
-                if os.path.isdir(path):
-                    item_type = "dir"
-                else:  # if item exists and it is not a symlink or dir, then it is file
-                    item_type = "file"
-            # any kind of errors that may occur
-            # while executing os.path.isdir(path)
-            except Exception as e:  # pragma: no cover
-                return Err(Error.from_exception(e))  # pragma: no cover
-    # any kind of errors that may occur
-    # while executing os.path.exists(path)
+        return Err(Error.from_exception(e, new_kind=kind))
+    except ValueError as e:
+        # embedded null character
+        return Err(Error.from_exception(e, new_kind=ErrorKind.FileNotFoundError))
     except Exception as e:  # pragma: no cover
         return Err(Error.from_exception(e))  # pragma: no cover
-    return Ok(item_type)
+
+
+def _item_type_stat_ne(path: str) -> Result[Tuple[str, os.stat_result], Error]:
+    """Get the type of the item like `get_item_type_ne()` and its `lstat()`.
+
+    This is a single `lstat()` call, plus a `stat()` call for symlinks:
+    a symlink whose target does not exist is reported as not existing.
+    """
+    result = _lstat_ne(path)
+    if result.is_err():
+        return Err(result.unwrap_err())
+    st = result.unwrap()
+    if stat.S_ISLNK(st.st_mode):
+        try:
+            os.stat(path)
+        except (OSError, ValueError) as e:
+            return Err(Error.from_exception(e, new_kind=ErrorKind.FileNotFoundError))
+        return Ok(("symlink", st))
+    # any item that is not a symlink or a directory is reported as a file
+    return Ok(("dir" if stat.S_ISDIR(st.st_mode) else "file", st))
+
+
+def _file_stat_ne(path: str) -> Result[os.stat_result, Error]:
+    """Get the `lstat()` of a file, `FileNotFoundError` or `TypeError` otherwise."""
+    result = _item_type_stat_ne(path)
+    if result.is_err():
+        return Err(result.unwrap_err())
+    item_type, st = result.unwrap()
+    if item_type != "file":
+        return Err(Error(ErrorKind.TypeError, item_type))
+    return Ok(st)
 
 
 def _item_exists_ne(path: str, item_type: str) -> Result[bool, Error]:
@@ -232,16 +299,191 @@ def create_symlink_ne(
 def _common_validation_before_write_file(
     path: str, overwrite: bool
 ) -> Result[None, Error]:
+    if not overwrite:
+        # the file is created exclusively, see `_file_exists_error()`
+        return Ok(None)
     # check for file existence
     result = file_exists_ne(path)
     if result.is_err():
         # error while checking for file existence
         return Err(result.unwrap_err())
-    else:
-        if result.unwrap():
-            # file exists
-            if not overwrite:
-                return Err(Error(ErrorKind.FileExistsError))
+    return Ok(None)
+
+
+def _open_for_write(path: str, mode: str, overwrite: bool, **kwargs: Any) -> IO[Any]:
+    """Open a file for writing, may raise.
+
+    Without `overwrite`, the file is created exclusively and
+    `FileExistsError` is raised if the path exists. A dangling symlink
+    does not count as an existing file: it is written through and its
+    target is created, in both modes.
+    """
+    if overwrite:
+        return open(path, mode.replace("x", "w"), **kwargs)
+    try:
+        return open(path, mode, **kwargs)
+    except FileExistsError:
+        if not os.path.islink(path) or os.path.exists(path):
+            raise
+        return open(path, mode.replace("x", "w"), **kwargs)
+
+
+def _file_exists_error(path: str) -> Error:
+    """Get the error for a path that exists where a new file is created."""
+    result = get_item_type_ne(path)
+    if result.is_ok() and result.unwrap() != "file":
+        return Error(ErrorKind.TypeError, result.unwrap())
+    return Error(ErrorKind.FileExistsError)
+
+
+def _atomic_write_target_ne(
+    path: str, overwrite: bool
+) -> Result[Tuple[str, Optional[int]], Error]:
+    """Validate the target of an atomic write.
+
+    Get the path to write and the mode of the existing file. A dangling
+    symlink is written through, as `_open_for_write()` does: the path of
+    its target is returned and the link stays.
+    """
+    result = _file_stat_ne(path)
+    if result.is_err():
+        err = result.unwrap_err()
+        if err.kind != ErrorKind.FileNotFoundError:
+            return Err(err)
+        if not os.path.islink(path):
+            return Ok((path, None))
+        target = os.path.realpath(path)
+        if os.path.islink(target):
+            # a symlink loop
+            return Err(Error(ErrorKind.TypeError, "symlink"))
+        return Ok((target, None))
+    if not overwrite:
+        return Err(Error(ErrorKind.FileExistsError))
+    return Ok((path, stat.S_IMODE(result.unwrap().st_mode)))
+
+
+def _fsync_data(fd: int) -> None:
+    # `fdatasync()` does not flush the metadata that is not needed to read the data
+    getattr(os, "fdatasync", os.fsync)(fd)
+
+
+def _fsync_dir(path: str) -> None:
+    """Make the changes of the directory entries durable, may raise."""
+    if sys.platform == "win32":  # pragma: no cover
+        # directories cannot be opened, NTFS journals the metadata
+        return  # pragma: no cover
+    fd = os.open(path or os.curdir, os.O_RDONLY)
+    try:
+        os.fsync(fd)
+    finally:
+        os.close(fd)
+
+
+def _remove_temp_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:  # pragma: no cover
+        pass  # pragma: no cover
+
+
+def _write_temp_file(
+    path: str,
+    contents: Union[str, bytes],
+    mode: Optional[int],
+    *,
+    encoding: str = "utf-8",
+    newline: str = "\n",
+    sync: bool,
+) -> str:
+    """Write the contents to a new temporary file next to `path`, may raise.
+
+    Return the path to the temporary file. It is in the same directory,
+    so that it can be renamed to `path` atomically. It gets `mode` if
+    specified, otherwise the permissions of a new file.
+    """
+    dirname, name = os.path.split(path)
+    flags = os.O_WRONLY | os.O_CREAT | os.O_EXCL | getattr(os, "O_BINARY", 0)
+    while True:
+        tmp = os.path.join(dirname, f".{name}.{os.urandom(4).hex()}.tmp")
+        try:
+            fd = os.open(tmp, flags, 0o666)
+            break
+        except FileExistsError:  # pragma: no cover
+            continue  # pragma: no cover
+    try:
+        f: IO[Any]
+        if isinstance(contents, str):
+            f = open(fd, "w", encoding=encoding, newline=newline)
+        else:
+            f = open(fd, "wb")
+        with f:
+            f.write(contents)  # type: ignore[arg-type]
+            f.flush()
+            if sync:
+                _fsync_data(f.fileno())
+        if mode is not None:
+            os.chmod(tmp, mode)
+    except BaseException:
+        _remove_temp_file(tmp)
+        raise
+    return tmp
+
+
+def _rename_temp_file(tmp: str, path: str, overwrite: bool) -> None:
+    """Rename the temporary file to `path`, may raise.
+
+    Without `overwrite`, `FileExistsError` is raised if `path` exists,
+    even if it is created by another process after the validation.
+    """
+    try:
+        if overwrite:
+            os.replace(tmp, path)
+            return
+        try:
+            # unlike a rename, a link fails if the path exists
+            os.link(tmp, path)
+        except FileExistsError:
+            raise
+        except OSError:  # pragma: no cover
+            # no hard links on the file system
+            if os.path.lexists(path):
+                raise FileExistsError(errno.EEXIST, "File exists", path) from None
+            os.replace(tmp, path)
+            return
+    except BaseException:
+        _remove_temp_file(tmp)
+        raise
+    _remove_temp_file(tmp)
+
+
+def _write_atomic_ne(
+    path: str,
+    contents: Union[str, bytes],
+    *,
+    overwrite: bool,
+    encoding: str = "utf-8",
+    newline: str = "\n",
+) -> Result[None, Error]:
+    """Write a file through a temporary one, fsync the data and the directory."""
+    result = _atomic_write_target_ne(path, overwrite)
+    if result.is_err():
+        return Err(result.unwrap_err())
+    target, mode = result.unwrap()
+    try:
+        tmp = _write_temp_file(
+            target,
+            contents,
+            mode,
+            encoding=encoding,
+            newline=newline,
+            sync=True,
+        )
+        _rename_temp_file(tmp, target, overwrite)
+        _fsync_dir(os.path.dirname(target))
+    except FileExistsError:
+        return Err(_file_exists_error(target))
+    except Exception as e:
+        return Err(Error.from_exception(e))
     return Ok(None)
 
 
@@ -252,6 +494,7 @@ def write_file_ne(
     *,
     overwrite: bool = False,
     newline: str = "\n",
+    atomic: bool = False,
 ) -> Result[None, Error]:
     """Create a new text file and write contents into it without raising exceptions.
 
@@ -259,8 +502,19 @@ def write_file_ne(
         path (str): path to file.
         contents (str): string to be written into file.
         encoding (str): text file encoding ("utf-8" default).
-        overwrite (bool): rewrite file if it already exists.
+        overwrite (bool): rewrite file if it already exists. A dangling
+            symlink is written through and its target is created, with
+            or without `overwrite`; a symlink to a file is a `TypeError`.
         newline (str): new line separator.
+        atomic (bool): write a temporary file in the same directory and
+            rename it to `path`, so that a crash leaves either the old or
+            the new contents, never a partially written file. The data and
+            the directory are fsynced, the file is durable on return.
+            An overwritten file keeps its permissions, but not its owner.
+            Symlinks are treated as without `atomic`: the temporary file
+            of a dangling symlink is created next to its target.
+            Use `write_batch.WriteBatch` to write many files atomically
+            with fewer fsync calls.
 
     Returns:
         Result[None, Error]:
@@ -277,13 +531,21 @@ def write_file_ne(
         >>>     if write_file_ne(os.path.join(tmpdir,"test.txt"), "test").is_err():
         >>>      ...  # process error
     """
+    if atomic:
+        return _write_atomic_ne(
+            path, contents, overwrite=overwrite, encoding=encoding, newline=newline
+        )
     validation_result = _common_validation_before_write_file(path, overwrite)
     if validation_result.is_err():
         return Err(validation_result.unwrap_err())
     try:
-        with open(path, "w", encoding=encoding, newline=newline) as f:
+        with _open_for_write(
+            path, "x", overwrite, encoding=encoding, newline=newline
+        ) as f:
             f.write(contents)
         return Ok(None)
+    except FileExistsError:
+        return Err(_file_exists_error(path))
     except Exception as e:
         return Err(Error.from_exception(e))
 
@@ -293,13 +555,17 @@ def write_binary_file_ne(
     contents: bytes,
     *,
     overwrite: bool = False,
+    atomic: bool = False,
 ) -> Result[None, Error]:
     """Create and write data to binary file.
 
     Args:
         path (str): path to file.
         contents (bytes): file contents.
-        overwrite (bool): rewrite file if it already exists.
+        overwrite (bool): rewrite file if it already exists, symlinks are
+            treated as by `write_file_ne()`.
+        atomic (bool): replace the file atomically and durably,
+            see `write_file_ne()`.
 
     Returns:
         Result[None, Error]:
@@ -310,25 +576,26 @@ def write_binary_file_ne(
             Err (kind == `PermissionError`): wrong permissions.
             Err (kind == `...`): other error(s) occurred.
     """
+    if atomic:
+        return _write_atomic_ne(path, contents, overwrite=overwrite)
     validation_result = _common_validation_before_write_file(path, overwrite)
     if validation_result.is_err():
         return Err(validation_result.unwrap_err())
     try:
-        with open(path, "w+b") as f:
+        with _open_for_write(path, "x+b", overwrite) as f:
             f.write(contents)
         return Ok(None)
+    except FileExistsError:
+        return Err(_file_exists_error(path))
     except Exception as e:  # pragma: no cover
         return Err(Error.from_exception(e))  # pragma: no cover
 
 
 def _common_validation_before_read_file(path: str) -> Result[None, Error]:
-    result = file_exists_ne(path)
+    result = _file_stat_ne(path)
     if result.is_err():
-        # other errors like file is a directory etc.
-        return Err(result.unwrap_err())  # pragma: no cover
-    file_exists = result.unwrap()
-    if not file_exists:
-        return Err(Error(ErrorKind.FileNotFoundError))
+        # file does not exist, is a directory etc.
+        return Err(result.unwrap_err())
     return Ok(None)
 
 
@@ -368,15 +635,95 @@ def read_file_ne(path: str, encoding: str = "utf-8") -> Result[str, Error]:
         return Err(Error.from_exception(e))  # pragma: no cover
 
 
-def read_binary_file_ne(path: str) -> Result[bytes, Error]:
+class MappedFile:
+    """Read-only memory-mapped contents of a file.
+
+    The contents are available as `view`, a read-only `memoryview` that can
+    be sliced, searched with `re`, hashed or parsed with `struct` without
+    copying; only the pages that are accessed are read from the disk.
+    Close the object or use it as a context manager. Slices of `view` that
+    are still alive keep the file mapped until they are released.
+
+    If another process truncates the file, accessing `view` beyond the new
+    end kills the process with `SIGBUS`, which cannot be caught: map only
+    files that are not truncated while they are mapped. Files that cannot
+    be mapped (empty and special files, e.g. in `/proc`) are read, and
+    `view` is over a copy of their contents.
+
+    Example:
+        >>> with read_binary_file_ne("big.bin", mapped=True).unwrap() as m:
+        >>>     header = bytes(m.view[:16])
+    """
+
+    def __init__(self, m: Union[mmap.mmap, bytes]):
+        """Use `read_binary_file_ne(path, mapped=True)` to map a file.
+
+        Args:
+            m (Union[mmap.mmap, bytes]): read-only mapping, or the contents
+                of a file that cannot be mapped.
+        """
+        self._mmap = m if isinstance(m, mmap.mmap) else None
+        self._view = memoryview(m)
+
+    @property
+    def view(self) -> memoryview:
+        """Contents of the file, invalid after `close()`."""
+        return self._view
+
+    def close(self) -> None:
+        """Release the view and unmap the file."""
+        self._view.release()
+        if self._mmap is not None:
+            try:
+                self._mmap.close()
+            except BufferError:
+                # slices of the view are alive, the file is unmapped
+                # when the last of them is released
+                pass
+            self._mmap = None
+
+    def __enter__(self) -> "MappedFile":
+        """Use the mapping as a context manager that closes it on exit."""
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Release the view and unmap the file."""
+        self.close()
+
+    def __len__(self) -> int:
+        """Size of the file."""
+        return len(self._view)
+
+
+@overload
+def read_binary_file_ne(
+    path: str, *, mapped: Literal[False] = False
+) -> Result[bytes, Error]:
+    ...  # pragma: no cover
+
+
+@overload
+def read_binary_file_ne(
+    path: str, *, mapped: Literal[True]
+) -> Result[MappedFile, Error]:
+    ...  # pragma: no cover
+
+
+def read_binary_file_ne(path: str, *, mapped: bool = False) -> Result[Any, Error]:
     """Read a binary file without raising exceptions.
 
     Args:
         path: path to file.
+        mapped (bool): map the file into memory instead of reading it and
+            return a `MappedFile`, which does not copy the contents.
+            Changes of the file by other processes are visible through the
+            mapping. If the file is truncated, accessing the mapping beyond
+            the new end kills the process with `SIGBUS`; see `MappedFile`.
 
     Returns:
-        Result[bytes, Error]:
+        Result[Union[bytes, MappedFile], Error]:
             Ok (bytes): file contents.
+            Ok (MappedFile): mapped file contents if `mapped=True`.
             Err (Error.kind == FileNotFoundError`): file does not exist.
             Err (kind == `PermissionError`): wrong permissions.
             Err (Error.kind == `...`): other error(s) occurred.
@@ -386,7 +733,14 @@ def read_binary_file_ne(path: str) -> Result[bytes, Error]:
         return Err(validation.unwrap_err())
     try:
         with open(file=path, mode="rb") as f:
-            return Ok(f.read())
+            if not mapped:
+                return Ok(f.read())
+            st = os.fstat(f.fileno())
+            if not stat.S_ISREG(st.st_mode) or st.st_size == 0:
+                # empty and special files cannot be mapped, files in `/proc`
+                # have a zero size but are not empty
+                return Ok(MappedFile(f.read()))
+            return Ok(MappedFile(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)))
     except Exception as e:  # pragma: no cover
         # it's hard to automate a test
         # where a file can't be read from file system
@@ -412,14 +766,112 @@ def read_file_into_lines_ne(
             Err (kind == `PermissionError`): wrong permissions.
             Err (Error.kind == `...`): other error(s) occurred.
     """
-    result = read_file_ne(path, encoding)
-    if result.is_err():
-        return Err(result.unwrap_err())
-    contents = result.unwrap()
-    if not contents:
-        # file is empty
-        return Ok([""])
-    return Ok(contents.split(sep="\n"))
+    lines = []
+    # the contents are split like `str.split("\n")` does: the last line
+    # is empty if the file is empty or ends with a new line
+    last_line_ended = True
+    for item in iter_file_lines_ne(path, encoding, keepends=True):
+        if item.is_err():
+            return Err(item.unwrap_err())
+        line = item.unwrap()
+        last_line_ended = line.endswith("\n")
+        lines.append(line[:-1] if last_line_ended else line)
+    if last_line_ended:
+        lines.append("")
+    return Ok(lines)
+
+
+def iter_file_lines_ne(
+    path: str, encoding: str = "utf-8", *, keepends: bool = False
+) -> Generator[Result[str, Error], None, None]:
+    r"""Lazily iterate over the lines of a text file.
+
+    The file is read through a buffer, so the memory usage does not depend
+    on the file size, only on the length of the longest line. Universal
+    new line mode is used like in `read_file_ne()`: any of (`\n`, `\r`,
+    `\r\n`) ends a line and is returned as `\n`. Unlike in
+    `read_file_into_lines_ne()`, there is no empty line after the last
+    new line. An error stops the iteration.
+
+    Args:
+        path (str): path to file.
+        encoding (str): text file encoding ("utf-8" default).
+        keepends (bool): keep `\n` at the end of the lines.
+
+    Yields:
+        Result[str, Error]:
+            Ok (str): next line.
+            Err (kind == `FileNotFoundError`): file does not exist.
+            Err (kind == `PermissionError`): wrong permissions.
+            Err (kind == `UnicodeDecodeError`): the file is not in `encoding`.
+            Err (kind == `...`): other error(s) occurred.
+
+    Example:
+        >>> for line in iter_file_lines_ne("app.log"):
+        >>>     if line.is_err():
+        >>>         ...  # process error
+        >>>     else:
+        >>>         line = line.unwrap()
+    """
+    validation = _common_validation_before_read_file(path)
+    if validation.is_err():
+        yield Err(validation.unwrap_err())
+        return
+    try:
+        with open(file=path, mode="r", encoding=encoding) as f:
+            for line in f:
+                if not keepends and line.endswith("\n"):
+                    line = line[:-1]
+                yield Ok(line)
+    except Exception as e:
+        yield Err(Error.from_exception(e))
+
+
+def iter_file_line_batches_ne(
+    path: str,
+    encoding: str = "utf-8",
+    *,
+    keepends: bool = False,
+    batch_size: int = 10_000,
+) -> Generator[Result[List[str], Error], None, None]:
+    r"""Lazily iterate over the lines of a text file in lists of `batch_size`.
+
+    Same as `iter_file_lines_ne()`, but with less per-line overhead when
+    the lines are processed in bulk. The last batch may be shorter, an
+    empty file has no batches.
+
+    Args:
+        path (str): path to file.
+        encoding (str): text file encoding ("utf-8" default).
+        keepends (bool): keep `\n` at the end of the lines.
+        batch_size (int): maximum number of lines in a batch.
+
+    Yields:
+        Result[List[str], Error]:
+            Ok (List[str]): next lines.
+            Err (kind == `ValueError`): `batch_size` is less than 1.
+            Err (kind == `...`): see `iter_file_lines_ne()`.
+    """
+    if batch_size < 1:
+        yield Err(
+            Error(ErrorKind.ValueError, f"batch_size must be >= 1, got {batch_size}")
+        )
+        return
+    validation = _common_validation_before_read_file(path)
+    if validation.is_err():
+        yield Err(validation.unwrap_err())
+        return
+    try:
+        with open(file=path, mode="r", encoding=encoding) as f:
+            while True:
+                batch = list(itertools.islice(f, batch_size))
+                if not batch:
+                    break
+                if not keepends:
+                    batch = [ln[:-1] if ln.endswith("\n") else ln for ln in batch]
+                yield Ok(batch)
+    except Exception as e:
+        yield Err(Error.from_exception(e))
 
 
 def file_exists_ne(path: str) -> Result[bool, Error]:
@@ -677,13 +1129,15 @@ def dir_empty_ne(path: str) -> Result[bool, Error]:
 
 def _pre_copy_and_move_file_operations(
     src: str, dest: str, *, overwrite: bool
-) -> Result[None, Error]:
-    result = file_exists_ne(src)
+) -> Result[os.stat_result, Error]:
+    """Validate the source and remove the destination, get `lstat()` of the source."""
+    result = _file_stat_ne(src)
     if result.is_err():
-        return Err(result.unwrap_err())
-    src_exists = result.unwrap()
-    if not src_exists:
-        return Err(Error(ErrorKind.FileNotFoundError, "source file does not exist"))
+        err = result.unwrap_err()
+        if err.kind == ErrorKind.FileNotFoundError:
+            return Err(Error(ErrorKind.FileNotFoundError, "source file does not exist"))
+        return Err(err)
+    src_stat = result.unwrap()
 
     de_result = file_exists_ne(dest)
     if de_result.is_err():
@@ -692,10 +1146,11 @@ def _pre_copy_and_move_file_operations(
     if dest_exists:
         if not overwrite:
             return Err(Error(ErrorKind.FileExistsError, "destination already exists"))
-        rm_result = remove_file_ne(dest)
-        if rm_result.is_err():
-            return Err(rm_result.unwrap_err())  # pragma: no cover
-    return Ok(None)
+        try:
+            os.remove(dest)
+        except Exception as e:  # pragma: no cover
+            return Err(Error.from_exception(e))  # pragma: no cover
+    return Ok(src_stat)
 
 
 def copy_file_ne(
@@ -719,9 +1174,11 @@ def copy_file_ne(
     """
     pre_result = _pre_copy_and_move_file_operations(src, dest, overwrite=overwrite)
     if pre_result.is_err():
-        return pre_result
+        return Err(pre_result.unwrap_err())
     try:
-        shutil.copy(src, dest)
+        # `shutil.copy()` without the checks that are already done
+        shutil.copyfile(src, dest)
+        os.chmod(dest, stat.S_IMODE(pre_result.unwrap().st_mode))
     except Exception as e:
         return Err(Error.from_exception(e))
     return Ok(None)
@@ -749,7 +1206,7 @@ def move_file_ne(
     """
     pre_result = _pre_copy_and_move_file_operations(src, dest, overwrite=overwrite)
     if pre_result.is_err():
-        return pre_result
+        return Err(pre_result.unwrap_err())
     try:
         shutil.move(src, dest)
     except Exception as e:  # pragma: no cover
@@ -871,6 +1328,220 @@ def _dir_validation(path: str) -> Result[None, Error]:
     return Ok(None)
 
 
+def _workers_validation(max_workers: int) -> Result[None, Error]:
+    if max_workers < 1:
+        return Err(
+            Error(ErrorKind.ValueError, f"max_workers must be >= 1, got {max_workers}")
+        )
+    return Ok(None)
+
+
+def _walk_tree(
+    root: str,
+    *,
+    prune: Optional[Callable[[str], bool]] = None,
+    max_workers: int = 1,
+    max_depth: Optional[int] = None,
+) -> Iterator[Result[Tuple[str, "os.DirEntry[str]"], Error]]:
+    """Walk the directory tree visiting each directory exactly once.
+
+    This is the engine behind the recursive listing functions. Each directory
+    is scanned with a single `os.scandir()` call, and the type information
+    cached in `os.DirEntry` is reused, so no additional `stat` calls are made.
+    Symlinks to directories are yielded but not followed. The root
+    directory itself is not validated and not yielded.
+
+    Args:
+        root (str): path to the root directory.
+        prune (Optional[Callable[[str], bool]]): called with the relative path
+            of each sub-directory; if it returns `True`, the sub-directory
+            is neither yielded nor descended into.
+        max_workers (int): if greater than 1, sibling directories are scanned
+            concurrently by that many threads, see `_walk_tree_parallel()`.
+        max_depth (Optional[int]): do not descend deeper than this; items
+            of the root directory have depth 1.
+
+    Yields:
+        Result[Tuple[str, os.DirEntry[str]], Error]:
+            Ok (Tuple[str, os.DirEntry[str]]): relative path and directory entry of an item.
+            Err (kind == `...`): a directory could not be scanned; the walk continues.
+    """
+    if max_workers > 1:
+        yield from _walk_tree_parallel(
+            root, prune=prune, max_workers=max_workers, max_depth=max_depth
+        )
+        return
+    # (relative path, absolute path, depth of its items) of directories
+    # that are yet to be scanned
+    stack = [("", root, 1)]
+    while stack:
+        rel_dir, abs_dir, depth = stack.pop()
+        descend = max_depth is None or depth < max_depth
+        subdirs: List[Tuple[str, str]] = []
+        yield from _scan_dir(rel_dir, abs_dir, prune, descend, subdirs)
+        # reversed, so that sub-directories are visited in the scan order
+        stack.extend((p, a, depth + 1) for p, a in reversed(subdirs))
+
+
+def _scan_dir(
+    rel_dir: str,
+    abs_dir: str,
+    prune: Optional[Callable[[str], bool]],
+    descend: bool,
+    subdirs: List[Tuple[str, str]],
+) -> Iterator[Result[Tuple[str, "os.DirEntry[str]"], Error]]:
+    """Scan a single directory, collect the sub-directories to descend into.
+
+    Both walk modes use it, so they yield the same items: if the scan fails
+    midway, the items read so far are yielded, followed by the error.
+    """
+    try:
+        with os.scandir(abs_dir) as it:
+            for entry in it:
+                rel_path = os.path.join(rel_dir, entry.name) if rel_dir else entry.name
+                try:
+                    is_dir = entry.is_dir(follow_symlinks=False)
+                except OSError:  # pragma: no cover
+                    is_dir = False  # pragma: no cover
+                if is_dir:
+                    if prune is not None and prune(rel_path):
+                        continue
+                    if descend:
+                        subdirs.append((rel_path, entry.path))
+                yield Ok((rel_path, entry))
+    except Exception as e:
+        # permissions and other system errors
+        yield Err(Error.from_exception(e))
+
+
+def _scan_dir_to_list(
+    rel_dir: str,
+    abs_dir: str,
+    prune: Optional[Callable[[str], bool]],
+    descend: bool,
+) -> Tuple[List[Result[Tuple[str, "os.DirEntry[str]"], Error]], List[Tuple[str, str]]]:
+    """Scan a single directory in a worker thread, see `_scan_dir()`."""
+    subdirs: List[Tuple[str, str]] = []
+    return list(_scan_dir(rel_dir, abs_dir, prune, descend, subdirs)), subdirs
+
+
+def _walk_tree_parallel(
+    root: str,
+    *,
+    prune: Optional[Callable[[str], bool]],
+    max_workers: int,
+    max_depth: Optional[int] = None,
+) -> Iterator[Result[Tuple[str, "os.DirEntry[str]"], Error]]:
+    """Walk the directory tree scanning sibling directories in a thread pool.
+
+    Meant for file systems where each `scandir` is a network round-trip
+    (NFS, SMB, overlayfs on top of them): the threads spend most of the time
+    waiting for I/O with the GIL released. The items are yielded in
+    the order their directories are scanned, which is not deterministic.
+    `prune` is called from the worker threads.
+
+    Args:
+        root (str): path to the root directory.
+        prune (Optional[Callable[[str], bool]]): same as for `_walk_tree()`.
+        max_workers (int): number of scanning threads.
+        max_depth (Optional[int]): same as for `_walk_tree()`.
+
+    Yields:
+        Result[Tuple[str, os.DirEntry[str]], Error]:
+            Ok (Tuple[str, os.DirEntry[str]]): relative path and directory entry of an item.
+            Err (kind == `...`): a directory could not be scanned; the walk continues.
+    """
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    # future -> depth of the items of the directory it scans
+    pending = {executor.submit(_scan_dir_to_list, "", root, prune, max_depth != 1): 1}
+    try:
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                depth = pending.pop(future)
+                results, subdirs = future.result()
+                # keep the workers busy while the items are being consumed
+                descend = max_depth is None or depth + 1 < max_depth
+                for rel_path, abs_path in subdirs:
+                    subdir_future = executor.submit(
+                        _scan_dir_to_list, rel_path, abs_path, prune, descend
+                    )
+                    pending[subdir_future] = depth + 1
+                yield from results
+    finally:
+        # the generator may be closed before the walk is complete
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+def _ignore_matcher(
+    ignore_list: Optional[Union[List[str], IgnoreMatcher]]
+) -> IgnoreMatcher:
+    """Get the compiled matcher for an `ignore_list` argument."""
+    if isinstance(ignore_list, IgnoreMatcher):
+        return ignore_list
+    return IgnoreMatcher.from_paths(ignore_list or [])
+
+
+def _walk_tree_skip_errors(
+    path: str,
+    matcher: IgnoreMatcher,
+    max_workers: int,
+    max_depth: Optional[int] = None,
+) -> Iterator[Tuple[str, "os.DirEntry[str]"]]:
+    """Walk the tree pruning ignored directories, skip unreadable sub-directories."""
+    for item in _walk_tree(
+        path,
+        prune=lambda p: matcher.match(p, is_dir=True),
+        max_workers=max_workers,
+        max_depth=max_depth,
+    ):
+        # unreadable sub-directories are skipped, same as `os.walk()` does
+        if item.is_ok():
+            yield item.unwrap()
+
+
+def _entry_type(entry: "os.DirEntry[str]") -> str:
+    """Get the type of a directory entry, symlinks are not followed."""
+    if entry.is_symlink():
+        return "symlink"
+    if entry.is_dir(follow_symlinks=False):
+        return "dir"
+    if entry.is_file(follow_symlinks=False):
+        return "file"
+    return "other"
+
+
+def _mode_type(mode: int) -> str:
+    """Get the type of an item from its `lstat()` mode, as `_entry_type()` does."""
+    if stat.S_ISLNK(mode):
+        return "symlink"
+    if stat.S_ISDIR(mode):
+        return "dir"
+    if stat.S_ISREG(mode):
+        return "file"
+    return "other"
+
+
+def _to_compact_list(
+    items: Iterable[Tuple[str, "os.DirEntry[str]"]], *, sort: bool
+) -> CompactFileList:
+    """Collect items into a `CompactFileList`, symlinks are followed for size and mtime."""
+    compact_list = CompactFileList()
+    for relative_path, entry in items:
+        try:
+            st = entry.stat()
+        except OSError:  # pragma: no cover
+            continue  # pragma: no cover
+        compact_list.append(
+            relative_path, st.st_size, st.st_mtime_ns, _entry_type(entry)
+        )
+    if sort:
+        compact_list.sort()
+    return compact_list
+
+
 def get_subdir_list_ne(path: str, *, sort: bool = True) -> Result[List[str], Error]:
     """Get the list of the first-level sub-directories that the directory contains.
 
@@ -900,23 +1571,61 @@ def get_subdir_list_ne(path: str, *, sort: bool = True) -> Result[List[str], Err
         return Err(Error.from_exception(e))  # pragma: no cover
 
 
+@overload
 def get_subdir_list_recursively_ne(
-    path: str, *, sort: bool = True, ignore_list: Optional[List[str]] = None
+    path: str,
+    *,
+    sort: bool = True,
+    ignore_list: Optional[Union[List[str], IgnoreMatcher]] = None,
+    max_workers: int = 1,
+    compact: Literal[False] = False,
 ) -> Result[List[str], Error]:
+    ...  # pragma: no cover
+
+
+@overload
+def get_subdir_list_recursively_ne(
+    path: str,
+    *,
+    sort: bool = True,
+    ignore_list: Optional[Union[List[str], IgnoreMatcher]] = None,
+    max_workers: int = 1,
+    compact: Literal[True],
+) -> Result[CompactFileList, Error]:
+    ...  # pragma: no cover
+
+
+def get_subdir_list_recursively_ne(
+    path: str,
+    *,
+    sort: bool = True,
+    ignore_list: Optional[Union[List[str], IgnoreMatcher]] = None,
+    max_workers: int = 1,
+    compact: bool = False,
+) -> Result[Any, Error]:
     """Get the list of all sub-directories that the directory contains.
 
+    Sub-directories that can't be read are silently skipped.
+
     Args:
         path (str): path to a directory.
         sort (bool): sort the list alphabetically.
-        ignore_list (Optional[List[str]]): sub-directories to be excluded
-        from the recursive search.
-        each string must be a relative path without starting `.`.
+        ignore_list (Optional[Union[List[str], IgnoreMatcher]]): sub-directories
+        to be excluded from the recursive search, either a compiled `IgnoreMatcher`
+        or a list of relative paths without starting `.`.
+        max_workers (int): number of threads that scan sibling directories
+            concurrently; values greater than 1 speed up the walk on
+            high-latency file systems like NFS.
+        compact (bool): return a memory-efficient `CompactFileList` that also
+            holds the size, mtime and type of each item.
 
     Returns:
         Result[List[str], Error]:
             Ok (List[str]): operation successful.
+            Ok (CompactFileList): operation successful and `compact=True`.
             Err (kind == `FileNotFoundError`): path does not exist.
             Err (kind == `TypeError`): path is not a directory.
+            Err (kind == `ValueError`): `max_workers` is less than 1.
             Err (kind == `PermissionError`): wrong permissions.
             Err (kind == `...`): other error(s) occurred.
 
@@ -927,34 +1636,20 @@ def get_subdir_list_recursively_ne(
         >>>     subdirs = result.unwrap()
     """
     validation = _dir_validation(path)
+    if validation.is_ok():
+        validation = _workers_validation(max_workers)
     if validation.is_err():
         return Err(validation.unwrap_err())
 
-    if ignore_list is None:
-        ignore_list = []
-    root_path = path
-    root_path_len = len(root_path)
-    result = []
-    try:
-        for path, _, _ in os.walk(root_path):  # path, dirs, files
-            relative_path = path[root_path_len + 1 :]
-            if not relative_path:  # do not add empty paths
-                continue
-
-            ignored = False
-            # Check if path is in the ignore_list
-            for ignored_path in ignore_list:
-                if not ignored_path:  # do not include empty strings
-                    continue
-                if relative_path.startswith(ignored_path):
-                    ignored = True
-                    break
-            if not ignored:
-                # Append path without base_path part to the list
-                result.append(relative_path)
-    except Exception as e:  # pragma: no cover
-        # permissions and other system errors
-        return Err(Error.from_exception(e))  # pragma: no cover
+    matcher = _ignore_matcher(ignore_list)
+    subdirs = (
+        (relative_path, entry)
+        for relative_path, entry in _walk_tree_skip_errors(path, matcher, max_workers)
+        if entry.is_dir(follow_symlinks=False)
+    )
+    if compact:
+        return Ok(_to_compact_list(subdirs, sort=sort))
+    result = [relative_path for relative_path, _ in subdirs]
     if sort:
         return Ok(sorted(result))
     return Ok(result)
@@ -992,27 +1687,65 @@ def get_file_list_ne(path: str, *, sort: bool = True) -> Result[List[str], Error
         return Err(Error.from_exception(e))  # pragma: no cover
 
 
+@overload
 def get_file_list_recursively_ne(
-    path: str, *, sort: bool = True, ignore_list: Optional[List[str]] = None
+    path: str,
+    *,
+    sort: bool = True,
+    ignore_list: Optional[Union[List[str], IgnoreMatcher]] = None,
+    max_workers: int = 1,
+    compact: Literal[False] = False,
 ) -> Result[List[str], Error]:
+    ...  # pragma: no cover
+
+
+@overload
+def get_file_list_recursively_ne(
+    path: str,
+    *,
+    sort: bool = True,
+    ignore_list: Optional[Union[List[str], IgnoreMatcher]] = None,
+    max_workers: int = 1,
+    compact: Literal[True],
+) -> Result[CompactFileList, Error]:
+    ...  # pragma: no cover
+
+
+def get_file_list_recursively_ne(
+    path: str,
+    *,
+    sort: bool = True,
+    ignore_list: Optional[Union[List[str], IgnoreMatcher]] = None,
+    max_workers: int = 1,
+    compact: bool = False,
+) -> Result[Any, Error]:
     """Get the list of files and symlinks that the directory contains.
 
     This includes the files in the nested sub-directories,
     directories are not included.
     The result is a list of relative paths without starting dot.
+    Each directory is scanned only once, sub-directories that can't be read
+    are silently skipped.
 
     Args:
         path (str): path to a directory.
         sort (bool): sort the result list alphabetically.
-        ignore_list (Optional[List[str]]): files and sub-directories
-        to be excluded from the result and recursive search.
-        each string must be a relative path without starting `.`.
+        ignore_list (Optional[Union[List[str], IgnoreMatcher]]): files and sub-directories
+        to be excluded from the result and recursive search, either a compiled
+        `IgnoreMatcher` or a list of relative paths without starting `.`.
+        max_workers (int): number of threads that scan sibling directories
+            concurrently; values greater than 1 speed up the walk on
+            high-latency file systems like NFS.
+        compact (bool): return a memory-efficient `CompactFileList` that also
+            holds the size, mtime and type of each item.
 
     Returns:
         Result[List[str], Error]:
             Ok (List[str]): operation successful.
+            Ok (CompactFileList): operation successful and `compact=True`.
             Err (kind == `FileNotFoundError`): path does not exist.
             Err (kind == `TypeError`): path is not a directory.
+            Err (kind == `ValueError`): `max_workers` is less than 1.
             Err (kind == `PermissionError`): wrong permissions.
             Err (kind == `...`): other error(s) occurred.
 
@@ -1023,64 +1756,375 @@ def get_file_list_recursively_ne(
         >>>     file_list = result.unwrap()
     """
     validation = _dir_validation(path)
+    if validation.is_ok():
+        validation = _workers_validation(max_workers)
     if validation.is_err():
         return Err(validation.unwrap_err())
 
-    if ignore_list is None:
-        ignore_list = []
-
-    # Get list of all sub-directories
-    get_subdirs_result = get_subdir_list_recursively_ne(path, ignore_list=ignore_list)
-    if get_subdirs_result.is_err():
-        return Err(get_subdirs_result.unwrap_err())  # pragma: no cover
-    dirs = get_subdirs_result.unwrap()
-    dirs.append("")  # add root directory to the list
-
-    # search each directory for files and add them into common list
-    file_list = []
-    for d in dirs:
-        d_path = os.path.join(path, d)
-        get_files_result = get_file_list_ne(d_path, sort=False)
-        if get_files_result.is_err():
-            return Err(get_files_result.unwrap_err())  # pragma: no cover
-        local_file_list = get_files_result.unwrap()
-        for f in local_file_list:
-            if d:
-                relative_file_path = os.path.join(d, f)
-            else:
-                relative_file_path = f
-            if relative_file_path not in ignore_list:
-                file_list.append(relative_file_path)
+    matcher = _ignore_matcher(ignore_list)
+    files = (
+        (relative_file_path, entry)
+        for relative_file_path, entry in _walk_tree_skip_errors(
+            path, matcher, max_workers
+        )
+        if entry.is_file() and not matcher.match(relative_file_path)
+    )
+    if compact:
+        return Ok(_to_compact_list(files, sort=sort))
+    file_list = [relative_file_path for relative_file_path, _ in files]
     if sort:
         return Ok(sorted(file_list))
     return Ok(file_list)
 
 
-def get_aggregated_file_list_ne(
-    base: str,
-    subdirs: List[str],
+@overload
+def iter_subdirs_recursively_ne(
+    path: str,
     *,
-    sort: bool = True,
-    ignore_list: Optional[List[str]] = None,
-) -> Result[List[str], Error]:
-    """Get the list of all files of the `base` directory and the `subdirs`.
+    ignore_list: Optional[Union[List[str], IgnoreMatcher]] = None,
+    max_workers: int = 1,
+    with_entries: Literal[False] = False,
+) -> Generator[Result[str, Error], None, None]:
+    ...  # pragma: no cover
 
-    The result contains list of relative paths to the files without starting dot.
-    Symlinks are included into the result.
-    This is same as `get_file_list_recursively_ne()` but is cheaper
-    to use if you already have the list of the subdirs.
 
-    Args:
-        base (str): path to the base directory.
-        subdirs (List[str]): relative paths to sub-directories.
-        sort (bool): sort the result list alphabetically.
-        ignore_list (Optional[List[str]]): files and sub-directories
-        to be excluded from the result and recursive search.
-        each string must be a relative path without starting `.`.
+@overload
+def iter_subdirs_recursively_ne(
+    path: str,
+    *,
+    ignore_list: Optional[Union[List[str], IgnoreMatcher]] = None,
+    max_workers: int = 1,
+    with_entries: Literal[True],
+) -> Generator[Result[Tuple[str, "os.DirEntry[str]"], Error], None, None]:
+    ...  # pragma: no cover
 
-    Returns:
-        Result[List[str], Error]:
-            Ok (List[str]): operation successful.
+
+def iter_subdirs_recursively_ne(
+    path: str,
+    *,
+    ignore_list: Optional[Union[List[str], IgnoreMatcher]] = None,
+    max_workers: int = 1,
+    with_entries: bool = False,
+) -> Generator[Result[Any, Error], None, None]:
+    """Lazily iterate over all sub-directories that the directory contains.
+
+    This is a generator version of `get_subdir_list_recursively_ne()`:
+    relative paths are yielded as the directory tree is walked, unsorted,
+    so that the memory usage does not depend on the size of the tree.
+    Errors are yielded as `Err` items; an error in a sub-directory
+    does not stop the iteration.
+
+    Args:
+        path (str): path to a directory.
+        ignore_list (Optional[Union[List[str], IgnoreMatcher]]): sub-directories
+        to be excluded from the recursive search, either a compiled `IgnoreMatcher`
+        or a list of relative paths without starting `.`.
+        max_workers (int): number of threads that scan sibling directories
+            concurrently; values greater than 1 speed up the walk on
+            high-latency file systems like NFS.
+        with_entries (bool): yield `(relative_path, os.DirEntry)` tuples
+            instead of relative paths.
+
+    Yields:
+        Result[str, Error]:
+            Ok (str): relative path to a sub-directory.
+            Ok (Tuple[str, os.DirEntry[str]]): relative path and directory entry if `with_entries=True`.
+            Err (kind == `FileNotFoundError`): path does not exist.
+            Err (kind == `TypeError`): path is not a directory.
+            Err (kind == `ValueError`): `max_workers` is less than 1.
+            Err (kind == `PermissionError`): wrong permissions.
+            Err (kind == `...`): other error(s) occurred.
+
+    Example:
+        >>> for item in iter_subdirs_recursively_ne("some-dir"):
+        >>>     if item.is_err():
+        >>>         ...  # process error
+        >>>     else:
+        >>>         subdir = item.unwrap()
+    """
+    validation = _dir_validation(path)
+    if validation.is_ok():
+        validation = _workers_validation(max_workers)
+    if validation.is_err():
+        yield Err(validation.unwrap_err())
+        return
+
+    matcher = _ignore_matcher(ignore_list)
+    for item in _walk_tree(
+        path,
+        prune=lambda p: matcher.match(p, is_dir=True),
+        max_workers=max_workers,
+    ):
+        if item.is_err():
+            yield item
+            continue
+        relative_path, entry = item.unwrap()
+        if entry.is_dir(follow_symlinks=False):
+            yield item if with_entries else Ok(relative_path)
+
+
+@overload
+def iter_files_recursively_ne(
+    path: str,
+    *,
+    ignore_list: Optional[Union[List[str], IgnoreMatcher]] = None,
+    max_workers: int = 1,
+    with_entries: Literal[False] = False,
+) -> Generator[Result[str, Error], None, None]:
+    ...  # pragma: no cover
+
+
+@overload
+def iter_files_recursively_ne(
+    path: str,
+    *,
+    ignore_list: Optional[Union[List[str], IgnoreMatcher]] = None,
+    max_workers: int = 1,
+    with_entries: Literal[True],
+) -> Generator[Result[Tuple[str, "os.DirEntry[str]"], Error], None, None]:
+    ...  # pragma: no cover
+
+
+def iter_files_recursively_ne(
+    path: str,
+    *,
+    ignore_list: Optional[Union[List[str], IgnoreMatcher]] = None,
+    max_workers: int = 1,
+    with_entries: bool = False,
+) -> Generator[Result[Any, Error], None, None]:
+    """Lazily iterate over the files and symlinks that the directory contains.
+
+    This is a generator version of `get_file_list_recursively_ne()`:
+    relative paths are yielded as the directory tree is walked, unsorted,
+    so that the memory usage does not depend on the size of the tree.
+    Errors are yielded as `Err` items; an error in a sub-directory
+    does not stop the iteration.
+
+    Args:
+        path (str): path to a directory.
+        ignore_list (Optional[Union[List[str], IgnoreMatcher]]): files and sub-directories
+        to be excluded from the result and recursive search, either a compiled
+        `IgnoreMatcher` or a list of relative paths without starting `.`.
+        max_workers (int): number of threads that scan sibling directories
+            concurrently; values greater than 1 speed up the walk on
+            high-latency file systems like NFS.
+        with_entries (bool): yield `(relative_path, os.DirEntry)` tuples
+            instead of relative paths.
+
+    Yields:
+        Result[str, Error]:
+            Ok (str): relative path to a file.
+            Ok (Tuple[str, os.DirEntry[str]]): relative path and directory entry if `with_entries=True`.
+            Err (kind == `FileNotFoundError`): path does not exist.
+            Err (kind == `TypeError`): path is not a directory.
+            Err (kind == `ValueError`): `max_workers` is less than 1.
+            Err (kind == `PermissionError`): wrong permissions.
+            Err (kind == `...`): other error(s) occurred.
+
+    Example:
+        >>> for item in iter_files_recursively_ne("some-dir", with_entries=True):
+        >>>     if item.is_err():
+        >>>         ...  # process error
+        >>>     else:
+        >>>         relative_path, entry = item.unwrap()
+    """
+    validation = _dir_validation(path)
+    if validation.is_ok():
+        validation = _workers_validation(max_workers)
+    if validation.is_err():
+        yield Err(validation.unwrap_err())
+        return
+
+    matcher = _ignore_matcher(ignore_list)
+    for item in _walk_tree(
+        path,
+        prune=lambda p: matcher.match(p, is_dir=True),
+        max_workers=max_workers,
+    ):
+        if item.is_err():
+            yield item
+            continue
+        relative_path, entry = item.unwrap()
+        if entry.is_file() and not matcher.match(relative_path):
+            yield item if with_entries else Ok(relative_path)
+
+
+def _find_validation(
+    item_type: Optional[str],
+    suffixes: Optional[Iterable[str]],
+    min_size: Optional[int],
+    max_size: Optional[int],
+    min_mtime: Optional[float],
+    max_mtime: Optional[float],
+    max_depth: Optional[int],
+) -> Result[None, Error]:
+    if item_type is not None and item_type not in ITEM_TYPES:
+        return Err(
+            Error(
+                ErrorKind.ValueError,
+                f"item_type must be one of {ITEM_TYPES}, got {item_type!r}",
+            )
+        )
+    if isinstance(suffixes, str):
+        # a string is an iterable of its characters
+        return Err(
+            Error(
+                ErrorKind.ValueError,
+                f"suffixes must be a collection of strings, got {suffixes!r}",
+            )
+        )
+    if min_size is not None and max_size is not None and min_size > max_size:
+        return Err(Error(ErrorKind.ValueError, "min_size is greater than max_size"))
+    if min_mtime is not None and max_mtime is not None and min_mtime > max_mtime:
+        return Err(Error(ErrorKind.ValueError, "min_mtime is greater than max_mtime"))
+    if max_depth is not None and max_depth < 1:
+        return Err(
+            Error(ErrorKind.ValueError, f"max_depth must be >= 1, got {max_depth}")
+        )
+    return Ok(None)
+
+
+def _find_filter(
+    item_type: Optional[str],
+    suffixes: Optional[Iterable[str]],
+    min_size: Optional[int],
+    max_size: Optional[int],
+    min_mtime: Optional[float],
+    max_mtime: Optional[float],
+) -> Callable[["os.DirEntry[str]"], bool]:
+    """Build the predicate of `find_ne()`, cheapest checks first."""
+    suffix_tuple = tuple(suffixes) if suffixes is not None else None
+    need_stat = any(v is not None for v in (min_size, max_size, min_mtime, max_mtime))
+
+    def _filter(entry: "os.DirEntry[str]") -> bool:
+        if suffix_tuple is not None and not entry.name.endswith(suffix_tuple):
+            return False
+        if item_type is not None and _entry_type(entry) != item_type:
+            return False
+        if not need_stat:
+            return True
+        try:
+            st = entry.stat(follow_symlinks=False)
+        except OSError:  # pragma: no cover
+            return False  # pragma: no cover
+        return (
+            (min_size is None or st.st_size >= min_size)
+            and (max_size is None or st.st_size <= max_size)
+            and (min_mtime is None or st.st_mtime >= min_mtime)
+            and (max_mtime is None or st.st_mtime <= max_mtime)
+        )
+
+    return _filter
+
+
+def find_ne(
+    path: str,
+    *,
+    item_type: Optional[str] = None,
+    suffixes: Optional[Iterable[str]] = None,
+    min_size: Optional[int] = None,
+    max_size: Optional[int] = None,
+    min_mtime: Optional[float] = None,
+    max_mtime: Optional[float] = None,
+    max_depth: Optional[int] = None,
+    ignore_list: Optional[Union[List[str], IgnoreMatcher]] = None,
+    max_workers: int = 1,
+    sort: bool = True,
+) -> Result[List[str], Error]:
+    """Find the items of the directory tree that match all the filters, no exceptions.
+
+    The filters are evaluated during a single walk from the `os.DirEntry`
+    data: name and type are free, size and mtime cost one cached `lstat`
+    per item and only if one of them is requested. Symlinks are not
+    followed. `max_depth` and the ignored directories prune whole subtrees.
+    Unreadable sub-directories are skipped.
+
+    Args:
+        path (str): path to a directory.
+        item_type (Optional[str]): one of ('file', 'dir', 'symlink', 'other').
+        suffixes (Optional[Iterable[str]]): name endings, e.g. ('.tar.gz', '.zip').
+        min_size (Optional[int]): minimum size in bytes, inclusive.
+        max_size (Optional[int]): maximum size in bytes, inclusive.
+        min_mtime (Optional[float]): minimum modification time (seconds since
+            the epoch), inclusive.
+        max_mtime (Optional[float]): maximum modification time (seconds since
+            the epoch), inclusive.
+        max_depth (Optional[int]): do not descend deeper than this; items
+            of `path` itself have depth 1.
+        ignore_list (Optional[Union[List[str], IgnoreMatcher]]): files and sub-directories
+            to be excluded from the result and recursive search, either a compiled
+            `IgnoreMatcher` or a list of relative paths without starting `.`.
+        max_workers (int): number of threads that scan the directories.
+        sort (bool): sort the result list alphabetically.
+
+    Returns:
+        Result[List[str], Error]:
+            Ok (List[str]): relative paths of the matching items.
+            Err (kind == `FileNotFoundError`): path does not exist.
+            Err (kind == `TypeError`): path is not a directory.
+            Err (kind == `PermissionError`): wrong permissions.
+            Err (kind == `ValueError`): invalid filter or `max_workers`,
+                e.g. `suffixes` is a string instead of a collection.
+            Err (kind == `...`): other error(s) occurred.
+
+    Example:
+        >>> week_ago = time.time() - 7 * 24 * 3600
+        >>> result = find_ne("logs", item_type="file", suffixes=[".log"],
+        >>>                  min_size=1 << 20, max_mtime=week_ago)
+        >>> if result.is_ok():
+        >>>     big_old_logs = result.unwrap()
+    """
+    validation = _dir_validation(path)
+    if validation.is_ok():
+        validation = _workers_validation(max_workers)
+    if validation.is_ok():
+        validation = _find_validation(
+            item_type, suffixes, min_size, max_size, min_mtime, max_mtime, max_depth
+        )
+    if validation.is_err():
+        return Err(validation.unwrap_err())
+
+    matcher = _ignore_matcher(ignore_list)
+    matches = _find_filter(
+        item_type, suffixes, min_size, max_size, min_mtime, max_mtime
+    )
+    result = [
+        relative_path
+        for relative_path, entry in _walk_tree_skip_errors(
+            path, matcher, max_workers, max_depth
+        )
+        if matches(entry) and not matcher.match(relative_path)
+    ]
+    if sort:
+        return Ok(sorted(result))
+    return Ok(result)
+
+
+def get_aggregated_file_list_ne(
+    base: str,
+    subdirs: List[str],
+    *,
+    sort: bool = True,
+    ignore_list: Optional[Union[List[str], IgnoreMatcher]] = None,
+) -> Result[List[str], Error]:
+    """Get the list of all files of the `base` directory and the `subdirs`.
+
+    The result contains list of relative paths to the files without starting dot.
+    Symlinks are included into the result.
+    This is same as `get_file_list_recursively_ne()` but is cheaper
+    to use if you already have the list of the subdirs.
+
+    Args:
+        base (str): path to the base directory.
+        subdirs (List[str]): relative paths to sub-directories.
+        sort (bool): sort the result list alphabetically.
+        ignore_list (Optional[Union[List[str], IgnoreMatcher]]): files and sub-directories
+        to be excluded from the result and recursive search, either a compiled
+        `IgnoreMatcher` or a list of relative paths without starting `.`.
+
+    Returns:
+        Result[List[str], Error]:
+            Ok (List[str]): operation successful.
             Err (kind == `FileNotFoundError`): path does not exist.
             Err (kind == `TypeError`): path is not a directory.
             Err (kind == `PermissionError`): wrong permissions.
@@ -1097,8 +2141,7 @@ def get_aggregated_file_list_ne(
     if validation.is_err():
         return Err(validation.unwrap_err())
 
-    if ignore_list is None:
-        ignore_list = []
+    matcher = _ignore_matcher(ignore_list)
 
     if "" not in subdirs:
         subdirs.append("")  # add base directory to the list
@@ -1106,6 +2149,9 @@ def get_aggregated_file_list_ne(
     # search each directory for files and add them into common list
     file_list = []
     for d in subdirs:
+        if d and matcher.is_ignored(d, is_dir=True):
+            # the sub-directory itself or one of its parents is ignored
+            continue
         d_path = os.path.join(base, d)
         get_files_result = get_file_list_ne(d_path, sort=False)
         if get_files_result.is_err():
@@ -1116,7 +2162,7 @@ def get_aggregated_file_list_ne(
                 relative_file_path = os.path.join(d, f)
             else:
                 relative_file_path = f
-            if relative_file_path not in ignore_list:
+            if not matcher.match(relative_file_path):
                 file_list.append(relative_file_path)
     if sort:
         return Ok(sorted(file_list))
@@ -1144,13 +2190,74 @@ def get_item_count_ne(path: str) -> Result[int, Error]:
         # scenario already covered in previous test
         return Err(validation.unwrap_err())  # pragma: no cover
     try:
-        total_items = len([item.name for item in os.scandir(path)])
-        return Ok(total_items)
+        with os.scandir(path) as it:
+            return Ok(sum(1 for _ in it))
     except Exception as e:  # pragma: no cover
         # error while doing file system operations
         return Err(Error.from_exception(e))  # pragma: no cover
 
 
+class ItemCounts(NamedTuple):
+    """Number of items of each type, see `get_item_counts_ne()`."""
+
+    files: int
+    dirs: int
+    symlinks: int
+    # sockets, pipes, devices etc.
+    other: int
+
+    @property
+    def total(self) -> int:
+        """Number of items of all types."""
+        return self.files + self.dirs + self.symlinks + self.other
+
+
+def get_item_counts_ne(
+    path: str, *, recursive: bool = False
+) -> Result[ItemCounts, Error]:
+    """Count the elements in the directory by type, do not raise exceptions.
+
+    Only the counters are kept, no list of names or paths is built, so this
+    is suitable for huge trees. Symlinks are counted as symlinks and are not
+    followed.
+
+    Args:
+        path (str): path to a directory.
+        recursive (bool): also count the contents of all sub-directories.
+
+    Returns:
+        Result[ItemCounts, Error]:
+            Ok (ItemCounts): operation successful.
+            Err (kind == `FileNotFoundError`): path does not exist.
+            Err (kind == `TypeError`): path is not a directory.
+            Err (kind == `PermissionError`): wrong permissions, also for
+                any of the sub-directories when `recursive`.
+            Err (kind == `...`): other error(s) occurred.
+    """
+    validation = _dir_validation(path)
+    if validation.is_err():
+        return Err(validation.unwrap_err())
+    files = dirs = symlinks = other = 0
+    stack = [path]
+    try:
+        while stack:
+            with os.scandir(stack.pop()) as it:
+                for entry in it:
+                    if entry.is_dir(follow_symlinks=False):
+                        dirs += 1
+                        if recursive:
+                            stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        files += 1
+                    elif entry.is_symlink():
+                        symlinks += 1
+                    else:
+                        other += 1
+    except Exception as e:
+        return Err(Error.from_exception(e))
+    return Ok(ItemCounts(files, dirs, symlinks, other))
+
+
 def get_file_size_ne(path: str) -> Result[int, Error]:
     """Get file size in bytes, do not raise exceptions.
 
@@ -1165,25 +2272,322 @@ def get_file_size_ne(path: str) -> Result[int, Error]:
             Err (kind == `PermissionError`): wrong permissions.
             Err (kind == `...`): other error(s) occurred.
     """
-    validation = file_exists_ne(path)
-    if validation.is_err():  # pragma: no cover
-        # scenario already covered in one of previous tests
-        return Err(validation.unwrap_err())  # pragma: no cover
+    result = _file_stat_ne(path)
+    if result.is_err():
+        return Err(result.unwrap_err())
+    return Ok(result.unwrap().st_size)
+
+
+class TreeSize(NamedTuple):
+    """Disk usage of a directory tree, see `get_tree_size_ne()`."""
+
+    # sum of `st_size`, in bytes
+    apparent_size: int
+    # space allocated on disk (`st_blocks` * 512), in bytes
+    disk_usage: int
+    # number of counted items (files, symlinks and other non-directories)
+    item_count: int
+    # relative sub-directory path -> (apparent_size, disk_usage) of its contents;
+    # empty unless `per_subdir` is requested
+    subdirs: Dict[str, Tuple[int, int]]
+
+
+def get_tree_size_ne(
+    path: str,
+    *,
+    per_subdir: bool = False,
+    ignore_list: Optional[Union[List[str], IgnoreMatcher]] = None,
+    max_workers: int = 1,
+) -> Result[TreeSize, Error]:
+    """Get the total size of all items in the directory tree, do not raise exceptions.
+
+    This is what `du` does: the tree is walked once and the sizes are taken
+    from the `os.DirEntry` stat cache. Symlinks are not followed, their own
+    size is counted; the size of directory entries themselves is not.
+    Hard links to the same file are counted once. Unreadable sub-directories
+    are skipped.
+
+    Args:
+        path (str): path to a directory.
+        per_subdir (bool): also report the cumulative size of each sub-directory.
+        ignore_list (Optional[Union[List[str], IgnoreMatcher]]): files and sub-directories
+            to be excluded, either a compiled `IgnoreMatcher` or a list of
+            relative paths without starting `.`.
+        max_workers (int): number of threads that scan the directories.
+
+    Returns:
+        Result[TreeSize, Error]:
+            Ok (TreeSize): apparent size, disk usage and item count.
+            Err (kind == `FileNotFoundError`): path does not exist.
+            Err (kind == `TypeError`): path is not a directory.
+            Err (kind == `PermissionError`): wrong permissions.
+            Err (kind == `ValueError`): `max_workers` is less than 1.
+            Err (kind == `...`): other error(s) occurred.
+    """
+    validation = _dir_validation(path)
+    if validation.is_ok():
+        validation = _workers_validation(max_workers)
+    if validation.is_err():
+        return Err(validation.unwrap_err())
+
+    matcher = _ignore_matcher(ignore_list)
+    seen_inodes = set()
+    apparent_size = disk_usage = item_count = 0
+    # directory -> (apparent_size, disk_usage) of the items directly inside it
+    direct: Dict[str, List[int]] = {}
+    for relative_path, entry in _walk_tree_skip_errors(path, matcher, max_workers):
+        if entry.is_dir(follow_symlinks=False):
+            if per_subdir:
+                direct.setdefault(relative_path, [0, 0])
+            continue
+        if matcher.match(relative_path):
+            continue
+        try:
+            st = entry.stat(follow_symlinks=False)
+        except OSError:  # pragma: no cover
+            continue  # pragma: no cover
+        if st.st_nlink > 1 and st.st_ino:
+            key = (st.st_dev, st.st_ino)
+            if key in seen_inodes:
+                continue
+            seen_inodes.add(key)
+        # `st_blocks` is not available on Windows
+        blocks = getattr(st, "st_blocks", None)
+        usage = st.st_size if blocks is None else blocks * 512
+        apparent_size += st.st_size
+        disk_usage += usage
+        item_count += 1
+        if per_subdir:
+            sizes = direct.setdefault(os.path.dirname(relative_path), [0, 0])
+            sizes[0] += st.st_size
+            sizes[1] += usage
+
+    subdirs: Dict[str, Tuple[int, int]] = {}
+    if per_subdir:
+        # roll the sizes up, the deepest directories first
+        for d in sorted(direct, key=lambda d: d.count(os.sep), reverse=True):
+            if not d:
+                continue
+            sizes = direct[d]
+            subdirs[d] = (sizes[0], sizes[1])
+            parent = direct.setdefault(os.path.dirname(d), [0, 0])
+            parent[0] += sizes[0]
+            parent[1] += sizes[1]
+        subdirs = dict(sorted(subdirs.items()))
+    return Ok(TreeSize(apparent_size, disk_usage, item_count, subdirs))
+
+
+# default read buffer size, used as is for files that are not bigger
+_READ_BUF_SIZE = 65536 * 2
+# limits of the automatic read buffer size
+_MIN_READ_BUF_SIZE = 4096
+_MAX_READ_BUF_SIZE = 4 * 1024 * 1024
+# buffer sizes tried by the calibration and bytes read with each size per round
+_CALIBRATION_BUF_SIZES = tuple(65536 << i for i in range(7))
+_CALIBRATION_BYTES = 8 * 1024 * 1024
+_CALIBRATION_ROUNDS = 3
+
+_calibration_lock = threading.Lock()
+_calibrated_read_buf_size: Optional[int] = None
+# one reusable read buffer per thread
+_buffer_pool = threading.local()
+
+
+def _calibrate_read_buf_size() -> int:
+    """Measure the smallest read buffer size that reads about as fast as any.
+
+    Reads from /dev/zero, which is a copy from the kernel like a read from
+    the page cache, and feeds the data to CRC32, the cheapest hasher. Small
+    buffers lose on the per-call overhead, big ones on the CPU cache misses.
+    """
+    # the best of several rounds, interleaved so that noise from other
+    # processes affects all sizes alike
+    times = [float("inf")] * len(_CALIBRATION_BUF_SIZES)
     try:
-        return Ok(os.path.getsize(path))
-    except Exception as e:  # pragma: no cover
-        # error while doing file system operations
-        return Err(Error.from_exception(e))  # pragma: no cover
+        with open("/dev/zero", "rb", buffering=0) as f:
+            buf = bytearray(_CALIBRATION_BUF_SIZES[-1])
+            with memoryview(buf) as mv:
+                for _ in range(_CALIBRATION_ROUNDS):
+                    for i, size in enumerate(_CALIBRATION_BUF_SIZES):
+                        with mv[:size] as view:
+                            start = time.perf_counter()
+                            for _ in range(_CALIBRATION_BYTES // size):
+                                f.readinto(view)
+                                zlib.crc32(view)
+                            times[i] = min(times[i], time.perf_counter() - start)
+    except OSError:  # pragma: no cover
+        # no /dev/zero, e.g. on Windows
+        return _READ_BUF_SIZE  # pragma: no cover
+    best = min(times)
+    return next(
+        size for size, t in zip(_CALIBRATION_BUF_SIZES, times) if t <= best * 1.1
+    )
+
+
+def _calibrated_buf_size() -> int:
+    """Get the calibrated read buffer size, calibrate on the first call."""
+    global _calibrated_read_buf_size
+    with _calibration_lock:
+        if _calibrated_read_buf_size is None:
+            _calibrated_read_buf_size = _calibrate_read_buf_size()
+        return _calibrated_read_buf_size
+
+
+def _auto_read_buf_size(st: os.stat_result) -> int:
+    """Choose the read buffer size for a file.
+
+    A multiple of the preferred I/O size of the file system (`st_blksize`,
+    which is bigger on RAID and some network file systems), not bigger than
+    needed to read the whole file at once. Only files bigger than the
+    default size use the calibrated size.
+    """
+    blksize = max(getattr(st, "st_blksize", 0) or 0, _MIN_READ_BUF_SIZE)
+    if not stat.S_ISREG(st.st_mode) or st.st_size == 0:
+        # the size is unknown
+        return max(blksize, _READ_BUF_SIZE)
+    if st.st_size <= _READ_BUF_SIZE:
+        size = _READ_BUF_SIZE
+    else:
+        size = min(_calibrated_buf_size(), _MAX_READ_BUF_SIZE)
+    size = -(-max(size, blksize) // blksize) * blksize
+    file_size = -(-st.st_size // blksize) * blksize
+    return min(size, file_size)
+
+
+@contextlib.contextmanager
+def _read_buffer(size: int) -> Iterator[memoryview]:
+    """Lend a writable buffer of `size` bytes from the thread's pool.
+
+    The buffer is reused by the next call in the same thread, unless it is
+    bigger than `_MAX_READ_BUF_SIZE`; nested calls get separate buffers.
+    """
+    buf = getattr(_buffer_pool, "buf", None)
+    _buffer_pool.buf = None
+    if buf is None or len(buf) < size:
+        buf = bytearray(size)
+    try:
+        with memoryview(buf) as mv, mv[:size] as view:
+            yield view
+    finally:
+        if len(buf) <= _MAX_READ_BUF_SIZE:
+            pooled = getattr(_buffer_pool, "buf", None)
+            if pooled is None or len(pooled) < len(buf):
+                _buffer_pool.buf = buf
+
+
+# the mapped file is fed to the hashers in slices of this size
+_MMAP_CHUNK_SIZE = 64 * 1024 * 1024
+
+
+def _hash_mmap(f: Any, st: os.stat_result, hashers: List[Any], use_mmap: bool) -> bool:
+    """Feed the file to the hashers through `mmap`, without copying it.
+
+    Return `False` if the file was not hashed: the mode is not selected
+    or the file cannot be mapped (empty and special files).
+    """
+    if not use_mmap:
+        return False
+    if not stat.S_ISREG(st.st_mode) or st.st_size == 0:
+        return False
+    try:
+        m = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):  # pragma: no cover
+        return False  # pragma: no cover
+    with m, memoryview(m) as mv:
+        for offset in range(0, len(mv), _MMAP_CHUNK_SIZE):
+            with mv[offset : offset + _MMAP_CHUNK_SIZE] as chunk:
+                for h in hashers:
+                    h.update(chunk)
+    return True
+
+
+def _hash_file(
+    path: str,
+    hashers: List[Any],
+    read_buf_size: Optional[int],
+    use_mmap: bool,
+) -> None:
+    """Feed the contents of the file to the `hashlib`-like hashers, may raise."""
+    with open(path, "rb", buffering=0) as f:
+        st = os.fstat(f.fileno())
+        if _hash_mmap(f, st, hashers, use_mmap):
+            return
+        if read_buf_size is None:
+            read_buf_size = _auto_read_buf_size(st)
+        # https://stackoverflow.com/a/44873382/3824328
+        with _read_buffer(read_buf_size) as mv:
+            for n in iter(lambda: f.readinto(mv), 0):  # type: ignore
+                with mv[:n] as chunk:
+                    for h in hashers:
+                        h.update(chunk)
+
+
+def _digest_file(
+    path: str,
+    algorithms: List[str],
+    read_buf_size: Optional[int],
+    use_mmap: bool,
+    cache: Optional[HashCache],
+    st: Optional[os.stat_result] = None,
+) -> Dict[str, bytes]:
+    """Get the digests of a file reading it at most once, may raise.
+
+    With a cache, only the missing digests are computed, and they are
+    stored if the file did not change while it was being read. `st` is
+    the result of `os.stat(path)` if the caller already has it.
+    """
+    digests: Dict[str, bytes] = {}
+    if cache is not None:
+        if st is None:
+            st = os.stat(path)
+        for a in algorithms:
+            digest = cache.get(st, a)
+            if digest is not None:
+                digests[a] = digest
+    missing = [a for a in algorithms if a not in digests]
+    if missing:
+        hashers = [new_hasher_ne(a).unwrap() for a in missing]
+        _hash_file(path, hashers, read_buf_size, use_mmap)
+        for a, h in zip(missing, hashers):
+            digests[a] = h.digest()
+        if cache is not None and st is not None:
+            st_after = os.stat(path)
+            if (st.st_dev, st.st_ino, st.st_size, st.st_mtime_ns) == (
+                st_after.st_dev,
+                st_after.st_ino,
+                st_after.st_size,
+                st_after.st_mtime_ns,
+            ):
+                for a in missing:
+                    cache.put(st, a, digests[a])
+    return {a: digests[a] for a in algorithms}
 
 
 def get_file_crc32_ne(
-    path: str, *, read_buf_size: int = 65536 * 2
+    path: str,
+    *,
+    read_buf_size: Optional[int] = None,
+    use_mmap: bool = False,
+    cache: Optional[HashCache] = None,
 ) -> Result[int, Error]:
     """Get CRC32 of a file, do not raise exceptions.
 
     Args:
         path (str): path to the file.
-        read_buf_size (int): read buffer size.
+        read_buf_size (Optional[int]): read buffer size; by default it is
+            chosen for the file from its size, the preferred I/O size of
+            the file system and a one-time measurement of the read speed.
+            The buffers are reused by the following calls in the thread.
+        use_mmap (bool): read the file through `mmap` instead of copying
+            it into the read buffer. Files that cannot be mapped are read.
+            Use it only for files that no other process can truncate:
+            reading a page past the new end of a mapped file kills the
+            process with `SIGBUS`, which cannot be caught.
+            It is not selected by file size: no size makes a mapping
+            safe, and it saves only the buffer copy (1.1-1.5x faster in
+            `benchmarks/bench_mmap_hash.py`).
+        cache (Optional[HashCache]): persistent digest cache; an unchanged
+            file that is already in the cache is not read.
 
     Returns:
         Result[int, Error]:
@@ -1193,31 +2597,32 @@ def get_file_crc32_ne(
             Err (kind == `PermissionError`): wrong permissions.
             Err (kind == `...`): other error(s) occurred.
     """
-    validation = file_exists_ne(path)
-    if validation.is_err():  # pragma: no cover
-        # scenario already covered in one of previous tests
-        return Err(validation.unwrap_err())  # pragma: no cover
+    validation = _file_stat_ne(path)
+    if validation.is_err():
+        return Err(validation.unwrap_err())
+    st = validation.unwrap()
     try:
-        crc32 = 0
-        b = bytearray(read_buf_size)
-        mv = memoryview(b)
-        with open(path, "rb", buffering=0) as f:
-            for n in iter(lambda: f.readinto(mv), 0):  # type: ignore
-                crc32 = zlib.crc32(mv[:n], crc32)
-            return Ok(crc32)
+        digests = _digest_file(path, ["crc32"], read_buf_size, use_mmap, cache, st)
+        return Ok(int.from_bytes(digests["crc32"], "big"))
     except Exception as e:  # pragma: no cover
         # error while doing file system operations
         return Err(Error.from_exception(e))  # pragma: no cover
 
 
 def get_file_crc32_hex_ne(
-    path: str, *, read_buf_size: int = 65536 * 2
+    path: str,
+    *,
+    read_buf_size: Optional[int] = None,
+    use_mmap: bool = False,
+    cache: Optional[HashCache] = None,
 ) -> Result[str, Error]:
     """Get CRC32 of a file as a hex-encoded string, do not raise exceptions.
 
     Args:
         path (str): path to the file.
-        read_buf_size (int): read buffer size.
+        read_buf_size (Optional[int]): see `get_file_crc32_ne()`.
+        use_mmap (bool): see `get_file_crc32_ne()`.
+        cache (Optional[HashCache]): see `get_file_crc32_ne()`.
 
     Returns:
         Result[str, Error]:
@@ -1227,14 +2632,21 @@ def get_file_crc32_hex_ne(
             Err (kind == `PermissionError`): wrong permissions.
             Err (kind == `...`): other error(s) occurred.
     """
-    crc32_result = get_file_crc32_ne(path, read_buf_size=read_buf_size)
+    crc32_result = get_file_crc32_ne(
+        path, read_buf_size=read_buf_size, use_mmap=use_mmap, cache=cache
+    )
     if crc32_result.is_err():
         return Err(crc32_result.unwrap_err())  # pragma: no cover
     return Ok("%08X" % crc32_result.unwrap())
 
 
 def get_file_hash_ne(
-    path: str, *, algorithm: str, read_buf_size: int = 65536 * 2
+    path: str,
+    *,
+    algorithm: str,
+    read_buf_size: Optional[int] = None,
+    use_mmap: bool = False,
+    cache: Optional[HashCache] = None,
 ) -> Result[bytes, Error]:
     """Get hash of a file as bytes, do not raise exceptions.
 
@@ -1242,8 +2654,11 @@ def get_file_hash_ne(
 
     Args:
         path (str): path to the file.
-        algorithm (str): one of ("sha1", "sha256", "sha512", )
-        read_buf_size (int): read buffer size.
+        algorithm (str): e.g. "sha256", "blake2b-256", "md5", "crc32";
+            see `hash_algorithms.available_hash_algorithms()`.
+        read_buf_size (Optional[int]): see `get_file_crc32_ne()`.
+        use_mmap (bool): see `get_file_crc32_ne()`.
+        cache (Optional[HashCache]): see `get_file_crc32_ne()`.
 
     Returns:
         Result[bytes, Error]:
@@ -1254,33 +2669,588 @@ def get_file_hash_ne(
             Err (kind == `PermissionError`): wrong permissions.
             Err (kind == `...`): other error(s) occurred.
     """
-    validation = file_exists_ne(path)
-    if validation.is_err():  # pragma: no cover
-        # scenario already covered in one of previous tests
-        return Err(validation.unwrap_err())  # pragma: no cover
+    validation = _file_stat_ne(path)
+    if validation.is_err():
+        return Err(validation.unwrap_err())
+    st = validation.unwrap()
     try:
-        if algorithm == "sha1":
-            h = hashlib.sha1()
-        elif algorithm == "sha256":
-            h = hashlib.sha256()
-        elif algorithm == "sha512":
-            h = hashlib.sha512()
-        else:
+        if not hash_algorithm_available(algorithm):
             return Err(
                 Error(ErrorKind.ValueError, f"unsupported hash algorithm: {algorithm}")
             )
-        # https://stackoverflow.com/a/44873382/3824328
-        b = bytearray(read_buf_size)
-        mv = memoryview(b)
+        digests = _digest_file(path, [algorithm], read_buf_size, use_mmap, cache, st)
+        return Ok(digests[algorithm])
+    except Exception as e:  # pragma: no cover
+        # error while doing file system operations
+        return Err(Error.from_exception(e))  # pragma: no cover
+
+
+def _digests_validation(algorithms: List[str]) -> Result[None, Error]:
+    if not algorithms:
+        return Err(Error(ErrorKind.ValueError, "no hash algorithms specified"))
+    for algorithm in algorithms:
+        if not hash_algorithm_available(algorithm):
+            return Err(
+                Error(ErrorKind.ValueError, f"unsupported hash algorithm: {algorithm}")
+            )
+    return Ok(None)
+
+
+def get_file_digests_ne(
+    path: str,
+    *,
+    algorithms: Iterable[str],
+    read_buf_size: Optional[int] = None,
+    use_mmap: bool = False,
+    cache: Optional[HashCache] = None,
+) -> Result[Dict[str, bytes], Error]:
+    """Compute several digests of a file in one read pass, do not raise exceptions.
+
+    Each chunk read into the shared buffer is fed to all the hashers, so
+    the file is read only once whatever the number of algorithms.
+
+    Args:
+        path (str): path to the file.
+        algorithms (Iterable[str]): names of hash algorithms, see
+            `get_file_hash_ne()`; CRC32 is returned as 4 big-endian bytes.
+        read_buf_size (Optional[int]): see `get_file_crc32_ne()`.
+        use_mmap (bool): see `get_file_crc32_ne()`.
+        cache (Optional[HashCache]): see `get_file_crc32_ne()`; only
+            the digests that are not cached are computed.
+
+    Returns:
+        Result[Dict[str, bytes], Error]:
+            Ok (Dict[str, bytes]): algorithm -> digest.
+            Err (kind == `FileNotFoundError`): path does not exist.
+            Err (kind == `ValueError`): unsupported or no hash algorithm.
+            Err (kind == `TypeError`): path is not a file.
+            Err (kind == `PermissionError`): wrong permissions.
+            Err (kind == `...`): other error(s) occurred.
+
+    Example:
+        >>> result = get_file_digests_ne("file.bin", algorithms=["crc32", "sha256"])
+        >>> if result.is_ok():
+        >>>     crc32_hex = result.unwrap()["crc32"].hex().upper()
+    """
+    algorithms = list(dict.fromkeys(algorithms))
+    validation = _digests_validation(algorithms)
+    if validation.is_err():
+        return Err(validation.unwrap_err())
+    file_validation = _file_stat_ne(path)
+    if file_validation.is_err():
+        return Err(file_validation.unwrap_err())
+    st = file_validation.unwrap()
+    try:
+        return Ok(_digest_file(path, algorithms, read_buf_size, use_mmap, cache, st))
+    except Exception as e:  # pragma: no cover
+        # error while doing file system operations
+        return Err(Error.from_exception(e))  # pragma: no cover
+
+
+# files smaller than this are hashed in batches, one thread task per batch
+_SMALL_FILE_SIZE = 1024 * 1024
+_BATCH_MAX_BYTES = 8 * 1024 * 1024
+_BATCH_MAX_FILES = 256
+# batch of files of unknown size
+_LAZY_BATCH_FILES = 8
+
+
+def _file_digest_ne(
+    path: str, algorithm: str, read_buf_size: Optional[int], cache: Optional[HashCache]
+) -> Result[bytes, Error]:
+    """Get the digest of a file, CRC32 is returned as 4 big-endian bytes."""
+    digests = get_file_digests_ne(
+        path, algorithms=[algorithm], read_buf_size=read_buf_size, cache=cache
+    )
+    if digests.is_err():
+        return Err(digests.unwrap_err())
+    return Ok(digests.unwrap()[algorithm])
+
+
+def _hash_batch(
+    paths: List[str],
+    algorithm: str,
+    read_buf_size: Optional[int],
+    cache: Optional[HashCache],
+) -> List[Tuple[str, Result[bytes, Error]]]:
+    return [(p, _file_digest_ne(p, algorithm, read_buf_size, cache)) for p in paths]
+
+
+def _unique(paths: Iterable[str]) -> Iterator[str]:
+    seen = set()
+    for p in paths:
+        if p not in seen:
+            seen.add(p)
+            yield p
+
+
+def _hash_schedule(
+    paths: Iterable[str], sizes: Optional[Mapping[str, int]]
+) -> Iterator[List[str]]:
+    """Split the unique paths into thread tasks.
+
+    Without sizes, the paths are consumed lazily and batched in their
+    order, so that hashing starts before the input is exhausted. With the
+    sizes known, large files go first, one per task, largest first, so
+    that a big file does not start last and keep a single thread busy
+    after all the others are done. Small files are grouped into batches
+    to amortize the cost of a task.
+    """
+    if sizes is None:
+        batch: List[str] = []
+        for p in _unique(paths):
+            batch.append(p)
+            if len(batch) >= _LAZY_BATCH_FILES:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+        return
+    # a path without a size is hashed with the small files
+    order = sorted(_unique(paths), key=lambda p: sizes.get(p, 0), reverse=True)
+    large = 0
+    for p in order:
+        if sizes.get(p, 0) < _SMALL_FILE_SIZE:
+            break
+        yield [p]
+        large += 1
+    batch = []
+    batch_bytes = 0
+    for p in order[large:]:
+        batch.append(p)
+        batch_bytes += sizes.get(p, 0)
+        if batch_bytes >= _BATCH_MAX_BYTES or len(batch) >= _BATCH_MAX_FILES:
+            yield batch
+            batch = []
+            batch_bytes = 0
+    if batch:
+        yield batch
+
+
+def iter_file_hashes_ne(
+    paths: Iterable[str],
+    *,
+    algorithm: str,
+    max_workers: Optional[int] = None,
+    read_buf_size: Optional[int] = None,
+    cache: Optional[HashCache] = None,
+    sizes: Optional[Mapping[str, int]] = None,
+) -> Generator[Tuple[str, Result[bytes, Error]], None, None]:
+    """Hash many files in a thread pool, yield the results as they are ready.
+
+    `hashlib` and `zlib` release the GIL while processing large buffers,
+    so hashing scales across CPU cores. Each path is yielded exactly once,
+    in the order of completion; duplicate paths are hashed once.
+
+    The paths are not stat-ed up front: they are consumed lazily in small
+    batches and the first results are yielded while the rest of the input
+    is still read. If the caller already knows the file sizes, e.g. from
+    a directory scan, passing them in `sizes` schedules the large files
+    first, which shortens the total time when a few files dominate.
+
+    Args:
+        paths (Iterable[str]): paths to the files.
+        algorithm (str): name of a hash algorithm, see `get_file_hash_ne()`;
+            CRC32 is returned as 4 big-endian bytes.
+        max_workers (Optional[int]): number of threads, CPU count by default.
+        read_buf_size (Optional[int]): see `get_file_crc32_ne()`.
+        cache (Optional[HashCache]): persistent digest cache, see
+            `get_file_crc32_ne()`.
+        sizes (Optional[Mapping[str, int]]): path -> file size, used only
+            to order the work; all the paths are read before hashing starts.
+
+    Yields:
+        Tuple[str, Result[bytes, Error]]:
+            path and its result, which is the same as the one of `get_file_hash_ne()`;
+            Err (kind == `ValueError`) for each path if `algorithm` or
+            `max_workers` is invalid.
+    """
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
+    validation = _workers_validation(max_workers)
+    if validation.is_ok():
+        validation = _digests_validation([algorithm])
+    if validation.is_err():
+        for p in _unique(paths):
+            yield p, Err(validation.unwrap_err())
+        return
+
+    tasks = _hash_schedule(paths, sizes)
+    executor = ThreadPoolExecutor(max_workers=max_workers)
+    pending: Set[Future[List[Tuple[str, Result[bytes, Error]]]]] = set()
+    try:
+        while True:
+            # a bounded queue keeps the threads busy without reading the
+            # whole input before the first result
+            for batch in tasks:
+                pending.add(
+                    executor.submit(_hash_batch, batch, algorithm, read_buf_size, cache)
+                )
+                if len(pending) >= 2 * max_workers:
+                    break
+            if not pending:
+                break
+            done, pending = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                yield from future.result()
+    finally:
+        # the generator may be closed before all the files are hashed
+        for future in pending:
+            future.cancel()
+        executor.shutdown(wait=True)
+
+
+def hash_files_ne(
+    paths: Iterable[str],
+    *,
+    algorithm: str,
+    max_workers: Optional[int] = None,
+    read_buf_size: Optional[int] = None,
+    cache: Optional[HashCache] = None,
+    sizes: Optional[Mapping[str, int]] = None,
+) -> Dict[str, Result[bytes, Error]]:
+    """Hash many files in a thread pool, do not raise exceptions.
+
+    See `iter_file_hashes_ne()` for details.
+
+    Args:
+        paths (Iterable[str]): paths to the files.
+        algorithm (str): name of a hash algorithm, see `get_file_hash_ne()`.
+        max_workers (Optional[int]): number of threads, CPU count by default.
+        read_buf_size (Optional[int]): see `get_file_crc32_ne()`.
+        cache (Optional[HashCache]): persistent digest cache.
+        sizes (Optional[Mapping[str, int]]): path -> file size, to hash
+            the large files first.
+
+    Returns:
+        Dict[str, Result[bytes, Error]]: path -> its hash or error.
+
+    Example:
+        >>> results = hash_files_ne(artifacts, algorithm="sha256")
+        >>> failed = [p for p, r in results.items() if r.is_err()]
+    """
+    return dict(
+        iter_file_hashes_ne(
+            paths,
+            algorithm=algorithm,
+            max_workers=max_workers,
+            read_buf_size=read_buf_size,
+            cache=cache,
+            sizes=sizes,
+        )
+    )
+
+
+class TreeHash(NamedTuple):
+    """Merkle digest of a directory tree, see `get_tree_hash_ne()`."""
+
+    digest: bytes
+    # relative sub-directory path -> digest of its subtree;
+    # empty unless `per_subdir` is requested
+    subdirs: Dict[str, bytes]
+
+
+# type code, length of the name; then the name, length of the payload, payload
+_TREE_RECORD = struct.Struct(">BI")
+_TREE_PAYLOAD_SIZE = struct.Struct(">I")
+
+
+def _tree_digest_ne(
+    path: str,
+    algorithm: str,
+    matcher: IgnoreMatcher,
+    max_workers: Optional[int],
+    cache: Optional[HashCache],
+) -> Result[Dict[str, bytes], Error]:
+    """Get the digests of all directories of the tree, "" is the root."""
+    # directory -> (name, type) of its items
+    children: Dict[str, List[Tuple[str, str]]] = {"": []}
+    # relative path -> digest of a file, symlink target or digest of a directory
+    payloads: Dict[str, bytes] = {}
+    files: Dict[str, str] = {}
+    for item in _walk_tree(path, prune=lambda p: matcher.match(p, is_dir=True)):
+        if item.is_err():
+            return Err(item.unwrap_err())
+        relative_path, entry = item.unwrap()
+        item_type = _entry_type(entry)
+        if item_type == "dir":
+            children[relative_path] = []
+        elif matcher.match(relative_path):
+            continue
+        elif item_type == "file":
+            files[entry.path] = relative_path
+        elif item_type == "symlink":
+            try:
+                payloads[relative_path] = os.fsencode(os.readlink(entry.path))
+            except OSError as e:  # pragma: no cover
+                return Err(Error.from_exception(e))  # pragma: no cover
+        else:
+            payloads[relative_path] = b""
+        parent, name = os.path.split(relative_path)
+        children[parent].append((name, item_type))
+
+    for abs_path, digest in iter_file_hashes_ne(
+        files, algorithm=algorithm, max_workers=max_workers, cache=cache
+    ):
+        if digest.is_err():
+            return Err(digest.unwrap_err())
+        payloads[files[abs_path]] = digest.unwrap()
+
+    dir_digests: Dict[str, bytes] = {}
+    # the deepest directories first, the root is the last one
+    for d in sorted(children, key=lambda d: (d != "", d.count(os.sep)), reverse=True):
+        h = new_hasher_ne(algorithm).unwrap()
+        for name, item_type in sorted(children[d], key=lambda c: os.fsencode(c[0])):
+            relative_path = os.path.join(d, name) if d else name
+            if item_type == "dir":
+                payload = dir_digests[relative_path]
+            else:
+                payload = payloads[relative_path]
+            encoded_name = os.fsencode(name)
+            h.update(_TREE_RECORD.pack(ITEM_TYPE_CODES[item_type], len(encoded_name)))
+            h.update(encoded_name)
+            h.update(_TREE_PAYLOAD_SIZE.pack(len(payload)))
+            h.update(payload)
+        dir_digests[d] = h.digest()
+    return Ok(dir_digests)
+
+
+def get_tree_hash_ne(
+    path: str,
+    *,
+    algorithm: str = "sha256",
+    per_subdir: bool = False,
+    ignore_list: Optional[Union[List[str], IgnoreMatcher]] = None,
+    max_workers: Optional[int] = None,
+    cache: Optional[HashCache] = None,
+) -> Result[TreeHash, Error]:
+    """Get a single digest of the whole directory tree, do not raise exceptions.
+
+    The digest of a directory is the hash of the sorted records of its
+    items: type, name, and the file digest, symlink target or sub-directory
+    digest. So the digest changes if anything in the tree is added, removed,
+    renamed or modified, and does not depend on the location of the tree,
+    timestamps or permissions. Files are hashed in a thread pool, see
+    `hash_files_ne()`. Unlike the listing functions, an unreadable
+    sub-directory is an error.
+
+    Args:
+        path (str): path to a directory.
+        algorithm (str): name of a hash algorithm, see `get_file_hash_ne()`.
+        per_subdir (bool): also return the digest of each sub-directory, to
+            locate a change by comparing them.
+        ignore_list (Optional[Union[List[str], IgnoreMatcher]]): files and sub-directories
+            to be excluded, either a compiled `IgnoreMatcher` or a list of
+            relative paths without starting `.`.
+        max_workers (Optional[int]): number of hashing threads, CPU count by default.
+        cache (Optional[HashCache]): persistent digest cache for the files.
+
+    Returns:
+        Result[TreeHash, Error]:
+            Ok (TreeHash): digest of the tree and of the sub-directories.
+            Err (kind == `FileNotFoundError`): path does not exist.
+            Err (kind == `TypeError`): path is not a directory.
+            Err (kind == `PermissionError`): wrong permissions.
+            Err (kind == `ValueError`): unsupported hash algorithm or invalid
+                `max_workers`.
+            Err (kind == `...`): other error(s) occurred.
+    """
+    validation = _dir_validation(path)
+    if validation.is_ok() and max_workers is not None:
+        validation = _workers_validation(max_workers)
+    if validation.is_ok():
+        validation = _digests_validation([algorithm])
+    if validation.is_err():
+        return Err(validation.unwrap_err())
+
+    matcher = _ignore_matcher(ignore_list)
+    digests = _tree_digest_ne(path, algorithm, matcher, max_workers, cache)
+    if digests.is_err():
+        return Err(digests.unwrap_err())
+    dir_digests = digests.unwrap()
+    root_digest = dir_digests.pop("")
+    return Ok(
+        TreeHash(root_digest, dict(sorted(dir_digests.items())) if per_subdir else {})
+    )
+
+
+def _partial_digest_ne(
+    path: str, size: int, partial_size: int, algorithm: str
+) -> Result[bytes, Error]:
+    """Hash the first and the last `partial_size` bytes of a file."""
+    try:
+        h = new_hasher_ne(algorithm).unwrap()
         with open(path, "rb", buffering=0) as f:
-            for n in iter(lambda: f.readinto(mv), 0):  # type: ignore
-                h.update(mv[:n])
+            h.update(f.read(partial_size))
+            f.seek(max(size - partial_size, partial_size))
+            h.update(f.read(partial_size))
         return Ok(h.digest())
     except Exception as e:  # pragma: no cover
-        # error while doing file system operations
         return Err(Error.from_exception(e))  # pragma: no cover
 
 
+def _files_by_size(
+    roots: List[str], matcher: IgnoreMatcher, min_size: int
+) -> Dict[int, Dict[Tuple[int, int], List[str]]]:
+    """Group the files of the trees by size, then by (st_dev, st_ino).
+
+    A file that is in several overlapping roots, e.g. `d` and `./d/sub`,
+    is taken once, under the path of the first root.
+    """
+    by_size: Dict[int, Dict[Tuple[int, int], List[str]]] = {}
+    seen = set()
+    for root in roots:
+        # the walk does not follow symlinks, so the paths under the resolved
+        # root are canonical
+        real_root = os.path.realpath(root)
+        for relative_path, entry in _walk_tree_skip_errors(root, matcher, 1):
+            if not entry.is_file(follow_symlinks=False) or matcher.match(relative_path):
+                continue
+            real_path = os.path.join(real_root, relative_path)
+            if real_path in seen:
+                continue
+            seen.add(real_path)
+            try:
+                st = entry.stat(follow_symlinks=False)
+            except OSError:  # pragma: no cover
+                continue  # pragma: no cover
+            if st.st_size < min_size:
+                continue
+            inodes = by_size.setdefault(st.st_size, {})
+            inodes.setdefault((st.st_dev, st.st_ino), []).append(entry.path)
+    return by_size
+
+
+def _group_by_partial_digest(
+    by_size: Dict[int, List[str]],
+    partial_size: int,
+    algorithm: str,
+    max_workers: Optional[int],
+) -> Dict[Tuple[int, bytes], List[str]]:
+    """Group the files of the same size by partial digest, in a thread pool.
+
+    Only the groups of 2 or more files are returned.
+    """
+    by_partial: Dict[Tuple[int, bytes], List[str]] = {}
+    with ThreadPoolExecutor(max_workers=max_workers or os.cpu_count()) as executor:
+        futures = [
+            (
+                size,
+                p,
+                executor.submit(_partial_digest_ne, p, size, partial_size, algorithm),
+            )
+            for size, paths in by_size.items()
+            if len(paths) > 1
+            for p in paths
+        ]
+        for size, p, future in futures:
+            digest = future.result()
+            if digest.is_ok():
+                by_partial.setdefault((size, digest.unwrap()), []).append(p)
+    return {k: paths for k, paths in by_partial.items() if len(paths) > 1}
+
+
+def find_duplicates_ne(
+    roots: Iterable[str],
+    *,
+    algorithm: str = "sha256",
+    min_size: int = 1,
+    partial_size: int = 4096,
+    ignore_list: Optional[Union[List[str], IgnoreMatcher]] = None,
+    max_workers: Optional[int] = None,
+    cache: Optional[HashCache] = None,
+) -> Result[List[List[str]], Error]:
+    """Find groups of files with identical contents, do not raise exceptions.
+
+    The candidates are narrowed down in tiers, so that most files are not
+    read at all:
+
+    1. files are grouped by size taken from the walk metadata;
+    2. files of the same size are compared by a hash of the first and the
+       last `partial_size` bytes (this is the full content for small files);
+    3. only the files that still collide are fully hashed.
+
+    The hashing is done in a thread pool. Hard links to the same file are
+    reported as duplicates without reading them. Symlinks are not followed
+    and files that cannot be read are skipped.
+
+    Args:
+        roots (Iterable[str]): paths to the directories to search.
+        algorithm (str): name of a hash algorithm, see `get_file_hash_ne()`.
+        min_size (int): smaller files are skipped; empty files are skipped
+            by default.
+        partial_size (int): number of bytes hashed at each end of a file
+            in the second tier.
+        ignore_list (Optional[Union[List[str], IgnoreMatcher]]): files and sub-directories
+            to be excluded, relative to each root, either a compiled
+            `IgnoreMatcher` or a list of relative paths without starting `.`.
+        max_workers (Optional[int]): number of hashing threads, CPU count by default.
+        cache (Optional[HashCache]): persistent digest cache for the full hashes.
+
+    Returns:
+        Result[List[List[str]], Error]:
+            Ok (List[List[str]]): sorted groups of paths (root joined with
+                the relative path) of identical files.
+            Err (kind == `FileNotFoundError`): one of the roots does not exist.
+            Err (kind == `TypeError`): one of the roots is not a directory.
+            Err (kind == `PermissionError`): wrong permissions.
+            Err (kind == `ValueError`): unsupported hash algorithm or invalid
+                `max_workers`.
+            Err (kind == `...`): other error(s) occurred.
+    """
+    roots = list(roots)
+    validation = _digests_validation([algorithm])
+    if validation.is_ok() and max_workers is not None:
+        validation = _workers_validation(max_workers)
+    for root in roots:
+        if validation.is_ok():
+            validation = _dir_validation(root)
+    if validation.is_err():
+        return Err(validation.unwrap_err())
+
+    matcher = _ignore_matcher(ignore_list)
+    # representative path of each inode -> all its paths (hard links)
+    links: Dict[str, List[str]] = {}
+    # size -> representative paths of the files of that size
+    by_size: Dict[int, List[str]] = {}
+    for size, inodes in _files_by_size(roots, matcher, min_size).items():
+        for paths in inodes.values():
+            links[paths[0]] = paths
+        by_size[size] = [paths[0] for paths in inodes.values()]
+
+    by_partial = _group_by_partial_digest(by_size, partial_size, algorithm, max_workers)
+    # (size, digest) -> representative paths of identical files
+    by_digest: Dict[Tuple[int, bytes], List[str]] = {}
+    size_of: Dict[str, int] = {}
+    for (size, digest), paths in by_partial.items():
+        if size <= 2 * partial_size:
+            # the partial hash covers the whole file
+            by_digest[(size, digest)] = paths
+        else:
+            size_of.update((p, size) for p in paths)
+    for p, full_digest in iter_file_hashes_ne(
+        size_of,
+        algorithm=algorithm,
+        max_workers=max_workers,
+        cache=cache,
+        sizes=size_of,
+    ):
+        if full_digest.is_ok():
+            by_digest.setdefault((size_of[p], full_digest.unwrap()), []).append(p)
+
+    groups = []
+    grouped = set()
+    for paths in by_digest.values():
+        if len(paths) > 1:
+            groups.append([link for p in paths for link in links[p]])
+            grouped.update(paths)
+    # hard links to a file without other copies
+    for p, paths in links.items():
+        if len(paths) > 1 and p not in grouped:
+            groups.append(paths)
+    return Ok(sorted(sorted(group) for group in groups))
+
+
 def gzip_file_ne(
     src: str,
     *,
@@ -1310,7 +3280,7 @@ def gzip_file_ne(
     pre_result = _pre_copy_and_move_file_operations(src, dest, overwrite=overwrite)
     if pre_result.is_err():
         # already covered similar case
-        return pre_result  # pragma: no cover
+        return Err(pre_result.unwrap_err())  # pragma: no cover
     try:
         mode = f"w:{arch_type}"
         with tarfile.open(dest, mode) as tar:
@@ -0,0 +1,180 @@
+"""Registry of the hash algorithms shared by all hashing functions.
+
+An algorithm is a name and a factory of hasher objects with the `hashlib`
+interface: `update(data)` and `digest()`. The names are resolved in order:
+
+* registered algorithms: "crc32" and "adler32" (4 big-endian bytes) by
+  default, plus those added with `register_hash_algorithm_ne()`;
+* "blake2b-<bits>" and "blake2s-<bits>": BLAKE2 with the specified digest
+  size, e.g. "blake2b-256"; plain "blake2b" and "blake2s" have the maximum
+  digest size (512 and 256 bits);
+* any fixed-size algorithm of `hashlib.algorithms_available`, e.g. "md5",
+  "sha1", "sha256", "sha3_256".
+"""
+import hashlib
+import re
+import threading
+import zlib
+from typing import Any
+from typing import Callable
+from typing import Dict
+from typing import List
+from typing import Optional
+
+from result import Err
+from result import Ok
+from result import Result
+
+from .error import Error
+from .error import ErrorKind
+
+
+class _Crc32:
+    """CRC32 with the `hashlib` interface, the digest is 4 big-endian bytes."""
+
+    def __init__(self) -> None:
+        self._crc32 = 0
+
+    def update(self, data: Any) -> None:
+        self._crc32 = zlib.crc32(data, self._crc32)
+
+    def digest(self) -> bytes:
+        return self._crc32.to_bytes(4, "big")
+
+
+class _Adler32:
+    """Adler-32 with the `hashlib` interface, the digest is 4 big-endian bytes."""
+
+    def __init__(self) -> None:
+        self._adler32 = 1
+
+    def update(self, data: Any) -> None:
+        self._adler32 = zlib.adler32(data, self._adler32)
+
+    def digest(self) -> bytes:
+        return self._adler32.to_bytes(4, "big")
+
+
+_BLAKE2 = re.compile(r"(blake2[bs])-(\d+)")
+
+_lock = threading.Lock()
+_registry: Dict[str, Callable[[], Any]] = {
+    "crc32": _Crc32,
+    "adler32": _Adler32,
+}
+
+
+def _blake2_factory(name: str) -> Optional[Callable[[], Any]]:
+    m = _BLAKE2.fullmatch(name)
+    if m is None:
+        return None
+    constructor = hashlib.blake2b if m.group(1) == "blake2b" else hashlib.blake2s
+    bits = int(m.group(2))
+    if bits % 8 or not 0 < bits // 8 <= constructor.MAX_DIGEST_SIZE:
+        return None
+    digest_size = bits // 8
+    return lambda: constructor(digest_size=digest_size)
+
+
+def _hashlib_factory(name: str) -> Optional[Callable[[], Any]]:
+    # `shake_*` have a variable digest size and need it for `digest()`
+    if name not in hashlib.algorithms_available or name.startswith("shake_"):
+        return None
+    constructor = getattr(hashlib, name, None)
+    if constructor is not None:
+        return constructor  # type: ignore[no-any-return]
+    return lambda: hashlib.new(name)  # pragma: no cover
+
+
+def _factory(name: str) -> Optional[Callable[[], Any]]:
+    factory = _registry.get(name)
+    if factory is None:
+        factory = _blake2_factory(name) or _hashlib_factory(name)
+    return factory
+
+
+def register_hash_algorithm_ne(
+    name: str, factory: Callable[[], Any], *, overwrite: bool = False
+) -> Result[None, Error]:
+    """Make a hash algorithm available to all hashing functions, no exceptions.
+
+    Use it to plug in fast non-cryptographic hashes for deduplication.
+
+    Args:
+        name (str): name of the algorithm.
+        factory (Callable[[], Any]): creates a new hasher object with
+            `update(data)` and `digest() -> bytes` methods.
+        overwrite (bool): replace an algorithm with the same name.
+
+    Returns:
+        Result[None, Error]:
+            Ok (None): operation successful.
+            Err (kind == `ValueError`): the name is already taken.
+
+    Example:
+        >>> import xxhash
+        >>> register_hash_algorithm_ne("xxh3_128", xxhash.xxh3_128)
+    """
+    with _lock:
+        if not overwrite and _factory(name) is not None:
+            return Err(
+                Error(ErrorKind.ValueError, f"hash algorithm already exists: {name}")
+            )
+        _registry[name] = factory
+    return Ok(None)
+
+
+def unregister_hash_algorithm(name: str) -> None:
+    """Remove an algorithm added with `register_hash_algorithm_ne()`, if any.
+
+    Args:
+        name (str): name of the algorithm.
+    """
+    with _lock:
+        _registry.pop(name, None)
+
+
+def hash_algorithm_available(name: str) -> bool:
+    """Check if the algorithm is supported.
+
+    Args:
+        name (str): name of the algorithm.
+
+    Returns:
+        bool: `True` if the algorithm is supported.
+    """
+    return _factory(name) is not None
+
+
+def available_hash_algorithms() -> List[str]:
+    """Get the names of the supported algorithms.
+
+    "blake2b-<bits>" and "blake2s-<bits>" variants are not listed.
+
+    Returns:
+        List[str]: sorted names.
+    """
+    names = set(_registry)
+    names.update(n for n in hashlib.algorithms_available if _hashlib_factory(n))
+    return sorted(names)
+
+
+def new_hasher_ne(name: str) -> Result[Any, Error]:
+    """Create a hasher object for the algorithm, do not raise exceptions.
+
+    Args:
+        name (str): name of the algorithm.
+
+    Returns:
+        Result[Any, Error]:
+            Ok (Any): object with `update(data)` and `digest()` methods.
+            Err (kind == `ValueError`): unsupported hash algorithm.
+            Err (kind == `...`): the factory failed.
+    """
+    factory = _factory(name)
+    if factory is None:
+        return Err(Error(ErrorKind.ValueError, f"unsupported hash algorithm: {name}"))
+    try:
+        return Ok(factory())
+    except Exception as e:
+        return Err(Error.from_exception(e))
@@ -0,0 +1,216 @@
+"""Persistent cache of file digests keyed by file identity and metadata."""
+import os
+import sqlite3
+import threading
+import time
+from typing import Any
+from typing import Optional
+
+from result import Err
+from result import Ok
+from result import Result
+
+from .error import Error
+
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS digests (
+    dev INTEGER NOT NULL,
+    ino INTEGER NOT NULL,
+    algorithm TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    digest BLOB NOT NULL,
+    last_used INTEGER NOT NULL,
+    PRIMARY KEY (dev, ino, algorithm)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS digests_last_used ON digests (last_used);
+"""
+
+# Files modified shortly before they are hashed are not cached: on file
+# systems with coarse timestamps, a change made in the same tick as the read
+# does not change the mtime.
+_RACY_WINDOW_NS = 2_000_000_000
+
+# `last_used` is in seconds and is not rewritten more often than this,
+# so that cache hits rarely need a write transaction.
+_TOUCH_INTERVAL = 60
+
+# The number of entries is checked every that many insertions.
+_EVICTION_INTERVAL = 256
+
+
+def _int64(value: int) -> int:
+    """Map an unsigned 64-bit value (`st_ino`, `st_dev`) to the SQLite integer range."""
+    return value - (1 << 64) if value >= 1 << 63 else value
+
+
+class HashCache:
+    """A size-bounded persistent cache of file digests.
+
+    Digests are stored in an SQLite database, keyed by device, inode and
+    algorithm, and are valid while the size and mtime of the file stay
+    the same, so a hit costs one `stat` instead of reading the file.
+    The least recently used entries are evicted when there are more than
+    `max_entries` of them.
+
+    The database is in WAL mode and can be shared by several processes;
+    one object can be shared by several threads. Database errors are not
+    propagated: the lookup is a miss and the digest is not stored.
+
+    Example:
+        >>> cache = HashCache.open_ne("~/.cache/hashes.sqlite").unwrap()
+        >>> digest = get_file_hash_ne("big.iso", algorithm="sha256", cache=cache)
+    """
+
+    def __init__(self, connection: sqlite3.Connection, max_entries: int):
+        """Use `open_ne()` to create a cache.
+
+        Args:
+            connection (sqlite3.Connection): initialized database connection.
+            max_entries (int): maximum number of entries.
+        """
+        self._db = connection
+        self._lock = threading.Lock()
+        self.max_entries = max_entries
+        self._insertions = 0
+
+    @classmethod
+    def open_ne(
+        cls, path: str, *, max_entries: int = 1_000_000, timeout: float = 10.0
+    ) -> Result["HashCache", Error]:
+        """Open or create a cache database, do not raise exceptions.
+
+        Args:
+            path (str): path to the database file; `~` is expanded.
+            max_entries (int): maximum number of entries.
+            timeout (float): how long to wait for a lock held by another
+                process, in seconds.
+
+        Returns:
+            Result[HashCache, Error]:
+                Ok (HashCache): operation successful.
+                Err (kind == `PermissionError`): wrong permissions.
+                Err (kind == `...`): other error(s) occurred, e.g. the file
+                    is not a database.
+        """
+        try:
+            db = sqlite3.connect(
+                os.path.expanduser(path),
+                timeout=timeout,
+                isolation_level=None,
+                check_same_thread=False,
+            )
+            try:
+                db.execute("PRAGMA journal_mode=WAL")
+                db.execute("PRAGMA synchronous=NORMAL")
+                db.executescript(_SCHEMA)
+            except Exception:
+                db.close()
+                raise
+            return Ok(cls(db, max_entries))
+        except Exception as e:
+            return Err(Error.from_exception(e))
+
+    def close(self) -> None:
+        """Close the database."""
+        with self._lock:
+            self._db.close()
+
+    def __enter__(self) -> "HashCache":
+        """Use the cache as a context manager that closes it on exit."""
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Close the database."""
+        self.close()
+
+    def __len__(self) -> int:
+        """Number of entries."""
+        with self._lock:
+            return int(self._db.execute("SELECT COUNT(*) FROM digests").fetchone()[0])
+
+    def get(self, st: os.stat_result, algorithm: str) -> Optional[bytes]:
+        """Look up the digest of a file.
+
+        Args:
+            st (os.stat_result): result of `os.stat()` for the file.
+            algorithm (str): name of the algorithm.
+
+        Returns:
+            Optional[bytes]: digest, or `None` if it's not cached or
+            the file was modified.
+        """
+        key = (_int64(st.st_dev), _int64(st.st_ino), algorithm)
+        now = int(time.time())
+        try:
+            with self._lock:
+                row = self._db.execute(
+                    "SELECT size, mtime_ns, digest, last_used FROM digests"
+                    " WHERE dev = ? AND ino = ? AND algorithm = ?",
+                    key,
+                ).fetchone()
+                if row is None or (row[0], row[1]) != (st.st_size, st.st_mtime_ns):
+                    return None
+                if now - row[3] >= _TOUCH_INTERVAL:
+                    self._db.execute(
+                        "UPDATE digests SET last_used = ?"
+                        " WHERE dev = ? AND ino = ? AND algorithm = ?",
+                        (now,) + key,
+                    )
+                return bytes(row[2])
+        except sqlite3.Error:
+            return None
+
+    def put(self, st: os.stat_result, algorithm: str, digest: bytes) -> None:
+        """Store the digest of a file.
+
+        Files modified in the last 2 seconds are not stored.
+
+        Args:
+            st (os.stat_result): result of `os.stat()` for the file,
+                taken before it was read.
+            algorithm (str): name of the algorithm.
+            digest (bytes): digest of the file.
+        """
+        if st.st_mtime_ns >= time.time_ns() - _RACY_WINDOW_NS:
+            return
+        try:
+            with self._lock:
+                self._db.execute(
+                    "INSERT OR REPLACE INTO digests"
+                    " (dev, ino, algorithm, size, mtime_ns, digest, last_used)"
+                    " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (
+                        _int64(st.st_dev),
+                        _int64(st.st_ino),
+                        algorithm,
+                        st.st_size,
+                        st.st_mtime_ns,
+                        digest,
+                        int(time.time()),
+                    ),
+                )
+                self._insertions += 1
+                if self._insertions % _EVICTION_INTERVAL == 0:
+                    self._evict()
+        except sqlite3.Error:
+            pass
+
+    def evict(self) -> None:
+        """Remove the least recently used entries above `max_entries` now."""
+        try:
+            with self._lock:
+                self._evict()
+        except sqlite3.Error:  # pragma: no cover
+            pass  # pragma: no cover
+
+    def _evict(self) -> None:
+        count = self._db.execute("SELECT COUNT(*) FROM digests").fetchone()[0]
+        if count <= self.max_entries:
+            return
+        self._db.execute(
+            "DELETE FROM digests WHERE (dev, ino, algorithm) IN"
+            " (SELECT dev, ino, algorithm FROM digests ORDER BY last_used LIMIT ?)",
+            (count - self.max_entries,),
+        )
@@ -0,0 +1,277 @@
+"""Compiled ignore-pattern matcher with `.gitignore`-style semantics."""
+import os
+import re
+from typing import Iterable
+from typing import List
+from typing import Optional
+from typing import Pattern
+from typing import Set
+
+from result import Err
+from result import Ok
+from result import Result
+
+from .error import Error
+
+
+# Characters that make a pattern a glob rather than a literal path
+_GLOB_CHARS = re.compile(r"[*?\[\\]")
+
+
+def _to_posix(path: str) -> str:
+    """Convert the native path separators to `/`."""
+    if os.sep != "/":  # pragma: no cover
+        path = path.replace(os.sep, "/")  # pragma: no cover
+    if os.altsep and os.altsep != "/":  # pragma: no cover
+        path = path.replace(os.altsep, "/")  # pragma: no cover
+    return path
+
+
+def _translate_glob(glob: str) -> str:
+    """Translate a `.gitignore` glob into a regular expression.
+
+    `*` and `?` do not match `/`; `**` matches any number of directories
+    when it is a whole path component.
+    """
+    res = []
+    i, n = 0, len(glob)
+    while i < n:
+        c = glob[i]
+        if c == "*":
+            j = i + 1
+            if j < n and glob[j] == "*":
+                j += 1
+                at_start = i == 0 or glob[i - 1] == "/"
+                at_end = j == n or glob[j] == "/"
+                if at_start and at_end:
+                    if j == n:
+                        # trailing `/**` (or the whole pattern is `**`)
+                        res.append(".*")
+                    else:
+                        # leading or middle `**/`
+                        res.append("(?:.*/)?")
+                        j += 1
+                    i = j
+                    continue
+            res.append("[^/]*")
+            i = j
+            continue
+        if c == "?":
+            res.append("[^/]")
+        elif c == "\\" and i + 1 < n:
+            res.append(re.escape(glob[i + 1]))
+            i += 1
+        elif c == "[":
+            j = i + 1
+            if j < n and glob[j] in "!^":
+                j += 1
+            if j < n and glob[j] == "]":
+                j += 1
+            while j < n and glob[j] != "]":
+                j += 1
+            if j >= n:
+                res.append("\\[")
+            else:
+                stuff = glob[i + 1 : j].replace("\\", "\\\\")
+                if stuff[0] in "!^":
+                    stuff = "^" + stuff[1:]
+                res.append(f"(?!/)[{stuff}]")
+                i = j
+        else:
+            res.append(re.escape(c))
+        i += 1
+    return "".join(res)
+
+
+def _compile(regexes: List[str]) -> Optional[Pattern[str]]:
+    if not regexes:
+        return None
+    return re.compile("|".join(f"(?:{r})" for r in regexes), re.DOTALL)
+
+
+class _PatternGroup:
+    """A run of consecutive patterns of the same polarity.
+
+    Literal patterns are looked up in hash sets, globs are compiled into
+    a single alternation, so that the whole group costs at most a few set
+    lookups and two regex matches per path.
+    """
+
+    def __init__(self, negated: bool):
+        self.negated = negated
+        # anchored literal paths, e.g. `build/output`
+        self.paths: Set[str] = set()
+        self.dir_paths: Set[str] = set()
+        # not anchored literal names that match at any depth, e.g. `__pycache__`
+        self.names: Set[str] = set()
+        self.dir_names: Set[str] = set()
+        self.globs: List[str] = []
+        self.dir_globs: List[str] = []
+        self.regex: Optional[Pattern[str]] = None
+        self.dir_regex: Optional[Pattern[str]] = None
+
+    def compile(self) -> None:
+        self.regex = _compile(self.globs)
+        self.dir_regex = _compile(self.dir_globs)
+
+    def matches(self, rel_path: str, name: str, is_dir: bool) -> bool:
+        if rel_path in self.paths or name in self.names:
+            return True
+        if self.regex is not None and self.regex.fullmatch(rel_path):
+            return True
+        if is_dir:
+            if rel_path in self.dir_paths or name in self.dir_names:
+                return True
+            if self.dir_regex is not None and self.dir_regex.fullmatch(rel_path):
+                return True
+        return False
+
+
+class IgnoreMatcher:
+    """A precompiled set of ignore patterns.
+
+    Patterns follow the `.gitignore` syntax:
+
+    * blank lines and lines starting with `#` are skipped;
+    * `!` negates the pattern, the path that it matches is not ignored
+      even if it was matched by one of the previous patterns;
+    * a trailing `/` restricts the pattern to directories;
+    * a pattern that contains `/` (other than a trailing one) is relative
+      to the root, otherwise it matches a name at any depth;
+    * `*`, `?` and `[...]` match within a path component, `**` matches any
+      number of directories.
+
+    The last matching pattern wins. When a directory is ignored, everything
+    inside it is ignored too: the listing functions don't descend into it.
+    Paths passed to the matcher are relative paths without starting `.`.
+    """
+
+    def __init__(self, patterns: Iterable[str] = ()):
+        """Compile the patterns.
+
+        Args:
+            patterns (Iterable[str]): `.gitignore`-style patterns.
+        """
+        self._groups: List[_PatternGroup] = []
+        for pattern in patterns:
+            self._add_pattern(pattern)
+        self._compile()
+
+    @classmethod
+    def from_paths(cls, paths: Iterable[str]) -> "IgnoreMatcher":
+        """Create a matcher from literal relative paths, e.g. an `ignore_list`.
+
+        Each path matches exactly this file or directory and everything
+        inside it; special characters are not interpreted and empty strings
+        are skipped.
+
+        Args:
+            paths (Iterable[str]): relative paths without starting `.`.
+
+        Returns:
+            IgnoreMatcher: new matcher object.
+        """
+        matcher = cls()
+        group = _PatternGroup(negated=False)
+        group.paths.update(_to_posix(p).strip("/") for p in paths if p)
+        if group.paths:
+            matcher._groups.append(group)
+        return matcher
+
+    @classmethod
+    def from_gitignore_ne(
+        cls, path: str, *, encoding: str = "utf-8"
+    ) -> Result["IgnoreMatcher", Error]:
+        """Create a matcher from a `.gitignore`-like file, do not raise exceptions.
+
+        Args:
+            path (str): path to the file.
+            encoding (str): text file encoding ("utf-8" default).
+
+        Returns:
+            Result[IgnoreMatcher, Error]:
+                Ok (IgnoreMatcher): new matcher object.
+                Err (kind == `FileNotFoundError`): file does not exist.
+                Err (kind == `PermissionError`): wrong permissions.
+                Err (kind == `...`): other error(s) occurred.
+        """
+        try:
+            with open(path, "r", encoding=encoding) as f:
+                return Ok(cls(f.read().splitlines()))
+        except Exception as e:
+            return Err(Error.from_exception(e))
+
+    def _add_pattern(self, pattern: str) -> None:
+        pattern = pattern.rstrip(" \r\n")
+        if not pattern or pattern.startswith("#"):
+            return
+        negated = pattern.startswith("!")
+        if negated:
+            pattern = pattern[1:]
+        elif pattern.startswith(("\\!", "\\#")):
+            pattern = pattern[1:]
+        pattern = _to_posix(pattern)
+        dir_only = pattern.endswith("/")
+        pattern = pattern.rstrip("/")
+        anchored = "/" in pattern
+        pattern = pattern.lstrip("/")
+        if not pattern:
+            return
+
+        if not self._groups or self._groups[-1].negated != negated:
+            self._groups.append(_PatternGroup(negated))
+        group = self._groups[-1]
+        if not _GLOB_CHARS.search(pattern):
+            if anchored:
+                (group.dir_paths if dir_only else group.paths).add(pattern)
+            else:
+                (group.dir_names if dir_only else group.names).add(pattern)
+            return
+        regex = _translate_glob(pattern)
+        if not anchored:
+            regex = "(?:.*/)?" + regex
+        (group.dir_globs if dir_only else group.globs).append(regex)
+
+    def _compile(self) -> None:
+        for group in self._groups:
+            group.compile()
+
+    def match(self, rel_path: str, *, is_dir: bool = False) -> bool:
+        """Check the path against the patterns, ignoring its parent directories.
+
+        This is what the directory walk uses: parents of a path are checked
+        (and pruned) before the walk descends into them.
+
+        Args:
+            rel_path (str): relative path without starting `.`.
+            is_dir (bool): the path is a directory.
+
+        Returns:
+            bool: `True` if the path is ignored, `False` otherwise.
+        """
+        if not self._groups:
+            return False
+        rel_path = _to_posix(rel_path)
+        name = rel_path.rpartition("/")[2]
+        for group in reversed(self._groups):
+            if group.matches(rel_path, name, is_dir):
+                return not group.negated
+        return False
+
+    def is_ignored(self, rel_path: str, *, is_dir: bool = False) -> bool:
+        """Check if the path or any of its parent directories is ignored.
+
+        Args:
+            rel_path (str): relative path without starting `.`.
+            is_dir (bool): the path is a directory.
+
+        Returns:
+            bool: `True` if the path is ignored, `False` otherwise.
+        """
+        if not self._groups:
+            return False
+        parts = _to_posix(rel_path).strip("/").split("/")
+        for i in range(1, len(parts)):
+            if self.match("/".join(parts[:i]), is_dir=True):
+                return True
+        return self.match("/".join(parts), is_dir=is_dir)
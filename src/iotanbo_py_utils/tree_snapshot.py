@@ -0,0 +1,489 @@
+"""Persistent snapshots of directory trees, incremental rescan and tree diff."""
+import os
+import struct
+import time
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict
+from typing import List
+from typing import NamedTuple
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from result import Err
+from result import Ok
+from result import Result
+
+from .compact_list import ITEM_TYPES
+from .compact_list import ITEM_TYPE_CODES
+from .error import Error
+from .error import ErrorKind
+from .file_utils import _dir_validation
+from .file_utils import _mode_type
+from .file_utils import _scan_dir
+from .file_utils import _workers_validation
+from .file_utils import get_file_hash_ne
+from .file_utils import write_binary_file_ne
+
+
+class SnapshotEntry(NamedTuple):
+    """Metadata of a file system item recorded in a snapshot.
+
+    `type` is one of ('file', 'dir', 'symlink', 'other'); symlinks
+    are not followed, so `size` and `mtime_ns` of a symlink are
+    the ones of the link itself.
+    """
+
+    type: str
+    size: int
+    mtime_ns: int
+    inode: int
+
+
+_MAGIC = b"IPUTSNAP"
+_VERSION = 1
+# magic, format version; the rest of the file is zlib-compressed
+_FILE_HEADER = struct.Struct("<8sH")
+# scan time, number of entries, length of the root path
+_PAYLOAD_HEADER = struct.Struct("<qQI")
+# type, size, mtime_ns, inode, length of the prefix shared with
+# the previous path, length of the rest of the path
+_RECORD = struct.Struct("<BQqQHH")
+
+# Directories modified shortly before the snapshot was taken are always
+# rescanned: on file systems with coarse timestamps, a change made in the
+# same tick as the scan does not change the directory's mtime.
+_RACY_WINDOW_NS = 2_000_000_000
+
+
+def _entry_from_stat(st: os.stat_result) -> SnapshotEntry:
+    return SnapshotEntry(_mode_type(st.st_mode), st.st_size, st.st_mtime_ns, st.st_ino)
+
+
+def _read_dir(
+    root: str,
+    rel_dir: str,
+    entries: Dict[str, SnapshotEntry],
+    stack: List[Tuple[str, SnapshotEntry]],
+) -> Result[None, Error]:
+    """Record the items of a directory, queue its sub-directories.
+
+    Nothing is recorded if the directory cannot be read to the end.
+    """
+    items: Dict[str, SnapshotEntry] = {}
+    # the sub-directories are queued from their entries, not collected
+    for item in _scan_dir(rel_dir, os.path.join(root, rel_dir), None, False, []):
+        if item.is_err():
+            return Err(item.unwrap_err())
+        rel_path, dir_item = item.unwrap()
+        try:
+            items[rel_path] = _entry_from_stat(dir_item.stat(follow_symlinks=False))
+        except OSError:  # pragma: no cover
+            # the item was removed while the directory was scanned
+            continue  # pragma: no cover
+    entries.update(items)
+    stack.extend((p, entry) for p, entry in items.items() if entry.type == "dir")
+    return Ok(None)
+
+
+class TreeSnapshot:
+    """A point-in-time record of a directory tree.
+
+    For each item of the tree, the relative path (without starting `.`)
+    and its `SnapshotEntry` are stored in the `entries` dictionary.
+    A snapshot can be saved to a compact binary file and loaded later.
+
+    `rescan_ne()` creates a new snapshot of the same tree, reusing the
+    recorded contents of the directories whose own mtime has not changed;
+    for a mostly-static tree this costs one `stat` per directory instead of
+    a full walk. Note that the mtime of a directory changes when items are
+    added, removed or renamed in it, but not when a file inside it is
+    modified in place: the entries of such files keep their recorded
+    size and mtime until their directory changes, use `create_ne()`
+    for a full rescan.
+    """
+
+    def __init__(
+        self,
+        root: str,
+        root_entry: SnapshotEntry,
+        entries: Dict[str, SnapshotEntry],
+        scan_time_ns: int,
+        *,
+        scanned_dir_count: int = 0,
+    ):
+        """Create a new TreeSnapshot object, see `create_ne()` and `load_ne()`.
+
+        Args:
+            root (str): path to the root directory of the tree.
+            root_entry (SnapshotEntry): metadata of the root directory.
+            entries (Dict[str, SnapshotEntry]): relative paths and metadata of the items.
+            scan_time_ns (int): time the scan started, in nanoseconds since the epoch.
+            scanned_dir_count (int): number of directories that were read while
+                creating the snapshot.
+        """
+        self.root = root
+        self.root_entry = root_entry
+        self.entries = entries
+        self.scan_time_ns = scan_time_ns
+        self.scanned_dir_count = scanned_dir_count
+
+    def __len__(self) -> int:
+        """Number of items in the tree, the root directory is not counted."""
+        return len(self.entries)
+
+    @classmethod
+    def create_ne(cls, root: str) -> Result["TreeSnapshot", Error]:
+        """Take a snapshot of a directory tree, do not raise exceptions.
+
+        Sub-directories that can't be read are recorded, but their
+        contents are skipped.
+
+        Args:
+            root (str): path to a directory.
+
+        Returns:
+            Result[TreeSnapshot, Error]:
+                Ok (TreeSnapshot): operation successful.
+                Err (kind == `FileNotFoundError`): path does not exist.
+                Err (kind == `TypeError`): path is not a directory.
+                Err (kind == `PermissionError`): wrong permissions.
+                Err (kind == `...`): other error(s) occurred.
+        """
+        return cls._scan_ne(root, previous=None)
+
+    def rescan_ne(self) -> Result["TreeSnapshot", Error]:
+        """Take a new snapshot of the same tree incrementally, do not raise exceptions.
+
+        Only the directories whose mtime or inode differ from the recorded
+        ones are read again; this snapshot is not modified.
+
+        Returns:
+            Result[TreeSnapshot, Error]:
+                Ok (TreeSnapshot): operation successful.
+                Err (kind == `FileNotFoundError`): root directory does not exist.
+                Err (kind == `TypeError`): root is not a directory.
+                Err (kind == `PermissionError`): wrong permissions.
+                Err (kind == `...`): other error(s) occurred.
+        """
+        return self._scan_ne(self.root, previous=self)
+
+    def _unchanged(self, old: Optional[SnapshotEntry], new: SnapshotEntry) -> bool:
+        return (
+            old is not None
+            and old.type == "dir"
+            and old.mtime_ns == new.mtime_ns
+            and old.inode == new.inode
+            and old.mtime_ns < self.scan_time_ns - _RACY_WINDOW_NS
+        )
+
+    def _children(self) -> Dict[str, List[str]]:
+        """Group the recorded relative paths by their parent directory."""
+        children: Dict[str, List[str]] = {}
+        for rel_path in self.entries:
+            children.setdefault(os.path.dirname(rel_path), []).append(rel_path)
+        return children
+
+    def _reuse_dir(
+        self,
+        children: List[str],
+        entries: Dict[str, SnapshotEntry],
+        stack: List[Tuple[str, SnapshotEntry]],
+    ) -> None:
+        """Copy the recorded children of an unchanged directory, refresh sub-directories."""
+        for rel_path in children:
+            entry = self.entries[rel_path]
+            if entry.type == "dir":
+                try:
+                    entry = _entry_from_stat(
+                        os.lstat(os.path.join(self.root, rel_path))
+                    )
+                except OSError:  # pragma: no cover
+                    continue  # pragma: no cover
+                stack.append((rel_path, entry))
+            entries[rel_path] = entry
+
+    @classmethod
+    def _scan_ne(
+        cls, root: str, *, previous: Optional["TreeSnapshot"]
+    ) -> Result["TreeSnapshot", Error]:
+        validation = _dir_validation(root)
+        if validation.is_err():
+            return Err(validation.unwrap_err())
+        scan_time_ns = time.time_ns()
+        try:
+            root_entry = _entry_from_stat(os.lstat(root))
+        except Exception as e:  # pragma: no cover
+            return Err(Error.from_exception(e))  # pragma: no cover
+
+        entries: Dict[str, SnapshotEntry] = {}
+        scanned_dir_count = 0
+        previous_children = previous._children() if previous is not None else {}
+        # (relative path, entry) of the directories that are yet to be processed
+        stack: List[Tuple[str, SnapshotEntry]] = [("", root_entry)]
+        while stack:
+            rel_dir, dir_entry = stack.pop()
+            if previous is not None:
+                old = previous.entries.get(rel_dir) if rel_dir else previous.root_entry
+                if previous._unchanged(old, dir_entry):
+                    # same set of names as before, only sub-directories need a stat
+                    previous._reuse_dir(
+                        previous_children.get(rel_dir, []), entries, stack
+                    )
+                    continue
+            result = _read_dir(root, rel_dir, entries, stack)
+            if result.is_err():
+                if not rel_dir:
+                    return Err(result.unwrap_err())  # pragma: no cover
+                # unreadable sub-directories are skipped, like the listing functions do
+                continue  # pragma: no cover
+            scanned_dir_count += 1
+        return Ok(
+            cls(
+                root,
+                root_entry,
+                entries,
+                scan_time_ns,
+                scanned_dir_count=scanned_dir_count,
+            )
+        )
+
+    def save_ne(self, path: str) -> Result[None, Error]:
+        """Save the snapshot to a file, do not raise exceptions.
+
+        Records are sorted by path, each path is stored as the length of the
+        prefix it shares with the previous one plus the rest of it, and the
+        whole payload is zlib-compressed. The file is replaced atomically and
+        durably, see `file_utils.write_file_ne()`.
+
+        Args:
+            path (str): path to the output file, overwritten if it exists.
+
+        Returns:
+            Result[None, Error]:
+                Ok (None): operation successful.
+                Err (kind == `TypeError`): path is not a file.
+                Err (kind == `PermissionError`): wrong permissions.
+                Err (kind == `...`): other error(s) occurred.
+        """
+        try:
+            root = os.fsencode(self.root)
+            chunks = [
+                _PAYLOAD_HEADER.pack(self.scan_time_ns, len(self.entries), len(root)),
+                root,
+            ]
+            records = [(b"", self.root_entry)] + sorted(
+                (os.fsencode(p), e) for p, e in self.entries.items()
+            )
+            prev = b""
+            for rel_path, entry in records:
+                shared = 0
+                limit = min(len(prev), len(rel_path), 0xFFFF)
+                while shared < limit and prev[shared] == rel_path[shared]:
+                    shared += 1
+                suffix = rel_path[shared:]
+                chunks.append(
+                    _RECORD.pack(
+                        ITEM_TYPE_CODES[entry.type],
+                        entry.size,
+                        entry.mtime_ns,
+                        entry.inode,
+                        shared,
+                        len(suffix),
+                    )
+                )
+                chunks.append(suffix)
+                prev = rel_path
+            data = _FILE_HEADER.pack(_MAGIC, _VERSION) + zlib.compress(b"".join(chunks))
+        except Exception as e:  # pragma: no cover
+            return Err(Error.from_exception(e))  # pragma: no cover
+        return write_binary_file_ne(path, data, overwrite=True, atomic=True)
+
+    @classmethod
+    def load_ne(cls, path: str) -> Result["TreeSnapshot", Error]:
+        """Load a snapshot saved with `save_ne()`, do not raise exceptions.
+
+        Args:
+            path (str): path to the snapshot file.
+
+        Returns:
+            Result[TreeSnapshot, Error]:
+                Ok (TreeSnapshot): operation successful.
+                Err (kind == `FileNotFoundError`): file does not exist.
+                Err (kind == `ValueError`): file is not a snapshot or is damaged.
+                Err (kind == `PermissionError`): wrong permissions.
+                Err (kind == `...`): other error(s) occurred.
+        """
+        try:
+            with open(path, "rb") as f:
+                data = f.read()
+        except Exception as e:
+            return Err(Error.from_exception(e))
+        try:
+            magic, version = _FILE_HEADER.unpack_from(data)
+            if magic != _MAGIC or version != _VERSION:
+                return Err(
+                    Error(ErrorKind.ValueError, f"not a tree snapshot: '{path}'")
+                )
+            payload = zlib.decompress(data[_FILE_HEADER.size :])
+            scan_time_ns, count, root_len = _PAYLOAD_HEADER.unpack_from(payload)
+            offset = _PAYLOAD_HEADER.size
+            root = os.fsdecode(payload[offset : offset + root_len])
+            offset += root_len
+
+            entries: Dict[str, SnapshotEntry] = {}
+            root_entry = None
+            prev = b""
+            for _ in range(count + 1):
+                code, size, mtime_ns, inode, shared, suffix_len = _RECORD.unpack_from(
+                    payload, offset
+                )
+                offset += _RECORD.size
+                rel_path = prev[:shared] + payload[offset : offset + suffix_len]
+                offset += suffix_len
+                entry = SnapshotEntry(ITEM_TYPES[code], size, mtime_ns, inode)
+                if root_entry is None:
+                    root_entry = entry
+                else:
+                    entries[os.fsdecode(rel_path)] = entry
+                prev = rel_path
+        except Exception as e:
+            return Err(Error.from_exception(e, new_kind=ErrorKind.ValueError))
+        if root_entry is None or offset != len(payload):
+            return Err(Error(ErrorKind.ValueError, f"damaged tree snapshot: '{path}'"))
+        return Ok(cls(root, root_entry, entries, scan_time_ns))
+
+
+class TreeDiff(NamedTuple):
+    """Difference between two directory trees, lists of sorted relative paths."""
+
+    added: List[str]
+    removed: List[str]
+    type_changed: List[str]
+    modified: List[str]
+
+
+def _snapshot_ne(tree: Union[str, TreeSnapshot]) -> Result[TreeSnapshot, Error]:
+    if isinstance(tree, TreeSnapshot):
+        return Ok(tree)
+    return TreeSnapshot.create_ne(tree)
+
+
+def _contents_differ(path_a: str, path_b: str, item_type: str, algorithm: str) -> bool:
+    """Compare contents of two files or symlink targets; errors count as a difference.
+
+    Other items (FIFOs, sockets, devices) must not be passed: opening them
+    may block forever.
+    """
+    if item_type == "symlink":
+        try:
+            return os.readlink(path_a) != os.readlink(path_b)
+        except OSError:  # pragma: no cover
+            return True  # pragma: no cover
+    hash_a = get_file_hash_ne(path_a, algorithm=algorithm)
+    hash_b = get_file_hash_ne(path_b, algorithm=algorithm)
+    if hash_a.is_err() or hash_b.is_err():
+        return True
+    return hash_a.unwrap() != hash_b.unwrap()
+
+
+def diff_trees_ne(
+    a: Union[str, TreeSnapshot],
+    b: Union[str, TreeSnapshot],
+    *,
+    compare_content: bool = True,
+    algorithm: str = "sha256",
+    max_workers: int = 4,
+) -> Result[TreeDiff, Error]:
+    """Find the items that were added, removed or modified in `b` compared to `a`.
+
+    Each side is either a path to a live directory or a `TreeSnapshot`.
+    Files and symlinks are compared in tiers: a different size means
+    the item is modified, equal size and mtime mean it is not. If only the
+    mtime differs (e.g. the tree was copied without preserving timestamps),
+    the contents are hashed to decide, in parallel. Contents can be compared
+    only if the trees have different roots; when a snapshot is compared with
+    the current state of the same tree, a changed mtime or inode is enough
+    to report the file as modified. Other items (FIFOs, sockets, devices) are
+    compared by metadata only. Directories are never reported as modified.
+
+    Args:
+        a (Union[str, TreeSnapshot]): the old tree.
+        b (Union[str, TreeSnapshot]): the new tree.
+        compare_content (bool): hash the files with the same size and different
+            mtime; if `False`, they are reported as modified.
+        algorithm (str): hash algorithm, see `get_file_hash_ne()`.
+        max_workers (int): number of threads that hash the files.
+
+    Returns:
+        Result[TreeDiff, Error]:
+            Ok (TreeDiff): operation successful.
+            Err (kind == `FileNotFoundError`): a live directory does not exist.
+            Err (kind == `TypeError`): a live path is not a directory.
+            Err (kind == `ValueError`): `max_workers` is less than 1.
+            Err (kind == `PermissionError`): wrong permissions.
+            Err (kind == `...`): other error(s) occurred.
+
+    Example:
+        >>> result = diff_trees_ne("staging", "live")
+        >>> if result.is_ok():
+        >>>     for path in result.unwrap().modified:
+        >>>         ...  # redeploy
+    """
+    validation = _workers_validation(max_workers)
+    if validation.is_err():
+        return Err(validation.unwrap_err())
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # both live trees are walked at the same time
+        a_future = executor.submit(_snapshot_ne, a)
+        b_result = _snapshot_ne(b)
+        a_result = a_future.result()
+        if a_result.is_err():
+            return Err(a_result.unwrap_err())
+        if b_result.is_err():
+            return Err(b_result.unwrap_err())
+        snap_a = a_result.unwrap()
+        snap_b = b_result.unwrap()
+        same_tree = os.path.abspath(snap_a.root) == os.path.abspath(snap_b.root)
+
+        added = [p for p in snap_b.entries if p not in snap_a.entries]
+        removed = []
+        type_changed = []
+        modified = []
+        ambiguous = []
+        for rel_path, old in snap_a.entries.items():
+            new = snap_b.entries.get(rel_path)
+            if new is None:
+                removed.append(rel_path)
+            elif new.type != old.type:
+                type_changed.append(rel_path)
+            elif old.type == "dir":
+                continue
+            elif old.size != new.size:
+                modified.append(rel_path)
+            elif same_tree:
+                if old.mtime_ns != new.mtime_ns or old.inode != new.inode:
+                    modified.append(rel_path)
+            elif old.mtime_ns != new.mtime_ns:
+                if compare_content and old.type in ("file", "symlink"):
+                    ambiguous.append(rel_path)
+                else:
+                    modified.append(rel_path)
+
+        futures = {
+            executor.submit(
+                _contents_differ,
+                os.path.join(snap_a.root, rel_path),
+                os.path.join(snap_b.root, rel_path),
+                snap_a.entries[rel_path].type,
+                algorithm,
+            ): rel_path
+            for rel_path in ambiguous
+        }
+        for future, rel_path in futures.items():
+            if future.result():
+                modified.append(rel_path)
+    return Ok(
+        TreeDiff(sorted(added), sorted(removed), sorted(type_changed), sorted(modified))
+    )
@@ -0,0 +1,221 @@
+"""Atomic and durable writes of many files with grouped fsync calls."""
+import os
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any
+from typing import Dict
+from typing import Optional
+from typing import Tuple
+from typing import Union
+
+from result import Err
+from result import Ok
+from result import Result
+
+from .error import Error
+from .file_utils import _atomic_write_target_ne
+from .file_utils import _file_exists_error
+from .file_utils import _fsync_data
+from .file_utils import _fsync_dir
+from .file_utils import _remove_temp_file
+from .file_utils import _rename_temp_file
+from .file_utils import _workers_validation
+from .file_utils import _write_temp_file
+
+
+def _fsync_file(path: str) -> None:
+    # the file may already have the read-only mode of the file it replaces;
+    # `fsync()` does not need write access, `FlushFileBuffers()` on Windows does
+    flags = os.O_RDWR if sys.platform == "win32" else os.O_RDONLY
+    fd = os.open(path, flags | getattr(os, "O_BINARY", 0))
+    try:
+        _fsync_data(fd)
+    finally:
+        os.close(fd)
+
+
+class WriteBatch:
+    """Atomic writes of many files that are made durable together.
+
+    Each file is written to a temporary file in the target directory right
+    away, and the old contents stay in place. `commit_ne()` fsyncs the
+    data of all the temporary files concurrently, so that the file system
+    can flush them in fewer journal commits, renames them to their paths
+    and fsyncs each directory once. After a crash every file has either
+    the old or the new contents. The batch as a whole is not atomic: some
+    files may be renamed before a crash and others not.
+
+    Writes that are not committed are discarded when the batch is closed.
+
+    Example:
+        >>> with WriteBatch() as batch:
+        >>>     for name, state in states.items():
+        >>>         batch.write_file_ne(f"state/{name}.json", state, overwrite=True)
+        >>>     result = batch.commit_ne()
+    """
+
+    def __init__(self, *, max_workers: int = 16):
+        """Create an empty batch.
+
+        Args:
+            max_workers (int): number of threads that issue fsync calls.
+        """
+        self.max_workers = max_workers
+        # path -> (temporary file, overwrite)
+        self._staged: Dict[str, Tuple[str, bool]] = {}
+
+    def _stage_ne(
+        self,
+        path: str,
+        contents: Union[str, bytes],
+        overwrite: bool,
+        encoding: str = "utf-8",
+        newline: str = "\n",
+    ) -> Result[None, Error]:
+        result = _atomic_write_target_ne(path, overwrite)
+        if result.is_err():
+            return Err(result.unwrap_err())
+        # the target of a dangling symlink is written, see `file_utils`
+        target, mode = result.unwrap()
+        try:
+            tmp = _write_temp_file(
+                target,
+                contents,
+                mode,
+                encoding=encoding,
+                newline=newline,
+                sync=False,
+            )
+        except Exception as e:
+            return Err(Error.from_exception(e))
+        previous = self._staged.pop(target, None)
+        if previous is not None:
+            # the last write wins
+            _remove_temp_file(previous[0])
+        self._staged[target] = (tmp, overwrite)
+        return Ok(None)
+
+    def write_file_ne(
+        self,
+        path: str,
+        contents: str = "",
+        encoding: str = "utf-8",
+        *,
+        overwrite: bool = False,
+        newline: str = "\n",
+    ) -> Result[None, Error]:
+        """Write a text file in the batch, see `file_utils.write_file_ne`.
+
+        Args:
+            path (str): path to file.
+            contents (str): string to be written into file.
+            encoding (str): text file encoding ("utf-8" default).
+            overwrite (bool): rewrite file if it already exists.
+            newline (str): new line separator.
+
+        Returns:
+            Result[None, Error]:
+                Ok (None): the file will be written on commit.
+                Err (kind == `FileExistsError`): file already exists and
+                `overwrite` is `False`.
+                Err (kind == `TypeError`): path is not a file.
+                Err (kind == `PermissionError`): wrong permissions.
+                Err (kind == `...`): other error(s) occurred.
+        """
+        return self._stage_ne(path, contents, overwrite, encoding, newline)
+
+    def write_binary_file_ne(
+        self, path: str, contents: bytes, *, overwrite: bool = False
+    ) -> Result[None, Error]:
+        """Write a binary file in the batch, see `file_utils.write_binary_file_ne`.
+
+        Args:
+            path (str): path to file.
+            contents (bytes): file contents.
+            overwrite (bool): rewrite file if it already exists.
+
+        Returns:
+            Result[None, Error]:
+                Ok (None): the file will be written on commit.
+                Err (kind == `...`): see `write_file_ne()`.
+        """
+        return self._stage_ne(path, contents, overwrite)
+
+    def commit_ne(self) -> Result[None, Error]:
+        """Make the written files durable and visible at their paths.
+
+        If a file cannot be synced, no file is renamed and the batch is
+        discarded. If a file cannot be renamed, e.g. another process has
+        created it and `overwrite` is `False`, the other files are still
+        renamed.
+
+        Returns:
+            Result[None, Error]:
+                Ok (None): all files are written.
+                Err (kind == `ValueError`): `max_workers` is less than 1.
+                Err (kind == `FileExistsError`): a file was created after
+                it had been written to the batch without `overwrite`.
+                Err (kind == `...`): other error(s) occurred; the message
+                starts with the path of the first failed file.
+        """
+        validation = _workers_validation(self.max_workers)
+        if validation.is_err():
+            return Err(validation.unwrap_err())
+        staged = list(self._staged.items())
+        if not staged:
+            return Ok(None)
+        try:
+            max_workers = min(self.max_workers, len(staged))
+            with ThreadPoolExecutor(max_workers=max_workers) as executor:
+                list(executor.map(_fsync_file, (tmp for _, (tmp, _) in staged)))
+        except Exception as e:
+            self.discard()
+            return Err(Error.from_exception(e))
+
+        first_error: Optional[Error] = None
+        dirs = set()
+        for path, (tmp, overwrite) in staged:
+            del self._staged[path]
+            try:
+                _rename_temp_file(tmp, path, overwrite)
+            except Exception as e:
+                if first_error is None:
+                    err = (
+                        _file_exists_error(path)
+                        if isinstance(e, FileExistsError)
+                        else Error.from_exception(e)
+                    )
+                    first_error = Error(err.kind, f"{path}: {err.msg}", cause=err.cause)
+                continue
+            dirs.add(os.path.dirname(path))
+        try:
+            for d in dirs:
+                _fsync_dir(d)
+        except Exception as e:  # pragma: no cover
+            if first_error is None:  # pragma: no cover
+                first_error = Error.from_exception(e)  # pragma: no cover
+        if first_error is not None:
+            return Err(first_error)
+        return Ok(None)
+
+    def discard(self) -> None:
+        """Remove the files that are written but not committed."""
+        for tmp, _ in self._staged.values():
+            _remove_temp_file(tmp)
+        self._staged.clear()
+
+    def close(self) -> None:
+        """Discard the writes that are not committed."""
+        self.discard()
+
+    def __enter__(self) -> "WriteBatch":
+        """Use the batch as a context manager that closes it on exit."""
+        return self
+
+    def __exit__(self, *args: Any) -> None:
+        """Discard the writes that are not committed."""
+        self.close()
+
+    def __len__(self) -> int:
+        """Number of files that are written but not committed."""
+        return len(self._staged)
@@ -0,0 +1,134 @@
+"""Test `aio.py`."""
+import asyncio
+import hashlib
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Iterator
+
+import pytest
+
+from iotanbo_py_utils import aio
+from iotanbo_py_utils import file_utils
+from iotanbo_py_utils.error import ErrorKind
+
+
+@pytest.fixture(autouse=True)
+def default_executor() -> Iterator[None]:
+    yield
+    aio.shutdown_executor()
+
+
+def test_file_operations(tmp_path: Path) -> None:
+    text_file = str(tmp_path / "a.txt")
+    bin_file = str(tmp_path / "b.bin")
+
+    async def main() -> None:
+        assert (await aio.write_file_ne(text_file, "text")).is_ok()
+        res = await aio.write_file_ne(text_file, "text")
+        assert res.unwrap_err().kind == ErrorKind.FileExistsError
+        assert (await aio.read_file_ne(text_file)).unwrap() == "text"
+        assert (await aio.write_binary_file_ne(bin_file, b"data")).is_ok()
+        assert (await aio.read_binary_file_ne(bin_file)).unwrap() == b"data"
+        res = await aio.write_file_ne(text_file, "new", overwrite=True, atomic=True)
+        assert res.is_ok()
+        assert (await aio.read_file_ne(text_file)).unwrap() == "new"
+
+        (tmp_path / "sub").mkdir()
+        copy = str(tmp_path / "sub" / "c.bin")
+        assert (await aio.copy_file_ne(bin_file, copy)).is_ok()
+        moved = str(tmp_path / "d.bin")
+        assert (await aio.move_file_ne(copy, moved)).is_ok()
+        tree_copy = str(tmp_path.parent / (tmp_path.name + "_copy"))
+        assert (await aio.copy_tree_ne(str(tmp_path), tree_copy)).is_ok()
+
+        text = await aio.read_file_ne(str(tmp_path / "nonexistent"))
+        assert text.unwrap_err().kind == ErrorKind.FileNotFoundError
+
+        files = await aio.get_file_list_ne(str(tmp_path))
+        assert files.unwrap() == ["a.txt", "b.bin", "d.bin"]
+        assert (await aio.get_subdir_list_ne(str(tmp_path))).unwrap() == ["sub"]
+        files = await aio.get_file_list_recursively_ne(tree_copy, max_workers=2)
+        assert files.unwrap() == ["a.txt", "b.bin", "d.bin"]
+        subdirs = await aio.get_subdir_list_recursively_ne(tree_copy)
+        assert subdirs.unwrap() == ["sub"]
+
+    asyncio.run(main())
+
+
+def test_hashing(tmp_path: Path) -> None:
+    paths = []
+    for i in range(10):
+        path = tmp_path / f"{i}.bin"
+        path.write_bytes(bytes([i]) * 1000 * i)
+        paths.append(str(path))
+    nonexistent = str(tmp_path / "nonexistent")
+
+    async def main() -> None:
+        res = await aio.get_file_hash_ne(paths[1], algorithm="sha256")
+        assert res.unwrap() == hashlib.sha256(b"\x01" * 1000).digest()
+        crc32 = await aio.get_file_crc32_ne(paths[1])
+        assert crc32.unwrap() == file_utils.get_file_crc32_ne(paths[1]).unwrap()
+        digests = await aio.get_file_digests_ne(
+            paths[2], algorithms=iter(["md5", "sha1"])
+        )
+        assert sorted(digests.unwrap()) == ["md5", "sha1"]
+
+        results = await aio.hash_files_ne(
+            paths + [nonexistent, paths[0]], algorithm="sha1"
+        )
+        assert sorted(results) == sorted(paths + [nonexistent])
+        for p in paths:
+            assert results[p] == file_utils.get_file_hash_ne(p, algorithm="sha1")
+        assert results[nonexistent].unwrap_err().kind == ErrorKind.FileNotFoundError
+
+    asyncio.run(main())
+
+
+def test_executor(tmp_path: Path) -> None:
+    path = str(tmp_path / "a.txt")
+    file_utils.write_file_ne(path, "text").unwrap()
+    assert aio.configure_executor(0).unwrap_err().kind == ErrorKind.ValueError
+
+    # the operations run concurrently up to the executor size
+    assert aio.configure_executor(2).is_ok()
+    running = 0
+    max_running = 0
+    lock = threading.Lock()
+    release = threading.Event()
+
+    def read(p: str) -> None:
+        nonlocal running, max_running
+        with lock:
+            running += 1
+            max_running = max(max_running, running)
+        release.wait(5)
+        with lock:
+            running -= 1
+
+    async def main() -> None:
+        tasks = [asyncio.ensure_future(aio._run(read, path)) for _ in range(6)]
+        # the loop is not blocked while the operations wait
+        await asyncio.sleep(0.1)
+        assert max_running == 2
+        release.set()
+        await asyncio.gather(*tasks)
+
+    asyncio.run(main())
+    assert max_running == 2
+
+    # a user-provided executor is not shut down when it is replaced
+    with ThreadPoolExecutor(max_workers=1) as executor:
+        aio.set_executor(executor)
+        res = asyncio.run(aio.read_file_ne(path))
+        assert res.unwrap() == "text"
+        aio.set_executor(None)
+        assert executor.submit(lambda: 1).result() == 1
+
+    # a shut down executor results in an error instead of an exception
+    executor = ThreadPoolExecutor(max_workers=1)
+    executor.shutdown()
+    aio.set_executor(executor)
+    res = asyncio.run(aio.read_file_ne(path))
+    assert res.unwrap_err().kind == ErrorKind.RuntimeError
+    aio.set_executor(None)
@@ -0,0 +1,137 @@
+"""Test `chunking.py`."""
+import errno
+import hashlib
+import random
+from pathlib import Path
+from typing import Any
+
+import pytest
+
+from iotanbo_py_utils import chunking
+from iotanbo_py_utils.chunking import ChunkManifest
+from iotanbo_py_utils.chunking import diff_chunk_manifests_ne
+from iotanbo_py_utils.chunking import get_file_chunks_ne
+from iotanbo_py_utils.error import ErrorKind
+
+
+def _random_bytes(seed: int, n: int) -> bytes:
+    return random.Random(seed).getrandbits(8 * n).to_bytes(n, "big")
+
+
+def _write(path: Path, data: bytes) -> str:
+    path.write_bytes(data)
+    return str(path)
+
+
+def _chunks(path: str) -> ChunkManifest:
+    return get_file_chunks_ne(
+        path, min_size=256, avg_size=1024, max_size=4096, read_buf_size=1000
+    ).unwrap()
+
+
+def test_get_file_chunks_ne(tmp_path: Path) -> None:
+    data = _random_bytes(1, 100_000)
+    path = _write(tmp_path / "data.bin", data)
+    manifest = _chunks(path)
+    assert manifest.size == len(data)
+    assert manifest.algorithm == "sha256"
+    offset = 0
+    for c in manifest.chunks:
+        assert c.offset == offset
+        assert c.digest == hashlib.sha256(data[offset : offset + c.length]).digest()
+        offset += c.length
+    assert offset == len(data)
+    lengths = [c.length for c in manifest.chunks]
+    assert min(lengths[:-1]) >= 256
+    assert max(lengths) <= 4096
+    # the average size is about the requested one
+    assert 500 < len(data) / len(lengths) < 2000
+    # the chunking is deterministic
+    assert _chunks(path) == manifest
+    # and does not depend on the read buffer size
+    assert (
+        get_file_chunks_ne(
+            path, min_size=256, avg_size=1024, max_size=4096, read_buf_size=100_000
+        ).unwrap()
+        == manifest
+    )
+
+    # small and empty files
+    assert len(_chunks(_write(tmp_path / "small.bin", b"abc")).chunks) == 1
+    empty = _chunks(_write(tmp_path / "empty.bin", b""))
+    assert (empty.size, empty.chunks) == (0, [])
+
+    # without content-defined cut points, chunks have the maximum size
+    zeros = _chunks(_write(tmp_path / "zeros.bin", bytes(10_000)))
+    assert [c.length for c in zeros.chunks] == [4096, 4096, 1808]
+
+
+def test_rolled_bytes(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Reads that end before a cut point do not roll the same bytes again."""
+    rolled = 0
+
+    class _Gear(tuple):  # type: ignore[type-arg]
+        def __getitem__(self, i: Any) -> Any:
+            nonlocal rolled
+            rolled += 1
+            return super().__getitem__(i)
+
+    monkeypatch.setattr(chunking, "_GEAR", _Gear(chunking._GEAR))
+    data = _random_bytes(3, 50_000)
+    path = _write(tmp_path / "data.bin", data)
+    get_file_chunks_ne(
+        path, min_size=256, avg_size=8192, max_size=65536, read_buf_size=100
+    ).unwrap()
+    assert 0 < rolled <= len(data)
+
+
+def test_diff_chunk_manifests_ne(tmp_path: Path) -> None:
+    data = _random_bytes(2, 200_000)
+    old = _chunks(_write(tmp_path / "old.bin", data))
+    assert diff_chunk_manifests_ne(old, old).unwrap() == []
+
+    # an insertion changes only the chunks around it
+    new_data = data[:50_000] + b"inserted" * 100 + data[50_000:]
+    new = _chunks(_write(tmp_path / "new.bin", new_data))
+    ranges = diff_chunk_manifests_ne(old, new).unwrap()
+    assert len(ranges) == 1
+    offset, length = ranges[0]
+    assert offset <= 50_000 and offset + length >= 50_800
+    assert length < 50_000
+
+    # everything is transferred to an empty file
+    empty = _chunks(_write(tmp_path / "empty.bin", b""))
+    assert diff_chunk_manifests_ne(empty, new).unwrap() == [(0, len(new_data))]
+
+    other = get_file_chunks_ne(str(tmp_path / "new.bin"), algorithm="crc32").unwrap()
+    res = diff_chunk_manifests_ne(old, other)
+    assert res.unwrap_err().kind == ErrorKind.ValueError
+
+
+def test_invalid_arguments(tmp_path: Path) -> None:
+    path = _write(tmp_path / "data.bin", b"data")
+    for kwargs in (
+        {"algorithm": "dummy"},
+        {"avg_size": 1000},
+        {"avg_size": 32},
+        {"min_size": 8192},
+        {"max_size": 8192},
+        {"min_size": 0},
+    ):
+        res = get_file_chunks_ne(path, **kwargs)
+        assert res.unwrap_err().kind == ErrorKind.ValueError
+    res = get_file_chunks_ne(str(tmp_path / "nonexistent"))
+    assert res.unwrap_err().kind == ErrorKind.FileNotFoundError
+    res = get_file_chunks_ne(str(tmp_path))
+    assert res.unwrap_err().kind == ErrorKind.TypeError
+
+
+def test_read_error(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    path = _write(tmp_path / "data.bin", b"data")
+
+    def _failing_buf_size(st: Any) -> int:
+        raise OSError(errno.EIO, "I/O error")
+
+    monkeypatch.setattr(chunking, "_auto_read_buf_size", _failing_buf_size)
+    res = get_file_chunks_ne(path)
+    assert res.unwrap_err().kind == ErrorKind.OSError
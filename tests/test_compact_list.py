@@ -0,0 +1,76 @@
+"""Test `compact_list.py`."""
+import random
+
+import pytest
+
+from iotanbo_py_utils import compact_list as compact_list_module
+from iotanbo_py_utils.compact_list import CompactEntry
+from iotanbo_py_utils.compact_list import CompactFileList
+
+
+def _make_list() -> CompactFileList:
+    compact_list = CompactFileList()
+    compact_list.append("b.txt", 10, 1000, "file")
+    compact_list.append("a", 0, 2000, "dir")
+    compact_list.append("ü/c.txt", 30, 3000, "symlink")
+    return compact_list
+
+
+def test_sequence_protocol() -> None:
+    compact_list = _make_list()
+    assert len(compact_list) == 3
+    assert list(compact_list) == ["b.txt", "a", "ü/c.txt"]
+    assert compact_list[0] == "b.txt"
+    assert compact_list[-1] == "ü/c.txt"
+    assert "a" in compact_list
+    assert compact_list.index("a") == 1
+    with pytest.raises(IndexError):
+        compact_list[3]
+    with pytest.raises(IndexError):
+        compact_list[-4]
+
+    sliced = compact_list[1:]
+    assert isinstance(sliced, CompactFileList)
+    assert list(sliced) == ["a", "ü/c.txt"]
+    assert list(compact_list[::-1]) == ["ü/c.txt", "a", "b.txt"]
+    assert sliced.entry(0) == CompactEntry("a", 0, 2000, "dir")
+
+
+def test_entry_and_sort() -> None:
+    compact_list = _make_list()
+    assert compact_list.entry(-1) == CompactEntry("ü/c.txt", 30, 3000, "symlink")
+    compact_list.sort()
+    assert list(compact_list) == ["a", "b.txt", "ü/c.txt"]
+    assert list(compact_list.sizes) == [0, 10, 30]
+    assert list(compact_list.mtimes_ns) == [2000, 1000, 3000]
+    assert [e.type for e in map(compact_list.entry, range(3))] == [
+        "dir",
+        "file",
+        "symlink",
+    ]
+
+
+def test_sort_in_blocks(monkeypatch: pytest.MonkeyPatch) -> None:
+    monkeypatch.setattr(compact_list_module, "_SORT_BLOCK_SIZE", 7)
+    rng = random.Random(1)
+    paths = [f"{rng.randrange(30)}/{i % 5}" for i in range(100)]
+    compact_list = CompactFileList()
+    for i, p in enumerate(paths):
+        compact_list.append(p, i, 0, "file")
+    compact_list.sort()
+    assert list(compact_list) == sorted(paths)
+    # the order of equal paths is kept
+    assert [compact_list.entry(i).size for i in range(100)] == sorted(
+        range(100), key=lambda i: paths[i]
+    )
+    empty = CompactFileList()
+    empty.sort()
+    assert len(empty) == 0
+
+
+def test_nbytes() -> None:
+    compact_list = CompactFileList()
+    empty_size = compact_list.nbytes
+    compact_list.append("x" * 100, 1, 1, "file")
+    # path bytes + offset + size + mtime + type
+    assert compact_list.nbytes == empty_size + 100 + 8 + 8 + 8 + 1
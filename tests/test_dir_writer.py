@@ -0,0 +1,78 @@
+"""Test `dir_writer.py`."""
+import os
+from pathlib import Path
+
+from iotanbo_py_utils.dir_writer import DirWriter
+from iotanbo_py_utils.error import ErrorKind
+
+
+def test_write_files_ne(tmp_path: Path) -> None:
+    (tmp_path / "sub").mkdir()
+    (tmp_path / "existing.txt").write_text("old")
+    os.symlink(tmp_path / "existing.txt", tmp_path / "symlink")
+    os.symlink(tmp_path / "missing.txt", tmp_path / "dangling")
+    files = {f"{i}.txt": f"text {i}\n" for i in range(100)}
+    with DirWriter.open_ne(str(tmp_path)).unwrap() as writer:
+        assert writer.write_files_ne(files.items()).is_ok()
+        res = writer.write_files_ne(
+            [
+                ("sub/nested.bin", b"\x00\x01"),
+                ("crlf.txt", "a\nb"),
+                ("0.txt", "new"),
+                ("sub", "new"),
+                ("nonexistent/a.txt", "new"),
+                (str(tmp_path / "absolute.txt"), "new"),
+                ("../escaped.txt", "new"),
+                ("sub/../../escaped.txt", "new"),
+                ("", "new"),
+            ],
+            newline="\r\n",
+        )
+        assert {name: e.kind for name, e in res.unwrap_err().items()} == {
+            "0.txt": ErrorKind.FileExistsError,
+            "sub": ErrorKind.TypeError,
+            "nonexistent/a.txt": ErrorKind.FileNotFoundError,
+            str(tmp_path / "absolute.txt"): ErrorKind.ValueError,
+            "../escaped.txt": ErrorKind.ValueError,
+            "sub/../../escaped.txt": ErrorKind.ValueError,
+            "": ErrorKind.ValueError,
+        }
+        res = writer.write_files_ne(
+            [
+                ("existing.txt", "new"),
+                ("symlink", "new"),
+                ("dangling", "new"),
+                ("sub", "new"),
+            ],
+            overwrite=True,
+        )
+        assert {name: e.kind for name, e in res.unwrap_err().items()} == {
+            "symlink": ErrorKind.TypeError,
+            "dangling": ErrorKind.TypeError,
+            "sub": ErrorKind.TypeError,
+        }
+        res = writer.write_files_ne([("dangling", "new")])
+        assert res.unwrap_err()["dangling"].kind == ErrorKind.TypeError
+        # no translation with an empty separator
+        res = writer.write_files_ne([("raw.txt", "a\nb\r\n")], newline="")
+        assert res.is_ok()
+
+    for name, contents in files.items():
+        assert (tmp_path / name).read_text() == contents
+    assert (tmp_path / "sub" / "nested.bin").read_bytes() == b"\x00\x01"
+    assert (tmp_path / "crlf.txt").read_bytes() == b"a\r\nb"
+    assert (tmp_path / "existing.txt").read_text() == "new"
+    assert (tmp_path / "raw.txt").read_bytes() == b"a\nb\r\n"
+    assert not (tmp_path / "missing.txt").exists()
+    assert not (tmp_path / "absolute.txt").exists()
+    assert not (tmp_path.parent / "escaped.txt").exists()
+    res = writer.write_files_ne([("closed.txt", "new")])
+    assert res.unwrap_err()["closed.txt"].kind == ErrorKind.ValueError
+
+
+def test_open_ne(tmp_path: Path) -> None:
+    res = DirWriter.open_ne(str(tmp_path / "nonexistent"))
+    assert res.unwrap_err().kind == ErrorKind.FileNotFoundError
+    (tmp_path / "file").write_text("")
+    res = DirWriter.open_ne(str(tmp_path / "file"))
+    assert res.unwrap_err().kind == ErrorKind.TypeError
@@ -1,12 +1,19 @@
 """Test `file_utils.py`."""
+import errno
+import hashlib
+import mmap
 import os
 import sys
+import zlib
+from typing import Any
+from typing import Iterator
 
 import pytest
 
 from iotanbo_py_utils import file_utils
 from iotanbo_py_utils import platform
 from iotanbo_py_utils.error import ErrorKind
+from iotanbo_py_utils.ignore_matcher import IgnoreMatcher
 
 
 join = os.path.join
@@ -235,6 +242,43 @@ def test_write_read_binary_file(
     assert file_utils.read_binary_file_ne(bin_file_path).unwrap() == bin_file_contents2
 
 
+def test_read_binary_file_mapped(existing_dir: str) -> None:
+    path = join(existing_dir, "file_for_read_binary_file_mapped.bin")
+    data = b"header" + bytes(range(256)) * 100
+    file_utils.write_binary_file_ne(path, data).unwrap()
+    with file_utils.read_binary_file_ne(path, mapped=True).unwrap() as m:
+        assert len(m) == len(data)
+        assert m.view.readonly
+        assert bytes(m.view[:6]) == b"header"
+        assert bytes(m.view) == data
+        assert hashlib.sha1(m.view).digest() == hashlib.sha1(data).digest()
+    with pytest.raises(ValueError):
+        m.view[0]
+
+    # slices that are still alive keep the file mapped
+    m = file_utils.read_binary_file_ne(path, mapped=True).unwrap()
+    tail = m.view[-256:]
+    m.close()
+    assert bytes(tail) == bytes(range(256))
+    tail.release()
+
+    empty_path = join(existing_dir, "empty_file_for_read_binary_file_mapped.bin")
+    file_utils.write_binary_file_ne(empty_path, b"").unwrap()
+    with file_utils.read_binary_file_ne(empty_path, mapped=True).unwrap() as m:
+        assert bytes(m.view) == b""
+
+    # files with a zero size that are not empty are read
+    if os.path.exists("/proc/self/cmdline"):
+        contents = file_utils.read_binary_file_ne("/proc/self/cmdline").unwrap()
+        assert contents
+        res = file_utils.read_binary_file_ne("/proc/self/cmdline", mapped=True)
+        with res.unwrap() as m:
+            assert bytes(m.view) == contents
+
+    res = file_utils.read_binary_file_ne(join(existing_dir, "nonexistent"), mapped=True)
+    assert res.unwrap_err().kind == ErrorKind.FileNotFoundError
+
+
 def test_create_remove_dir_ne(
     existing_dir: str, existing_text_file: str, existing_text_file_symlink: str
 ) -> None:
@@ -514,6 +558,49 @@ def test_read_file_into_lines_ne(existing_dir: str) -> None:
     )
 
 
+def test_iter_file_lines_ne(existing_dir: str) -> None:
+    path = join(existing_dir, "file_for_iter_file_lines_ne.txt")
+    file_utils.write_binary_file_ne(path, b"one\r\ntwo\rthree\n\nfour").unwrap()
+    lines = [r.unwrap() for r in file_utils.iter_file_lines_ne(path)]
+    assert lines == ["one", "two", "three", "", "four"]
+    lines = [r.unwrap() for r in file_utils.iter_file_lines_ne(path, keepends=True)]
+    assert lines == ["one\n", "two\n", "three\n", "\n", "four"]
+
+    batches = [
+        r.unwrap() for r in file_utils.iter_file_line_batches_ne(path, batch_size=2)
+    ]
+    assert batches == [["one", "two"], ["three", ""], ["four"]]
+    batches = [
+        r.unwrap() for r in file_utils.iter_file_line_batches_ne(path, keepends=True)
+    ]
+    assert batches == [["one\n", "two\n", "three\n", "\n", "four"]]
+
+    empty_file = join(existing_dir, "empty_file_for_iter_file_lines_ne.txt")
+    file_utils.write_binary_file_ne(empty_file, b"").unwrap()
+    assert list(file_utils.iter_file_lines_ne(empty_file)) == []
+    assert list(file_utils.iter_file_line_batches_ne(empty_file)) == []
+
+    # negative path
+    nonexistent = join(existing_dir, "nonexistent.txt")
+    for items in (
+        list(file_utils.iter_file_lines_ne(nonexistent)),
+        list(file_utils.iter_file_line_batches_ne(nonexistent)),
+    ):
+        assert len(items) == 1
+        assert items[0].unwrap_err().kind == ErrorKind.FileNotFoundError
+    items = list(file_utils.iter_file_line_batches_ne(path, batch_size=0))
+    assert items[0].unwrap_err().kind == ErrorKind.ValueError
+
+    # the lines before the decoding error are yielded
+    invalid_unicode_file = join(existing_dir, "invalid_file_for_iter_lines_ne.txt")
+    file_utils.write_binary_file_ne(
+        invalid_unicode_file, b"one\n" * 10_000 + b"\xff\xfe\n"
+    ).unwrap()
+    items = list(file_utils.iter_file_lines_ne(invalid_unicode_file))
+    assert items[0].unwrap() == "one"
+    assert items[-1].unwrap_err().kind == ErrorKind.UnicodeDecodeError
+
+
 def test_split() -> None:
     assert ["one\ntwo", ""] == "one\ntwo\r".split(sep="\r")
 
@@ -1195,6 +1282,308 @@ def test_get_file_list_recursively_ne(
     )
 
 
+def test_walk_tree_scans_each_dir_once(
+    existing_dir: str, existing_text_file: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    root_dir = join(existing_dir, "root_for_walk_tree")
+    _create_directory_with_contents(root_dir, existing_text_file)
+
+    scanned = []
+    original_scandir = os.scandir
+
+    def counting_scandir(path: str) -> "os._ScandirIterator[str]":
+        scanned.append(path)
+        return original_scandir(path)
+
+    monkeypatch.setattr(os, "scandir", counting_scandir)
+    files = file_utils.get_file_list_recursively_ne(root_dir).unwrap()
+    monkeypatch.undo()
+
+    assert len(files) == 7
+    # root and 5 sub-directories, each of them scanned exactly once
+    assert len(scanned) == 6
+    assert len(set(scanned)) == 6
+
+    # output is identical to the one of `os.walk()`
+    expected = []
+    for d, _, names in os.walk(root_dir):
+        rel = os.path.relpath(d, root_dir)
+        for n in names:
+            expected.append(n if rel == "." else join(rel, n))
+    assert files == sorted(expected)
+
+    # pruned sub-directories are neither yielded nor scanned
+    items = [
+        item.unwrap()[0]
+        for item in file_utils._walk_tree(root_dir, prune=lambda p: p == "subdir")
+    ]
+    assert "subdir" not in items
+    assert join("subdir", "sub-subdir") not in items
+    assert "subdir2" in items
+
+
+def test_iter_recursively_ne(existing_dir: str, existing_text_file: str) -> None:
+    root_dir = join(existing_dir, "root_for_iter_recursively_ne")
+    _create_directory_with_contents(root_dir, existing_text_file)
+
+    # Ok(str) items are the same as the result of the list functions
+    files = [r.unwrap() for r in file_utils.iter_files_recursively_ne(root_dir)]
+    assert sorted(files) == file_utils.get_file_list_recursively_ne(root_dir).unwrap()
+    subdirs = [r.unwrap() for r in file_utils.iter_subdirs_recursively_ne(root_dir)]
+    assert (
+        sorted(subdirs) == file_utils.get_subdir_list_recursively_ne(root_dir).unwrap()
+    )
+
+    # Ok((str, os.DirEntry)) items when `with_entries=True`
+    ignore = ["dummy_text_file.txt", "subdir3"]
+    for item in file_utils.iter_files_recursively_ne(
+        root_dir, ignore_list=ignore, with_entries=True
+    ):
+        relative_path, entry = item.unwrap()
+        assert entry.path == join(root_dir, relative_path)
+        assert entry.is_file()
+        assert relative_path not in ignore
+        assert not relative_path.startswith("subdir3")
+    for dir_item in file_utils.iter_subdirs_recursively_ne(
+        root_dir, ignore_list=ignore, with_entries=True
+    ):
+        relative_path, entry = dir_item.unwrap()
+        assert entry.is_dir()
+        assert relative_path != "subdir3"
+
+    # iteration is lazy
+    it = file_utils.iter_files_recursively_ne(root_dir)
+    assert next(it).is_ok()
+
+    # negative path
+
+    # TypeError when path is not a directory
+    errors = list(file_utils.iter_files_recursively_ne(existing_text_file))
+    assert len(errors) == 1
+    assert errors[0].unwrap_err().kind_is(ErrorKind.TypeError)
+
+    # FileNotFoundError when path not exists
+    errors = list(file_utils.iter_subdirs_recursively_ne(NOT_EXISTING_DIR))
+    assert len(errors) == 1
+    assert errors[0].unwrap_err().kind_is(ErrorKind.FileNotFoundError)
+
+
+def test_parallel_traversal(
+    existing_dir: str, existing_text_file: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    root_dir = join(existing_dir, "root_for_parallel_traversal")
+    _create_directory_with_contents(root_dir, existing_text_file)
+    for i in range(10):
+        assert file_utils.write_file_ne(
+            join(root_dir, "subdir", "sub-subdir", f"file{i}.txt"), "dummy"
+        ).is_ok()
+
+    # Ok(List[str]) is identical to the one of the sequential walk
+    ignore = ["subdir3", "dummy_text_file.txt"]
+    for max_workers in (2, 8):
+        assert (
+            file_utils.get_subdir_list_recursively_ne(
+                root_dir, ignore_list=ignore, max_workers=max_workers
+            ).unwrap()
+            == file_utils.get_subdir_list_recursively_ne(
+                root_dir, ignore_list=ignore
+            ).unwrap()
+        )
+        assert (
+            file_utils.get_file_list_recursively_ne(
+                root_dir, ignore_list=ignore, max_workers=max_workers
+            ).unwrap()
+            == file_utils.get_file_list_recursively_ne(
+                root_dir, ignore_list=ignore
+            ).unwrap()
+        )
+        unsorted = file_utils.get_file_list_recursively_ne(
+            root_dir, sort=False, max_workers=max_workers
+        ).unwrap()
+        assert len(unsorted) == 17
+
+    # the generator can be closed before the walk is complete
+    it = file_utils.iter_files_recursively_ne(root_dir, max_workers=4)
+    assert next(it).is_ok()
+    it.close()
+
+    # a directory that fails midway yields the same items in both modes
+    failing_dir = join(root_dir, "subdir", "sub-subdir")
+    original_scandir = os.scandir
+
+    class FailingScandir:
+        def __init__(self, path: str) -> None:
+            self._it = original_scandir(path)
+            self._failing = path == failing_dir
+            self._count = 0
+
+        def __enter__(self) -> "FailingScandir":
+            return self
+
+        def __exit__(self, *args: Any) -> None:
+            self._it.close()
+
+        def __iter__(self) -> "FailingScandir":
+            return self
+
+        def __next__(self) -> "os.DirEntry[str]":
+            if self._failing and self._count == 3:
+                raise OSError(errno.EIO, "I/O error")
+            self._count += 1
+            return next(self._it)
+
+    monkeypatch.setattr(os, "scandir", FailingScandir)
+    walks = {}
+    for max_workers in (1, 4):
+        results = list(file_utils._walk_tree(root_dir, max_workers=max_workers))
+        kinds = [r.unwrap_err().kind for r in results if r.is_err()]
+        assert kinds == [ErrorKind.OSError]
+        walks[max_workers] = sorted(r.unwrap()[0] for r in results if r.is_ok())
+    monkeypatch.undo()
+    assert walks[1] == walks[4]
+    assert (
+        len([p for p in walks[1] if p.startswith(join("subdir", "sub-subdir", ""))])
+        == 3
+    )
+
+    # negative path
+
+    # ValueError when max_workers is less than 1
+    assert (
+        file_utils.get_file_list_recursively_ne(root_dir, max_workers=0)
+        .unwrap_err()
+        .kind_is(ErrorKind.ValueError)
+    )
+    errors = list(file_utils.iter_subdirs_recursively_ne(root_dir, max_workers=0))
+    assert errors[0].unwrap_err().kind_is(ErrorKind.ValueError)
+
+
+def test_compact_listing(existing_dir: str, existing_text_file: str) -> None:
+    root_dir = join(existing_dir, "root_for_compact_listing")
+    _create_directory_with_contents(root_dir, existing_text_file)
+
+    files = file_utils.get_file_list_recursively_ne(root_dir).unwrap()
+    compact_files = file_utils.get_file_list_recursively_ne(
+        root_dir, compact=True
+    ).unwrap()
+    assert list(compact_files) == files
+    entry = compact_files.entry(files.index("dummy_text_file.txt"))
+    st = os.stat(join(root_dir, "dummy_text_file.txt"))
+    assert (entry.size, entry.mtime_ns, entry.type) == (
+        st.st_size,
+        st.st_mtime_ns,
+        "file",
+    )
+
+    subdirs = file_utils.get_subdir_list_recursively_ne(
+        root_dir, ignore_list=["subdir3"]
+    ).unwrap()
+    compact_subdirs = file_utils.get_subdir_list_recursively_ne(
+        root_dir, ignore_list=["subdir3"], compact=True, max_workers=2
+    ).unwrap()
+    assert list(compact_subdirs) == subdirs
+    assert set(compact_subdirs.entry(i).type for i in range(len(subdirs))) == {"dir"}
+
+    # validation errors are the same as for the list result
+    res = file_utils.get_file_list_recursively_ne(
+        join(root_dir, "nonexistent"), compact=True
+    )
+    assert res.is_err()
+    assert res.unwrap_err().kind == ErrorKind.FileNotFoundError
+
+
+def test_listing_with_ignore_matcher(
+    existing_dir: str, existing_text_file: str
+) -> None:
+    root_dir = join(existing_dir, "root_for_listing_with_ignore_matcher")
+    _create_directory_with_contents(root_dir, existing_text_file)
+
+    # a prefix of a name does not ignore the directory
+    subdirs = file_utils.get_subdir_list_recursively_ne(
+        root_dir, ignore_list=["subdir"]
+    ).unwrap()
+    assert subdirs == ["subdir2", "subdir3", "subdir4"]
+
+    matcher = IgnoreMatcher(["subdir[23]/", ".*", "!.hidden_text_file2"])
+    subdirs = file_utils.get_subdir_list_recursively_ne(
+        root_dir, ignore_list=matcher
+    ).unwrap()
+    assert subdirs == ["subdir", join("subdir", "sub-subdir"), "subdir4"]
+
+    expected = [
+        "dummy_text_file.txt",
+        join("subdir", "sub-subdir", ".hidden_text_file2"),
+        join("subdir4", "dummy.txt"),
+    ]
+    files = file_utils.get_file_list_recursively_ne(
+        root_dir, ignore_list=matcher
+    ).unwrap()
+    assert files == expected
+    all_subdirs = file_utils.get_subdir_list_recursively_ne(root_dir).unwrap()
+    files = file_utils.get_aggregated_file_list_ne(
+        root_dir, all_subdirs, ignore_list=matcher
+    ).unwrap()
+    assert files == expected
+    files = [
+        r.unwrap()
+        for r in file_utils.iter_files_recursively_ne(root_dir, ignore_list=matcher)
+    ]
+    assert sorted(files) == expected
+
+
+def test_find_ne(existing_dir: str, existing_text_file: str) -> None:
+    root_dir = join(existing_dir, "root_for_find_ne")
+    _create_directory_with_contents(root_dir, existing_text_file)
+    os.utime(join(root_dir, "subdir2", "dummy.txt"), (1000, 1000))
+    os.utime(join(root_dir, "subdir3", "dummy.txt"), (2000, 2000))
+
+    # no filters: the same items as the recursive listings
+    found = file_utils.find_ne(root_dir).unwrap()
+    files = file_utils.get_file_list_recursively_ne(root_dir).unwrap()
+    subdirs = file_utils.get_subdir_list_recursively_ne(root_dir).unwrap()
+    assert found == sorted(files + subdirs)
+
+    found = file_utils.find_ne(root_dir, item_type="dir", max_depth=1).unwrap()
+    assert found == ["subdir", "subdir2", "subdir3", "subdir4"]
+    found = file_utils.find_ne(root_dir, item_type="symlink", max_workers=2).unwrap()
+    assert found == [join("subdir", "sub-subdir", ".hidden_text_file")]
+    found = file_utils.find_ne(
+        root_dir, item_type="file", suffixes=[".txt"], max_depth=2, max_workers=2
+    ).unwrap()
+    assert found == [
+        "dummy_text_file.txt",
+        join("subdir2", "dummy.txt"),
+        join("subdir3", "dummy.txt"),
+        join("subdir4", "dummy.txt"),
+    ]
+    # "dummy" is 5 bytes, "dummy_text_file" is 15 bytes
+    found = file_utils.find_ne(
+        root_dir, item_type="file", min_size=6, max_size=15
+    ).unwrap()
+    assert found == ["dummy_text_file.txt"]
+    found = file_utils.find_ne(
+        root_dir, min_mtime=1000, max_mtime=1500, ignore_list=["subdir3"]
+    ).unwrap()
+    assert found == [join("subdir2", "dummy.txt")]
+    found = file_utils.find_ne(
+        root_dir, max_mtime=2000, ignore_list=["subdir2"], max_workers=2
+    ).unwrap()
+    assert found == [join("subdir3", "dummy.txt")]
+
+    for kwargs in (
+        {"item_type": "fifo"},
+        {"suffixes": ".txt"},
+        {"min_size": 2, "max_size": 1},
+        {"min_mtime": 2.0, "max_mtime": 1.0},
+        {"max_depth": 0},
+        {"max_workers": 0},
+    ):
+        res = file_utils.find_ne(root_dir, **kwargs)
+        assert res.unwrap_err().kind == ErrorKind.ValueError
+    res = file_utils.find_ne(join(root_dir, "nonexistent"))
+    assert res.unwrap_err().kind == ErrorKind.FileNotFoundError
+
+
 def test_get_aggregated_file_list_ne(
     existing_dir: str, existing_text_file: str
 ) -> None:
@@ -1265,12 +1654,61 @@ def test_get_item_count_ne(existing_dir: str, existing_text_file: str) -> None:
     count = file_utils.get_item_count_ne(root_dir).unwrap()
     assert count == 6  # 4 directories and 2 files
 
+    counts = file_utils.get_item_counts_ne(root_dir).unwrap()
+    assert counts == file_utils.ItemCounts(files=2, dirs=4, symlinks=0, other=0)
+    assert counts.total == count
+
+    counts = file_utils.get_item_counts_ne(root_dir, recursive=True).unwrap()
+    assert counts == file_utils.ItemCounts(files=6, dirs=5, symlinks=1, other=0)
+
+    res = file_utils.get_item_counts_ne(join(root_dir, "nonexistent"))
+    assert res.unwrap_err().kind == ErrorKind.FileNotFoundError
+    res = file_utils.get_item_counts_ne(join(root_dir, "dummy_text_file.txt"))
+    assert res.unwrap_err().kind == ErrorKind.TypeError
+
 
 def test_get_file_size_ne(existing_text_file: str) -> None:
     result = file_utils.get_file_size_ne(existing_text_file)
     assert result.unwrap() == 4
 
 
+def test_get_tree_size_ne(existing_dir: str) -> None:
+    root_dir = join(existing_dir, "root_for_get_tree_size_ne")
+    os.makedirs(join(root_dir, "x", "y"))
+    file_utils.write_binary_file_ne(join(root_dir, "a.bin"), b"a" * 100).unwrap()
+    file_utils.write_binary_file_ne(join(root_dir, "x", "b.bin"), b"b" * 10).unwrap()
+    file_utils.write_binary_file_ne(
+        join(root_dir, "x", "y", "c.bin"), b"c" * 1
+    ).unwrap()
+    os.makedirs(join(root_dir, "empty"))
+    # a hard link is counted once
+    os.link(join(root_dir, "a.bin"), join(root_dir, "x", "a-link.bin"))
+    os.symlink("b.bin", join(root_dir, "x", "b-symlink"))
+    symlink_size = os.lstat(join(root_dir, "x", "b-symlink")).st_size
+
+    size = file_utils.get_tree_size_ne(root_dir).unwrap()
+    assert size.apparent_size == 111 + symlink_size
+    assert size.item_count == 4
+    assert size.disk_usage >= 0
+    assert size.subdirs == {}
+
+    size = file_utils.get_tree_size_ne(
+        root_dir, per_subdir=True, ignore_list=["a.bin"], max_workers=2
+    ).unwrap()
+    # the hard link is not ignored, so the file is counted under `x`
+    assert size.apparent_size == 111 + symlink_size
+    assert sorted(size.subdirs) == ["empty", "x", join("x", "y")]
+    assert size.subdirs["empty"] == (0, 0)
+    assert size.subdirs[join("x", "y")][0] == 1
+    assert size.subdirs["x"][0] == 111 + symlink_size
+    assert size.subdirs["x"][1] == size.disk_usage
+
+    res = file_utils.get_tree_size_ne(join(root_dir, "a.bin"))
+    assert res.unwrap_err().kind == ErrorKind.TypeError
+    res = file_utils.get_tree_size_ne(root_dir, max_workers=0)
+    assert res.unwrap_err().kind == ErrorKind.ValueError
+
+
 def test_get_file_crc32_ne(existing_text_file: str) -> None:
     # https://crccalc.com
     result = file_utils.get_file_crc32_hex_ne(existing_text_file)
@@ -1310,6 +1748,305 @@ def test_get_file_hash_ne(existing_text_file: str) -> None:
     )
 
 
+def test_hash_with_mmap(existing_dir: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    path = join(existing_dir, "file_for_hash_with_mmap.bin")
+    data = bytes(range(256)) * 1000
+    file_utils.write_binary_file_ne(path, data).unwrap()
+    expected_sha256 = hashlib.sha256(data).digest()
+    expected_crc32 = zlib.crc32(data)
+    empty_path = join(existing_dir, "empty_file_for_hash_with_mmap.bin")
+    file_utils.write_binary_file_ne(empty_path, b"").unwrap()
+
+    mapped = []
+    original_mmap = mmap.mmap
+
+    def _mmap(*args: Any, **kwargs: Any) -> Any:
+        mapped.append(args)
+        return original_mmap(*args, **kwargs)
+
+    monkeypatch.setattr(mmap, "mmap", _mmap)
+    # several slices are fed to the hashers
+    monkeypatch.setattr(file_utils, "_MMAP_CHUNK_SIZE", 100_000)
+
+    for use_mmap in (True, False):
+        sha256 = file_utils.get_file_hash_ne(
+            path, algorithm="sha256", use_mmap=use_mmap
+        ).unwrap()
+        assert sha256 == expected_sha256
+        crc32 = file_utils.get_file_crc32_ne(path, use_mmap=use_mmap).unwrap()
+        assert crc32 == expected_crc32
+        # empty files cannot be mapped and are read instead
+        crc32 = file_utils.get_file_crc32_ne(empty_path, use_mmap=use_mmap).unwrap()
+        assert crc32 == 0
+    assert len(mapped) == 2
+
+    # files are not mapped by default
+    digests = file_utils.get_file_digests_ne(
+        path, algorithms=["crc32", "sha256"]
+    ).unwrap()
+    assert digests["sha256"] == expected_sha256
+    assert int.from_bytes(digests["crc32"], "big") == expected_crc32
+    assert len(mapped) == 2
+
+
+def test_adaptive_read_buffer(
+    existing_dir: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    monkeypatch.setattr(file_utils, "_calibrated_read_buf_size", 1024 * 1024)
+    sizes = []
+    for size in (0, 1, 4096, 100_000, 3_000_000):
+        path = join(existing_dir, f"file_for_read_buffer_{size}.bin")
+        data = bytes(range(256)) * (size // 256) + b"x" * (size % 256)
+        file_utils.write_binary_file_ne(path, data, overwrite=True).unwrap()
+        st = os.stat(path)
+        buf_size = file_utils._auto_read_buf_size(st)
+        sizes.append(buf_size)
+        assert buf_size % max(st.st_blksize, 4096) == 0
+        sha1 = file_utils.get_file_hash_ne(
+            path, algorithm="sha1", use_mmap=False
+        ).unwrap()
+        assert sha1 == hashlib.sha1(data).digest()
+    # no more than the file needs, up to the calibrated size for big files
+    assert sizes[1] == sizes[2] < sizes[3] <= 128 * 1024 < sizes[4]
+    assert sizes[4] == max(1024 * 1024, os.stat(path).st_blksize)
+
+    # the buffer is reused by the thread, except by nested calls
+    with file_utils._read_buffer(1000) as a:
+        assert len(a) == 1000
+        pooled = a.obj
+        with file_utils._read_buffer(10) as b:
+            assert b.obj is not pooled
+    with file_utils._read_buffer(100) as c:
+        assert c.obj is pooled
+
+    monkeypatch.setattr(file_utils, "_CALIBRATION_BYTES", 1024 * 1024)
+    calibrated = file_utils._calibrate_read_buf_size()
+    assert calibrated in file_utils._CALIBRATION_BUF_SIZES
+
+
+def test_get_file_digests_ne(existing_text_file: str) -> None:
+    # The contents of the text file is 'test'
+    result = file_utils.get_file_digests_ne(
+        existing_text_file, algorithms=["crc32", "sha1", "sha256", "crc32"]
+    )
+    digests = result.unwrap()
+    assert list(digests) == ["crc32", "sha1", "sha256"]
+    assert digests["crc32"].hex().upper() == "D87F7E0C"
+    assert digests["sha1"].hex() == "a94a8fe5ccb19ba61c4c0873d391e987982fbbd3"
+    assert (
+        digests["sha256"]
+        == file_utils.get_file_hash_ne(existing_text_file, algorithm="sha256").unwrap()
+    )
+
+    digests = file_utils.get_file_digests_ne(
+        existing_text_file, algorithms=["sha512", "crc32"], read_buf_size=1
+    ).unwrap()
+    assert digests["crc32"].hex().upper() == "D87F7E0C"
+
+    for algorithms in ([], ["crc32", "dummy"]):
+        result = file_utils.get_file_digests_ne(
+            existing_text_file, algorithms=algorithms
+        )
+        assert result.unwrap_err().kind == ErrorKind.ValueError
+    result = file_utils.get_file_digests_ne(
+        existing_text_file + "-nonexistent", algorithms=["crc32"]
+    )
+    assert result.unwrap_err().kind == ErrorKind.FileNotFoundError
+
+
+def test_hash_files_ne(
+    existing_dir: str, existing_text_file: str, monkeypatch: pytest.MonkeyPatch
+) -> None:
+    root_dir = join(existing_dir, "root_for_hash_files_ne")
+    _create_directory_with_contents(root_dir, existing_text_file)
+    big_file = join(root_dir, "big.bin")
+    file_utils.write_binary_file_ne(big_file, b"b" * 3000).unwrap()
+    files = [
+        join(root_dir, p)
+        for p in file_utils.find_ne(root_dir, item_type="file").unwrap()
+    ]
+    nonexistent = join(root_dir, "nonexistent")
+    # make sure that both large and batched small files are scheduled
+    monkeypatch.setattr(file_utils, "_SMALL_FILE_SIZE", 1000)
+    monkeypatch.setattr(file_utils, "_BATCH_MAX_FILES", 2)
+
+    for algorithm in ("sha256", "crc32"):
+        results = file_utils.hash_files_ne(
+            files + [nonexistent, big_file],
+            algorithm=algorithm,
+            max_workers=3,
+            sizes={f: os.path.getsize(f) for f in files},
+        )
+        assert sorted(results) == sorted(files + [nonexistent])
+        for f in files:
+            if algorithm == "crc32":
+                expected = file_utils.get_file_crc32_ne(f).unwrap().to_bytes(4, "big")
+            else:
+                expected = file_utils.get_file_hash_ne(f, algorithm=algorithm).unwrap()
+            assert results[f].unwrap() == expected
+        assert results[nonexistent].unwrap_err().kind == ErrorKind.FileNotFoundError
+
+    # the results are streamed, the generator can be closed early
+    it = file_utils.iter_file_hashes_ne(files, algorithm="sha1", max_workers=2)
+    path, result = next(it)
+    assert path in files and result.is_ok()
+    it.close()
+
+    # the paths are consumed lazily, hashing starts before the input ends
+    consumed = []
+
+    def _paths() -> Iterator[str]:
+        for i in range(1000):
+            consumed.append(i)
+            yield join(root_dir, f"nonexistent-{i}")
+
+    it = file_utils.iter_file_hashes_ne(_paths(), algorithm="sha1", max_workers=1)
+    path, result = next(it)
+    assert result.unwrap_err().kind == ErrorKind.FileNotFoundError
+    assert len(consumed) < 100
+    it.close()
+
+    for kwargs in ({"algorithm": "dummy"}, {"algorithm": "sha1", "max_workers": 0}):
+        results = file_utils.hash_files_ne(files, **kwargs)
+        assert all(
+            r.unwrap_err().kind == ErrorKind.ValueError for r in results.values()
+        )
+
+
+def test_get_tree_hash_ne(existing_dir: str, existing_text_file: str) -> None:
+    root_dir = join(existing_dir, "root_for_get_tree_hash_ne")
+    _create_directory_with_contents(root_dir, existing_text_file)
+    copy_dir = join(existing_dir, "root_for_get_tree_hash_ne_copy")
+    file_utils.copy_tree_ne(root_dir, copy_dir).unwrap()
+
+    tree_hash = file_utils.get_tree_hash_ne(root_dir, per_subdir=True).unwrap()
+    assert len(tree_hash.digest) == 32
+    assert (
+        sorted(tree_hash.subdirs)
+        == file_utils.get_subdir_list_recursively_ne(root_dir).unwrap()
+    )
+    # the digest does not depend on the location of the tree
+    copy_hash = file_utils.get_tree_hash_ne(
+        copy_dir, per_subdir=True, max_workers=2
+    ).unwrap()
+    assert copy_hash == tree_hash
+    assert file_utils.get_tree_hash_ne(copy_dir).unwrap().subdirs == {}
+
+    # a change is located by comparing the sub-directory digests
+    file_utils.write_file_ne(
+        join(copy_dir, "subdir", "sub-subdir", ".hidden_text_file2"),
+        "changed",
+        overwrite=True,
+    ).unwrap()
+    copy_hash = file_utils.get_tree_hash_ne(copy_dir, per_subdir=True).unwrap()
+    assert copy_hash.digest != tree_hash.digest
+    changed = [
+        d for d in tree_hash.subdirs if tree_hash.subdirs[d] != copy_hash.subdirs[d]
+    ]
+    assert changed == ["subdir", join("subdir", "sub-subdir")]
+
+    # empty directories, symlink targets and ignored items
+    os.makedirs(join(copy_dir, "empty"))
+    empty_hash = file_utils.get_tree_hash_ne(copy_dir).unwrap()
+    assert empty_hash.digest != copy_hash.digest
+    ignored_hash = file_utils.get_tree_hash_ne(copy_dir, ignore_list=["empty"]).unwrap()
+    assert ignored_hash.digest == copy_hash.digest
+    symlink = join(copy_dir, "subdir", "sub-subdir", ".hidden_text_file")
+    os.remove(symlink)
+    os.symlink(existing_text_file + "-other", symlink)
+    ignored_hash = file_utils.get_tree_hash_ne(copy_dir, ignore_list=["empty"]).unwrap()
+    assert ignored_hash.digest != copy_hash.digest
+
+    blake2_hash = file_utils.get_tree_hash_ne(root_dir, algorithm="blake2b-128")
+    assert len(blake2_hash.unwrap().digest) == 16
+    for kwargs in ({"algorithm": "dummy"}, {"max_workers": 0}):
+        res = file_utils.get_tree_hash_ne(root_dir, **kwargs)
+        assert res.unwrap_err().kind == ErrorKind.ValueError
+
+
+def test_find_duplicates_ne(existing_dir: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    root_dir = join(existing_dir, "root_for_find_duplicates_ne")
+    other_root = join(existing_dir, "other_root_for_find_duplicates_ne")
+    os.makedirs(join(root_dir, "sub"))
+    os.makedirs(other_root)
+    big = b"x" * 5000
+    files = {
+        join(root_dir, "a.txt"): b"same",
+        join(root_dir, "sub", "b.txt"): b"same",
+        join(other_root, "c.txt"): b"same",
+        join(root_dir, "d.txt"): b"diff",
+        join(root_dir, "empty1"): b"",
+        join(root_dir, "empty2"): b"",
+        # same size, head and tail, differ in the middle
+        join(root_dir, "big1.bin"): big,
+        join(root_dir, "big2.bin"): big[:2500] + b"y" + big[2501:],
+        join(root_dir, "sub", "big3.bin"): big,
+        join(root_dir, "unique.bin"): b"unique",
+    }
+    for path, data in files.items():
+        file_utils.write_binary_file_ne(path, data).unwrap()
+    os.link(join(root_dir, "unique.bin"), join(root_dir, "sub", "unique-link.bin"))
+    os.symlink(join(root_dir, "a.txt"), join(root_dir, "symlink"))
+
+    full_hashes = []
+    original = file_utils.iter_file_hashes_ne
+
+    def _iter_file_hashes_ne(paths: Any, **kwargs: Any) -> Any:
+        full_hashes.extend(paths)
+        return original(paths, **kwargs)
+
+    monkeypatch.setattr(file_utils, "iter_file_hashes_ne", _iter_file_hashes_ne)
+
+    groups = file_utils.find_duplicates_ne(
+        [root_dir, other_root, root_dir], partial_size=1000, max_workers=2
+    ).unwrap()
+    assert groups == [
+        [
+            join(other_root, "c.txt"),
+            join(root_dir, "a.txt"),
+            join(root_dir, "sub", "b.txt"),
+        ],
+        [join(root_dir, "big1.bin"), join(root_dir, "sub", "big3.bin")],
+        [join(root_dir, "sub", "unique-link.bin"), join(root_dir, "unique.bin")],
+    ]
+    # only the files that collide by the partial hash are fully hashed
+    assert sorted(full_hashes) == sorted(
+        [
+            join(root_dir, "big1.bin"),
+            join(root_dir, "big2.bin"),
+            join(root_dir, "sub", "big3.bin"),
+        ]
+    )
+
+    groups = file_utils.find_duplicates_ne(
+        [root_dir], min_size=0, ignore_list=["sub"], algorithm="crc32"
+    ).unwrap()
+    assert groups == [
+        [join(root_dir, "empty1"), join(root_dir, "empty2")],
+    ]
+
+    # a file is not its own duplicate when the roots overlap
+    other_roots = [
+        other_root,
+        join(other_root, "."),
+        os.path.relpath(other_root),
+        os.path.abspath(other_root),
+    ]
+    assert file_utils.find_duplicates_ne(other_roots).unwrap() == []
+    groups = file_utils.find_duplicates_ne(
+        [root_dir, join(root_dir, ".", "sub")], partial_size=1000
+    ).unwrap()
+    assert (
+        groups == file_utils.find_duplicates_ne([root_dir], partial_size=1000).unwrap()
+    )
+
+    for kwargs in ({"algorithm": "dummy"}, {"max_workers": 0}):
+        res = file_utils.find_duplicates_ne([root_dir], **kwargs)
+        assert res.unwrap_err().kind == ErrorKind.ValueError
+    res = file_utils.find_duplicates_ne([root_dir, join(root_dir, "nonexistent")])
+    assert res.unwrap_err().kind == ErrorKind.FileNotFoundError
+
+
 def test_gzip_file_ne(existing_dir: str, existing_text_file: str) -> None:
     text_file_copy = join(existing_dir, "text_file_copy.txt")
     file_utils.copy_file_ne(existing_text_file, text_file_copy)
@@ -1392,3 +2129,135 @@ def test_gzip_tree_ne(existing_dir: str, existing_text_file: str) -> None:
         .unwrap_err()
         .kind_is("ReadError")
     )
+
+
+def test_stat_call_count(existing_dir: str, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Validation costs a single `lstat()`, creating a new file none."""
+    root = join(existing_dir, "root_for_stat_call_count")
+    os.makedirs(root)
+    path = join(root, "file.txt")
+    calls = []
+    original_stat, original_lstat = os.stat, os.lstat
+
+    def _stat(*args: Any, **kwargs: Any) -> Any:
+        calls.append(args[0])
+        return original_stat(*args, **kwargs)
+
+    def _lstat(*args: Any, **kwargs: Any) -> Any:
+        calls.append(args[0])
+        return original_lstat(*args, **kwargs)
+
+    def count(f: Any, *args: Any, **kwargs: Any) -> int:
+        calls.clear()
+        monkeypatch.setattr(os, "stat", _stat)
+        monkeypatch.setattr(os, "lstat", _lstat)
+        try:
+            assert f(*args, **kwargs).is_ok()
+        finally:
+            monkeypatch.setattr(os, "stat", original_stat)
+            monkeypatch.setattr(os, "lstat", original_lstat)
+        return len(calls)
+
+    assert count(file_utils.write_file_ne, path, "text") == 0
+    assert count(file_utils.write_file_ne, path, "text", overwrite=True) == 1
+    assert count(file_utils.write_binary_file_ne, path, b"text", overwrite=True) == 1
+    assert count(file_utils.get_item_type_ne, path) == 1
+    assert count(file_utils.file_exists_ne, path) == 1
+    assert count(file_utils.file_exists_ne, join(root, "nonexistent")) == 1
+    assert count(file_utils.dir_exists_ne, root) == 1
+    assert count(file_utils.read_file_ne, path) == 1
+    assert count(file_utils.read_binary_file_ne, path) == 1
+    assert count(file_utils.get_file_size_ne, path) == 1
+    assert count(file_utils.get_file_hash_ne, path, algorithm="sha1") == 1
+    assert count(file_utils.get_file_list_ne, root) == 1
+    # the errors are the same as with a separate validation
+    res = file_utils.write_file_ne(path, "text")
+    assert res.unwrap_err().kind == ErrorKind.FileExistsError
+    res = file_utils.write_binary_file_ne(path, b"text")
+    assert res.unwrap_err().kind == ErrorKind.FileExistsError
+    res = file_utils.write_file_ne(root, "text")
+    assert res.unwrap_err().kind == ErrorKind.TypeError
+    res = file_utils.write_binary_file_ne(root, b"text")
+    assert res.unwrap_err().kind == ErrorKind.TypeError
+    item_type = file_utils.get_item_type_ne(join(path, "under_a_file"))
+    assert item_type.unwrap_err().kind == ErrorKind.FileNotFoundError
+    dangling = join(root, "dangling_symlink")
+    os.symlink(join(root, "nonexistent"), dangling)
+    item_type = file_utils.get_item_type_ne(dangling)
+    assert item_type.unwrap_err().kind == ErrorKind.FileNotFoundError
+    assert file_utils.get_item_type_ne(dangling + "\0").is_err()
+    assert count(file_utils.remove_file_ne, path) == 1
+
+    # the rest is done by `shutil`
+    file_utils.write_file_ne(path, "text").unwrap()
+    copy = join(root, "copy.txt")
+    assert count(file_utils.copy_file_ne, path, copy) <= 6
+    assert count(file_utils.copy_file_ne, path, copy, overwrite=True) <= 6
+
+
+def test_write_through_dangling_symlink(existing_dir: str) -> None:
+    root = join(existing_dir, "root_for_write_through_dangling_symlink")
+    os.makedirs(root)
+    for i, (overwrite, atomic) in enumerate(
+        (o, a) for o in (False, True) for a in (False, True)
+    ):
+        target = join(root, f"target{i}.txt")
+        link = join(root, f"link{i}")
+        os.symlink(target, link)
+        # the target is created, the link stays
+        res = file_utils.write_file_ne(link, "text", overwrite=overwrite, atomic=atomic)
+        assert res.is_ok()
+        assert os.path.islink(link)
+        assert file_utils.read_file_ne(target).unwrap() == "text"
+        # now the link points to a file
+        res = file_utils.write_file_ne(link, "text", overwrite=overwrite, atomic=atomic)
+        assert res.unwrap_err().kind == ErrorKind.TypeError
+
+        bin_target = join(root, f"target{i}.bin")
+        bin_link = join(root, f"bin_link{i}")
+        os.symlink(bin_target, bin_link)
+        res = file_utils.write_binary_file_ne(
+            bin_link, b"\x00", overwrite=overwrite, atomic=atomic
+        )
+        assert res.is_ok()
+        assert file_utils.read_binary_file_ne(bin_target).unwrap() == b"\x00"
+        res = file_utils.write_binary_file_ne(
+            bin_link, b"\x00", overwrite=overwrite, atomic=atomic
+        )
+        assert res.unwrap_err().kind == ErrorKind.TypeError
+
+    # a symlink loop is not a file
+    loop = join(root, "loop")
+    os.symlink(loop, loop)
+    res = file_utils.write_file_ne(loop, "text", overwrite=True, atomic=True)
+    assert res.unwrap_err().kind == ErrorKind.TypeError
+
+
+def test_write_file_atomic(existing_dir: str) -> None:
+    root = join(existing_dir, "root_for_write_file_atomic")
+    os.makedirs(root)
+    path = join(root, "file.txt")
+    assert file_utils.write_file_ne(path, "one\ntwo", atomic=True).is_ok()
+    assert file_utils.read_file_ne(path).unwrap() == "one\ntwo"
+    res = file_utils.write_file_ne(path, "three", atomic=True)
+    assert res.unwrap_err().kind == ErrorKind.FileExistsError
+
+    # an overwritten file keeps its permissions
+    os.chmod(path, 0o600)
+    assert file_utils.write_file_ne(path, "three", overwrite=True, atomic=True).is_ok()
+    assert file_utils.read_file_ne(path).unwrap() == "three"
+    assert os.stat(path).st_mode & 0o777 == 0o600
+
+    bin_path = join(root, "file.bin")
+    assert file_utils.write_binary_file_ne(bin_path, b"\x00\x01", atomic=True).is_ok()
+    assert file_utils.write_binary_file_ne(
+        bin_path, b"\x02", overwrite=True, atomic=True
+    ).is_ok()
+    assert file_utils.read_binary_file_ne(bin_path).unwrap() == b"\x02"
+
+    res = file_utils.write_binary_file_ne(root, b"", overwrite=True, atomic=True)
+    assert res.unwrap_err().kind == ErrorKind.TypeError
+    res = file_utils.write_file_ne(join(root, "nonexistent", "file.txt"), atomic=True)
+    assert res.unwrap_err().kind == ErrorKind.FileNotFoundError
+    # no temporary files are left behind
+    assert sorted(os.listdir(root)) == ["file.bin", "file.txt"]
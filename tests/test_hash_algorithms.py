@@ -0,0 +1,94 @@
+"""Test `hash_algorithms.py`."""
+import hashlib
+import zlib
+from pathlib import Path
+from typing import Any
+
+from iotanbo_py_utils import file_utils
+from iotanbo_py_utils.error import ErrorKind
+from iotanbo_py_utils.hash_algorithms import available_hash_algorithms
+from iotanbo_py_utils.hash_algorithms import hash_algorithm_available
+from iotanbo_py_utils.hash_algorithms import new_hasher_ne
+from iotanbo_py_utils.hash_algorithms import register_hash_algorithm_ne
+from iotanbo_py_utils.hash_algorithms import unregister_hash_algorithm
+
+
+def _digest(name: str, data: bytes) -> bytes:
+    h = new_hasher_ne(name).unwrap()
+    h.update(data)
+    return h.digest()  # type: ignore[no-any-return]
+
+
+def test_builtin_algorithms() -> None:
+    data = b"test"
+    assert _digest("crc32", data) == zlib.crc32(data).to_bytes(4, "big")
+    assert _digest("adler32", data) == zlib.adler32(data).to_bytes(4, "big")
+    assert _digest("md5", data) == hashlib.md5(data).digest()
+    assert _digest("sha3_256", data) == hashlib.sha3_256(data).digest()
+    assert _digest("blake2b", data) == hashlib.blake2b(data).digest()
+    assert (
+        _digest("blake2b-256", data) == hashlib.blake2b(data, digest_size=32).digest()
+    )
+    assert (
+        _digest("blake2s-128", data) == hashlib.blake2s(data, digest_size=16).digest()
+    )
+
+    for name in ("blake2b-1024", "blake2s-12", "blake2b-0", "shake_128", "dummy"):
+        assert not hash_algorithm_available(name)
+        assert new_hasher_ne(name).unwrap_err().kind == ErrorKind.ValueError
+
+    names = available_hash_algorithms()
+    assert {"adler32", "crc32", "md5", "sha1", "sha256", "sha512"} <= set(names)
+    assert names == sorted(names)
+    assert "shake_256" not in names
+
+
+class _XorHasher:
+    """Toy non-cryptographic hasher."""
+
+    def __init__(self) -> None:
+        self._value = 0
+
+    def update(self, data: Any) -> None:
+        for b in bytes(data):
+            self._value ^= b
+
+    def digest(self) -> bytes:
+        return bytes([self._value])
+
+
+def test_register_hash_algorithm(tmp_path: Path) -> None:
+    existing_text_file = str(tmp_path / "file.txt")
+    with open(existing_text_file, "w") as f:
+        f.write("test")
+    res = register_hash_algorithm_ne("sha256", _XorHasher)
+    assert res.unwrap_err().kind == ErrorKind.ValueError
+    assert register_hash_algorithm_ne("xor", _XorHasher).is_ok()
+    try:
+        assert "xor" in available_hash_algorithms()
+        assert register_hash_algorithm_ne("xor", _XorHasher).is_err()
+        assert register_hash_algorithm_ne("xor", _XorHasher, overwrite=True).is_ok()
+        # the algorithm is available to all hashing functions
+        expected = bytes([ord("t") ^ ord("e") ^ ord("s") ^ ord("t")])
+        digest = file_utils.get_file_hash_ne(existing_text_file, algorithm="xor")
+        assert digest.unwrap() == expected
+        digests = file_utils.get_file_digests_ne(
+            existing_text_file, algorithms=["xor", "blake2s-256"]
+        ).unwrap()
+        assert digests["xor"] == expected
+        results = file_utils.hash_files_ne([existing_text_file], algorithm="xor")
+        assert results[existing_text_file].unwrap() == expected
+    finally:
+        unregister_hash_algorithm("xor")
+    assert not hash_algorithm_available("xor")
+
+
+def test_failing_factory() -> None:
+    def _factory() -> Any:
+        raise RuntimeError("no license")
+
+    assert register_hash_algorithm_ne("failing", _factory).is_ok()
+    try:
+        assert new_hasher_ne("failing").is_err()
+    finally:
+        unregister_hash_algorithm("failing")
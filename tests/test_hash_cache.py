@@ -0,0 +1,110 @@
+"""Test `hash_cache.py`."""
+import os
+import time
+from pathlib import Path
+from types import SimpleNamespace
+from typing import Any
+
+import pytest
+
+from iotanbo_py_utils import file_utils
+from iotanbo_py_utils import hash_cache
+from iotanbo_py_utils.hash_cache import HashCache
+
+
+# 2001-09-09, well outside of the racy window
+OLD_TIME_NS = 1_000_000_000 * 1_000_000_000
+
+
+def _fake_stat(ino: int, mtime_ns: int = OLD_TIME_NS) -> Any:
+    return SimpleNamespace(st_dev=1, st_ino=ino, st_size=10, st_mtime_ns=mtime_ns)
+
+
+def test_get_put(tmp_path: Path) -> None:
+    db_path = str(tmp_path / "cache.sqlite")
+    with HashCache.open_ne(db_path).unwrap() as cache:
+        st = _fake_stat(2**64 - 1)
+        assert cache.get(st, "sha256") is None
+        cache.put(st, "sha256", b"digest")
+        cache.put(st, "crc32", b"crc")
+        assert cache.get(st, "sha256") == b"digest"
+        assert len(cache) == 2
+        # a modified file is a miss and its entry is replaced
+        assert cache.get(_fake_stat(2**64 - 1, OLD_TIME_NS + 1), "sha256") is None
+        cache.put(_fake_stat(2**64 - 1, OLD_TIME_NS + 1), "sha256", b"new")
+        assert len(cache) == 2
+        # files modified just now are not stored
+        cache.put(_fake_stat(3, mtime_ns=0x7FFFFFFFFFFFFFFF), "sha256", b"digest")
+        assert len(cache) == 2
+
+        # the database is shared with other connections (and processes)
+        with HashCache.open_ne(db_path).unwrap() as other:
+            assert (
+                other.get(_fake_stat(2**64 - 1, OLD_TIME_NS + 1), "sha256") == b"new"
+            )
+
+    # a closed cache does not raise
+    assert cache.get(st, "crc32") is None
+    cache.put(st, "crc32", b"crc")
+
+    assert HashCache.open_ne(str(tmp_path)).is_err()
+
+
+def test_lru_eviction(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    now = [1000.0]
+    monkeypatch.setattr(time, "time", lambda: now[0])
+    monkeypatch.setattr(hash_cache, "_EVICTION_INTERVAL", 1)
+    cache = HashCache.open_ne(str(tmp_path / "cache.sqlite"), max_entries=2).unwrap()
+    cache.put(_fake_stat(1), "sha256", b"1")
+    now[0] += 100
+    cache.put(_fake_stat(2), "sha256", b"2")
+    now[0] += 100
+    # the hit makes the first entry the most recently used one
+    assert cache.get(_fake_stat(1), "sha256") == b"1"
+    now[0] += 100
+    cache.put(_fake_stat(3), "sha256", b"3")
+    assert len(cache) == 2
+    assert cache.get(_fake_stat(2), "sha256") is None
+    assert cache.get(_fake_stat(1), "sha256") == b"1"
+
+    cache.max_entries = 1
+    cache.evict()
+    assert len(cache) == 1
+    assert cache.get(_fake_stat(1), "sha256") is None
+    cache.close()
+
+
+def test_hashing_with_cache(tmp_path: Path) -> None:
+    path = str(tmp_path / "file.txt")
+    with open(path, "w") as f:
+        f.write("test")
+    os.utime(path, ns=(OLD_TIME_NS, OLD_TIME_NS))
+    st = os.stat(path)
+    cache = HashCache.open_ne(str(tmp_path / "cache.sqlite")).unwrap()
+
+    digest = file_utils.get_file_hash_ne(path, algorithm="sha1", cache=cache).unwrap()
+    assert digest.hex() == "a94a8fe5ccb19ba61c4c0873d391e987982fbbd3"
+    assert cache.get(st, "sha1") == digest
+    crc32 = file_utils.get_file_crc32_hex_ne(path, cache=cache).unwrap()
+    assert crc32 == "D87F7E0C"
+    assert len(cache) == 2
+
+    # cached digests are returned without reading the file
+    cache.put(st, "sha1", b"cached")
+    digest = file_utils.get_file_hash_ne(path, algorithm="sha1", cache=cache).unwrap()
+    assert digest == b"cached"
+    digests = file_utils.get_file_digests_ne(
+        path, algorithms=["sha1", "sha256"], cache=cache
+    ).unwrap()
+    assert digests["sha1"] == b"cached"
+    assert len(cache) == 3
+    results = file_utils.hash_files_ne([path], algorithm="sha1", cache=cache)
+    assert results[path].unwrap() == b"cached"
+
+    # a modified file is hashed again
+    with open(path, "w") as f:
+        f.write("test2")
+    os.utime(path, ns=(OLD_TIME_NS, OLD_TIME_NS + 1))
+    digest = file_utils.get_file_hash_ne(path, algorithm="sha1", cache=cache).unwrap()
+    assert digest != b"cached"
+    cache.close()
@@ -0,0 +1,123 @@
+"""Test `ignore_matcher.py`."""
+import os
+from pathlib import Path
+
+import pytest
+
+from iotanbo_py_utils.error import ErrorKind
+from iotanbo_py_utils.ignore_matcher import IgnoreMatcher
+
+
+def test_literal_paths() -> None:
+    m = IgnoreMatcher.from_paths(["foo", os.path.join("bar", "baz"), ""])
+    assert m.match("foo")
+    assert m.match("foo", is_dir=True)
+    # prefix matching respects path component boundaries
+    assert not m.match("foobar")
+    assert not m.is_ignored("foobar")
+    assert m.is_ignored("foo/file.txt")
+    assert m.match("bar/baz")
+    assert not m.match("bar")
+    assert not m.match("bar/bazz")
+    assert m.is_ignored("bar/baz/qux/file.txt")
+    # special characters are not interpreted
+    assert not IgnoreMatcher.from_paths(["*.txt"]).match("a.txt")
+    # empty matcher ignores nothing
+    assert not IgnoreMatcher().is_ignored("anything")
+
+
+def test_gitignore_patterns() -> None:
+    m = IgnoreMatcher(
+        [
+            "# comment",
+            "",
+            "*.pyc",
+            "__pycache__/",
+            "/build",
+            "docs/*.html",
+            "**/tmp/**",
+            "data/**/raw",
+            "file?.[ch]",
+        ]
+    )
+    # globs match at any depth when not anchored
+    assert m.match("a.pyc")
+    assert m.match("pkg/sub/a.pyc")
+    assert not m.match("a.py")
+    # directory-only patterns
+    assert m.match("pkg/__pycache__", is_dir=True)
+    assert not m.match("pkg/__pycache__")
+    # anchored patterns
+    assert m.match("build", is_dir=True)
+    assert not m.match("src/build", is_dir=True)
+    assert m.match("docs/index.html")
+    assert not m.match("docs/api/index.html")
+    assert not m.match("other/docs/index.html")
+    # `**`
+    assert m.match("tmp/x")
+    assert m.match("a/b/tmp/x/y")
+    assert not m.match("a/tmp")
+    assert m.match("data/raw", is_dir=True)
+    assert m.match("data/2021/01/raw", is_dir=True)
+    # `?` and character classes
+    assert m.match("file1.c")
+    assert m.match("src/fileA.h")
+    assert not m.match("file12.c")
+    assert not m.match("file1.o")
+    # comments are skipped
+    assert not m.match("# comment")
+
+
+def test_negation() -> None:
+    m = IgnoreMatcher(["*.log", "!important.log", "logs/", "!logs/"])
+    assert m.match("debug.log")
+    assert not m.match("important.log")
+    assert not m.match("sub/important.log")
+    # the last matching pattern wins
+    assert not m.match("logs", is_dir=True)
+
+    m = IgnoreMatcher(["!keep.txt", "*.txt"])
+    assert m.match("keep.txt")
+
+    # a file can't be re-included if its parent directory is ignored
+    m = IgnoreMatcher(["build/", "!build/keep.txt"])
+    assert m.is_ignored("build/keep.txt")
+    assert not m.match("build/keep.txt")
+
+    # escaped `!` and `#` are literals
+    m = IgnoreMatcher(["\\!important", "\\#hash"])
+    assert m.match("!important")
+    assert m.match("#hash")
+
+
+def test_from_gitignore_ne(tmp_path: Path) -> None:
+    gitignore = os.path.join(tmp_path, ".gitignore")
+    with open(gitignore, "w") as f:
+        f.write("*.o\n!main.o\n")
+    m = IgnoreMatcher.from_gitignore_ne(gitignore).unwrap()
+    assert m.match("util.o")
+    assert not m.match("main.o")
+
+    # negative path
+    assert (
+        IgnoreMatcher.from_gitignore_ne(os.path.join(tmp_path, "missing"))
+        .unwrap_err()
+        .kind_is(ErrorKind.FileNotFoundError)
+    )
+
+
+@pytest.mark.parametrize(
+    "pattern, path, expected",
+    [
+        ("[!a]x", "bx", True),
+        ("[!a]x", "ax", False),
+        ("[a", "[a", True),
+        ("a/**", "a/b/c", True),
+        ("a/**", "a", False),
+        ("**", "a/b", True),
+        ("a**b", "axxb", True),
+        ("a**b", "ax/xb", False),
+    ],
+)
+def test_glob_translation(pattern: str, path: str, expected: bool) -> None:
+    assert IgnoreMatcher([pattern]).match(path) == expected
@@ -0,0 +1,200 @@
+"""Test `tree_snapshot.py`."""
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from iotanbo_py_utils import file_utils
+from iotanbo_py_utils.error import ErrorKind
+from iotanbo_py_utils.tree_snapshot import diff_trees_ne
+from iotanbo_py_utils.tree_snapshot import TreeSnapshot
+
+
+join = os.path.join
+
+# 2001-09-09, long before any snapshot taken in the tests
+OLD_TIME_NS = 1_000_000_000 * 10**9
+
+
+def _create_tree(root: str) -> None:
+    for d in ["a", join("a", "b"), "c"]:
+        assert file_utils.create_path_ne(join(root, d)).is_ok()
+    assert file_utils.write_file_ne(join(root, "top.txt"), "top").is_ok()
+    assert file_utils.write_file_ne(join(root, "a", "b", "deep.txt"), "deep").is_ok()
+    assert file_utils.create_symlink_ne(
+        join(root, "top.txt"), join(root, "c", "link")
+    ).is_ok()
+    _age_dirs(root)
+
+
+def _age_dirs(root: str) -> None:
+    """Move directory mtimes to the past, so that they are not `racy`."""
+    for d, _, _ in os.walk(root):
+        os.utime(d, ns=(OLD_TIME_NS, OLD_TIME_NS))
+
+
+def test_create_ne(tmp_path: Path) -> None:
+    root = str(tmp_path)
+    _create_tree(root)
+    snapshot = TreeSnapshot.create_ne(root).unwrap()
+    assert len(snapshot) == 6
+    assert snapshot.scanned_dir_count == 4
+    assert snapshot.root_entry.type == "dir"
+
+    top = snapshot.entries["top.txt"]
+    st = os.lstat(join(root, "top.txt"))
+    assert top.type == "file"
+    assert top.size == 3
+    assert top.mtime_ns == st.st_mtime_ns
+    assert top.inode == st.st_ino
+    assert snapshot.entries[join("a", "b")].type == "dir"
+    assert snapshot.entries[join("c", "link")].type == "symlink"
+
+    # negative path
+    assert (
+        TreeSnapshot.create_ne(join(root, "top.txt"))
+        .unwrap_err()
+        .kind_is(ErrorKind.TypeError)
+    )
+    assert (
+        TreeSnapshot.create_ne(join(root, "missing"))
+        .unwrap_err()
+        .kind_is(ErrorKind.FileNotFoundError)
+    )
+
+
+def test_rescan_ne(tmp_path: Path) -> None:
+    root = str(tmp_path)
+    _create_tree(root)
+    snapshot = TreeSnapshot.create_ne(root).unwrap()
+
+    # nothing changed: no directory is read again
+    rescanned = snapshot.rescan_ne().unwrap()
+    assert rescanned.scanned_dir_count == 0
+    assert rescanned.entries == snapshot.entries
+
+    # a new file: only its directory is read again
+    assert file_utils.write_file_ne(join(root, "a", "b", "new.txt"), "new").is_ok()
+    rescanned = snapshot.rescan_ne().unwrap()
+    assert rescanned.scanned_dir_count == 1
+    assert join("a", "b", "new.txt") in rescanned.entries
+    assert len(rescanned) == len(snapshot) + 1
+
+    # removed directory
+    assert file_utils.remove_dir_ne(join(root, "a")).is_ok()
+    rescanned = rescanned.rescan_ne().unwrap()
+    assert not any(p.startswith("a") for p in rescanned.entries)
+    assert rescanned.entries == TreeSnapshot.create_ne(root).unwrap().entries
+
+    # recently modified directories are always read again
+    os.utime(join(root, "c"))
+    fresh = TreeSnapshot.create_ne(root).unwrap()
+    assert fresh.scanned_dir_count == 2
+    assert fresh.rescan_ne().unwrap().scanned_dir_count == 2
+
+
+def test_save_load_ne(tmp_path: Path) -> None:
+    root = join(str(tmp_path), "tree")
+    _create_tree(root)
+    # names that share prefixes and are not valid UTF-8
+    assert file_utils.write_file_ne(join(root, "a", "long-name-1"), "").is_ok()
+    assert file_utils.write_file_ne(join(root, "a", "long-name-2"), "").is_ok()
+    with open(os.fsdecode(os.fsencode(root) + b"/\xff\xfe"), "w"):
+        pass
+    _age_dirs(root)
+    snapshot = TreeSnapshot.create_ne(root).unwrap()
+
+    path = join(str(tmp_path), "tree.snapshot")
+    assert snapshot.save_ne(path).is_ok()
+    loaded = TreeSnapshot.load_ne(path).unwrap()
+    assert loaded.root == snapshot.root
+    assert loaded.root_entry == snapshot.root_entry
+    assert loaded.scan_time_ns == snapshot.scan_time_ns
+    assert loaded.entries == snapshot.entries
+
+    # a loaded snapshot can be rescanned incrementally
+    assert loaded.rescan_ne().unwrap().scanned_dir_count == 0
+
+    # concurrent saves to the same path do not share a temporary file
+    with ThreadPoolExecutor(max_workers=8) as executor:
+        results = list(executor.map(snapshot.save_ne, [path] * 32))
+    assert all(r.is_ok() for r in results)
+    assert sorted(os.listdir(str(tmp_path))) == ["tree", "tree.snapshot"]
+    assert TreeSnapshot.load_ne(path).unwrap().entries == snapshot.entries
+
+    # negative path
+    assert (
+        TreeSnapshot.load_ne(join(str(tmp_path), "missing"))
+        .unwrap_err()
+        .kind_is(ErrorKind.FileNotFoundError)
+    )
+    assert (
+        TreeSnapshot.load_ne(join(root, "top.txt"))
+        .unwrap_err()
+        .kind_is(ErrorKind.ValueError)
+    )
+    with open(path, "r+b") as f:
+        f.truncate(20)
+    assert TreeSnapshot.load_ne(path).unwrap_err().kind_is(ErrorKind.ValueError)
+    assert snapshot.save_ne(root).unwrap_err().kind_is(ErrorKind.TypeError)
+
+
+def test_diff_trees_ne(tmp_path: Path) -> None:
+    a = join(str(tmp_path), "a")
+    b = join(str(tmp_path), "b")
+    _create_tree(a)
+    assert file_utils.copy_tree_ne(a, b).is_ok()
+
+    # identical trees
+    assert diff_trees_ne(a, b).unwrap() == ([], [], [], [])
+    # mtimes are not preserved, contents are compared
+    for f in ["top.txt", join("a", "b", "deep.txt")]:
+        os.utime(join(b, f), ns=(OLD_TIME_NS + 1, OLD_TIME_NS + 1))
+    assert diff_trees_ne(a, b).unwrap() == ([], [], [], [])
+
+    assert file_utils.write_file_ne(join(b, "new.txt"), "new").is_ok()
+    assert file_utils.remove_file_ne(join(b, "a", "b", "deep.txt")).is_ok()
+    assert file_utils.remove_dir_ne(join(b, "c")).is_ok()
+    assert file_utils.write_file_ne(join(b, "c"), "now a file").is_ok()
+    # same size, different contents
+    assert file_utils.write_file_ne(join(b, "top.txt"), "TOP", overwrite=True).is_ok()
+    os.utime(join(b, "top.txt"), ns=(OLD_TIME_NS + 2, OLD_TIME_NS + 2))
+
+    diff = diff_trees_ne(a, b).unwrap()
+    assert diff.added == ["new.txt"]
+    assert diff.removed == [join("a", "b", "deep.txt"), join("c", "link")]
+    assert diff.type_changed == ["c"]
+    assert diff.modified == ["top.txt"]
+
+    # without content comparison a different mtime is enough
+    assert file_utils.write_file_ne(join(b, "top.txt"), "top", overwrite=True).is_ok()
+    os.utime(join(b, "top.txt"), ns=(OLD_TIME_NS + 3, OLD_TIME_NS + 3))
+    assert diff_trees_ne(a, b).unwrap().modified == []
+    assert diff_trees_ne(a, b, compare_content=False).unwrap().modified == ["top.txt"]
+
+    # other items are compared by metadata, a FIFO is not opened
+    if hasattr(os, "mkfifo"):
+        os.mkfifo(join(a, "fifo"))
+        os.mkfifo(join(b, "fifo"))
+        os.utime(join(b, "fifo"), ns=(OLD_TIME_NS + 4, OLD_TIME_NS + 4))
+        assert diff_trees_ne(a, b).unwrap().modified == ["fifo"]
+        os.remove(join(a, "fifo"))
+        os.remove(join(b, "fifo"))
+
+    # snapshot of a tree compared with the current state of the same tree
+    snapshot = TreeSnapshot.create_ne(b).unwrap()
+    path = join(str(tmp_path), "b.snapshot")
+    assert snapshot.save_ne(path).is_ok()
+    assert file_utils.write_file_ne(join(b, "new.txt"), "NEW", overwrite=True).is_ok()
+    os.utime(join(b, "new.txt"), ns=(OLD_TIME_NS, OLD_TIME_NS))
+    assert file_utils.write_file_ne(join(b, "newer.txt"), "").is_ok()
+    diff = diff_trees_ne(TreeSnapshot.load_ne(path).unwrap(), b).unwrap()
+    assert diff.added == ["newer.txt"]
+    assert diff.modified == ["new.txt"]
+
+    # negative path
+    assert (
+        diff_trees_ne(a, join(str(tmp_path), "missing"))
+        .unwrap_err()
+        .kind_is(ErrorKind.FileNotFoundError)
+    )
+    assert diff_trees_ne(a, b, max_workers=0).unwrap_err().kind_is(ErrorKind.ValueError)
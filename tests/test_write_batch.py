@@ -0,0 +1,91 @@
+"""Test `write_batch.py`."""
+import os
+from pathlib import Path
+
+from iotanbo_py_utils import file_utils
+from iotanbo_py_utils.error import ErrorKind
+from iotanbo_py_utils.write_batch import WriteBatch
+
+
+def test_write_batch(tmp_path: Path) -> None:
+    (tmp_path / "sub").mkdir()
+    existing = tmp_path / "existing.txt"
+    existing.write_text("old")
+    os.chmod(existing, 0o600)
+    paths = [str(tmp_path / f"{i}.txt") for i in range(10)]
+    paths.append(str(tmp_path / "sub" / "nested.txt"))
+
+    with WriteBatch(max_workers=4) as batch:
+        for i, p in enumerate(paths):
+            assert batch.write_file_ne(p, f"text {i}").is_ok()
+        assert batch.write_binary_file_ne(paths[0], b"last write wins").is_ok()
+        assert batch.write_file_ne(str(existing), "new", overwrite=True).is_ok()
+        res = batch.write_file_ne(str(existing), "new")
+        assert res.unwrap_err().kind == ErrorKind.FileExistsError
+        res = batch.write_file_ne(str(tmp_path / "sub"), "new", overwrite=True)
+        assert res.unwrap_err().kind == ErrorKind.TypeError
+        assert len(batch) == 12
+        # nothing is visible before the commit
+        assert not os.path.exists(paths[1])
+        assert existing.read_text() == "old"
+        assert batch.commit_ne().is_ok()
+        assert len(batch) == 0
+        assert batch.commit_ne().is_ok()
+
+    assert file_utils.read_binary_file_ne(paths[0]).unwrap() == b"last write wins"
+    for i, p in enumerate(paths[1:], 1):
+        assert file_utils.read_file_ne(p).unwrap() == f"text {i}"
+    assert existing.read_text() == "new"
+    assert existing.stat().st_mode & 0o777 == 0o600
+    assert len(os.listdir(tmp_path)) == 12
+    assert os.listdir(tmp_path / "sub") == ["nested.txt"]
+
+
+def test_write_batch_dangling_symlink(tmp_path: Path) -> None:
+    link = tmp_path / "link"
+    os.symlink(tmp_path / "target.txt", link)
+    with WriteBatch() as batch:
+        assert batch.write_file_ne(str(link), "text").is_ok()
+        assert batch.commit_ne().is_ok()
+    # written through, as without a batch
+    assert link.is_symlink()
+    assert (tmp_path / "target.txt").read_text() == "text"
+    assert sorted(os.listdir(tmp_path)) == ["link", "target.txt"]
+
+
+def test_write_batch_errors(tmp_path: Path) -> None:
+    # uncommitted writes are discarded
+    with WriteBatch() as batch:
+        assert batch.write_file_ne(str(tmp_path / "a.txt"), "a").is_ok()
+    assert os.listdir(tmp_path) == []
+
+    # a file created after it is written to the batch is not overwritten,
+    # the other files are still committed
+    batch = WriteBatch()
+    a, b = str(tmp_path / "a.txt"), str(tmp_path / "b.txt")
+    assert batch.write_file_ne(a, "batch").is_ok()
+    assert batch.write_file_ne(b, "batch").is_ok()
+    file_utils.write_file_ne(a, "other").unwrap()
+    err = batch.commit_ne().unwrap_err()
+    assert err.kind == ErrorKind.FileExistsError
+    assert err.msg.startswith(a)
+    assert file_utils.read_file_ne(a).unwrap() == "other"
+    assert file_utils.read_file_ne(b).unwrap() == "batch"
+    assert sorted(os.listdir(tmp_path)) == ["a.txt", "b.txt"]
+
+    # a read-only file is replaced and keeps its mode
+    read_only = tmp_path / "read_only.txt"
+    read_only.write_text("old")
+    os.chmod(read_only, 0o444)
+    batch = WriteBatch()
+    assert batch.write_file_ne(str(read_only), "new", overwrite=True).is_ok()
+    assert batch.commit_ne().is_ok()
+    assert read_only.read_text() == "new"
+    assert read_only.stat().st_mode & 0o777 == 0o444
+    read_only.unlink()
+
+    batch = WriteBatch(max_workers=0)
+    assert batch.write_file_ne(str(tmp_path / "c.txt"), "c").is_ok()
+    assert batch.commit_ne().unwrap_err().kind == ErrorKind.ValueError
+    batch.close()
+    assert sorted(os.listdir(tmp_path)) == ["a.txt", "b.txt"]